@@ -29,6 +29,13 @@ except ImportError as e:
     st.info("Verifica que todos los archivos estén en su lugar.")
     st.stop()
 
+# Precarga de BeSoccer en segundo plano desde que arranca la app
+try:
+    from utils.precarga_besoccer import iniciar_planificador
+    iniciar_planificador()
+except ImportError as e:
+    print(f"⚠️ Precarga de BeSoccer no disponible: {e}")
+
 # CSS personalizado con paleta corporativa
 st.markdown("""
 <style>
@@ -9,6 +9,7 @@ import pandas as pd
 import time
 import logging
 from models.wyscout_model import WyscoutModel
+from models.wyscout_store import obtener_store_wyscout
 from models.partido_model import PartidoModel
 from models.jugador_model import JugadorModel
 
@@ -24,11 +25,11 @@ def get_wyscout_singleton():
     """
     return WyscoutModel()
 
-@st.cache_data(ttl=3600, show_spinner=False)  # 1 hora
 def cargar_datos_wyscout():
     """
     Carga datos de Wyscout con cache compartido
-    TODOS los usuarios comparten estos datos
+    TODOS los usuarios comparten estos datos (store único del proceso,
+    se recarga solo cuando cambia el Excel)
     """
     wyscout_model = get_wyscout_singleton()
     return wyscout_model.get_all_players()
@@ -142,6 +143,7 @@ def limpiar_cache_manual():
     # Limpiar cache de Streamlit
     st.cache_data.clear()
     st.cache_resource.clear()
+    obtener_store_wyscout().recargar()
     
     # CAMBIO: Ya no existe force_refresh, el clear() es suficiente
     # El próximo acceso recargará los datos automáticamente
@@ -179,8 +181,8 @@ def get_cache_statistics():
     """
     stats = {
         'wyscout_data': {
-            'ttl': 3600,
-            'descripcion': 'Datos principales de jugadores'
+            'ttl': None,
+            'descripcion': 'Datos principales de jugadores (store compartido, se invalida al cambiar el Excel)'
         },
         'lista_visualizacion': {
             'ttl': 300,
@@ -0,0 +1,156 @@
+# common/consultas.py
+"""
+Consultas que cruzan jugadores.db y partidos.db.
+
+Todas usan `conectar_unificada()` (jugadores.db con partidos.db adjunta),
+así que cada cruce de informes con jugadores es una única sentencia SQL en
+lugar de dos conexiones y un join en Python.
+"""
+
+import logging
+
+import pandas as pd
+
+from common.database import conectar_unificada
+
+logger = logging.getLogger(__name__)
+
+SQL_INFORMES_JUGADOR = '''
+    SELECT
+        i.id,
+        i.partido_id,
+        i.fecha_creacion,
+        i.nota_general,
+        i.tipo_evaluacion,
+        i.recomendacion,
+        i.observaciones,
+        i.scout_usuario,
+        i.minutos_observados,
+        i.posicion_evaluada as posicion,
+        i.fortalezas,
+        i.debilidades,
+        i.metricas,
+        i.metadata,
+        i.imagen_url,
+        p.equipo_local,
+        p.equipo_visitante,
+        p.fecha as fecha_partido,
+        p.resultado_local,
+        p.resultado_visitante,
+        (SELECT j.url_besoccer FROM main.jugadores_observados j
+         WHERE j.jugador = i.jugador_nombre AND j.equipo = i.equipo
+         LIMIT 1) as url_besoccer
+    FROM partidos.informes_scouting i
+    JOIN partidos.partidos p ON i.partido_id = p.id
+    WHERE i.jugador_nombre = ? AND i.equipo = ?
+    ORDER BY i.fecha_creacion DESC
+'''
+
+SQL_JUGADORES_CON_INFORMES = '''
+    SELECT j.*,
+        COUNT(DISTINCT i.id) as total_informes,
+        MAX(i.fecha_creacion) as ultimo_informe,
+        AVG(i.nota_general) as nota_promedio,
+        CASE
+            WHEN j.veces_observado = 1 THEN 'Nuevo'
+            WHEN j.veces_observado <= 3 THEN 'Seguimiento'
+            ELSE 'Objetivo'
+        END as estado_observacion
+    FROM main.jugadores_observados j
+    INNER JOIN partidos.informes_scouting i ON (
+        j.nombre_norm = LOWER(TRIM(i.jugador_nombre))
+        AND j.equipo_norm = LOWER(TRIM(i.equipo))
+    )
+    GROUP BY j.id
+    ORDER BY ultimo_informe DESC
+'''
+
+SQL_INFORME_DE_JUGADOR = '''
+    SELECT j.id, i.nota_general, i.tipo_evaluacion, i.recomendacion
+    FROM main.jugadores_observados j
+    JOIN partidos.informes_scouting i ON i.id = ?
+    WHERE j.jugador = ? AND j.equipo = ?
+'''
+
+SQL_INFORMES_POR_ID = '''
+    SELECT i.*,
+        p.equipo_local,
+        p.equipo_visitante,
+        p.fecha,
+        (SELECT j.id FROM main.jugadores_observados j
+         WHERE j.nombre_norm = LOWER(TRIM(i.jugador_nombre))
+           AND j.equipo_norm = LOWER(TRIM(i.equipo))
+         LIMIT 1) as jugador_bd_id
+    FROM partidos.informes_scouting i
+    LEFT JOIN partidos.partidos p ON i.partido_id = p.id
+    WHERE i.id IN ({marcas})
+'''
+
+
+def _filas_dict(cursor):
+    columnas = [d[0] for d in cursor.description]
+    return [dict(zip(columnas, fila)) for fila in cursor.fetchall()]
+
+
+def informes_jugador(jugador_nombre, equipo, conn=None):
+    """
+    Informes de un jugador con los datos del partido y su url_besoccer de
+    la Base Personal (lista de dicts, más recientes primero)
+    """
+    propia = conn is None
+    conn = conn or conectar_unificada()
+    try:
+        return _filas_dict(conn.execute(SQL_INFORMES_JUGADOR, (jugador_nombre, equipo)))
+    finally:
+        if propia:
+            conn.close()
+
+
+def jugadores_con_informes(conn=None):
+    """Jugadores de la Base Personal que tienen informes reales (DataFrame)"""
+    propia = conn is None
+    conn = conn or conectar_unificada()
+    try:
+        df = pd.read_sql_query(SQL_JUGADORES_CON_INFORMES, conn)
+    finally:
+        if propia:
+            conn.close()
+    # Los recuentos calculados sustituyen a las columnas guardadas del mismo nombre
+    return df.loc[:, ~df.columns.duplicated(keep='last')]
+
+
+def informe_de_jugador(conn, informe_id, jugador_nombre, equipo):
+    """(jugador_id, nota_general, tipo_evaluacion, recomendacion) o None"""
+    return conn.execute(SQL_INFORME_DE_JUGADOR, (informe_id, jugador_nombre, equipo)).fetchone()
+
+
+def informes_con_jugador(informe_ids, conn=None):
+    """
+    [(informe, jugador)] de los informes indicados, en el mismo orden: el
+    informe con los datos del partido y su fila de jugadores_observados
+    (dict vacío si el jugador no está en la Base Personal). Los ids que no
+    existen se omiten.
+    """
+    informe_ids = [int(i) for i in informe_ids]
+    if not informe_ids:
+        return []
+
+    propia = conn is None
+    conn = conn or conectar_unificada()
+    try:
+        marcas = ','.join('?' * len(informe_ids))
+        informes = {i['id']: i for i in _filas_dict(
+            conn.execute(SQL_INFORMES_POR_ID.format(marcas=marcas), informe_ids))}
+
+        ids_jugadores = sorted({i['jugador_bd_id'] for i in informes.values() if i['jugador_bd_id']})
+        jugadores = {}
+        if ids_jugadores:
+            marcas = ','.join('?' * len(ids_jugadores))
+            jugadores = {j['id']: j for j in _filas_dict(conn.execute(
+                f"SELECT * FROM main.jugadores_observados WHERE id IN ({marcas})", ids_jugadores))}
+    finally:
+        if propia:
+            conn.close()
+
+    return [(informes[i], jugadores.get(informes[i]['jugador_bd_id'], {}))
+            for i in informe_ids if i in informes]
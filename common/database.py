@@ -0,0 +1,203 @@
+# common/database.py
+"""
+Conexiones SQLite compartidas para jugadores.db, partidos.db y usuarios.db.
+
+`conectar()` sustituye a `sqlite3.connect()`: cada hilo mantiene un pequeño
+pool de conexiones por base de datos ya configuradas (WAL, synchronous
+NORMAL, caché de páginas, mmap y busy_timeout). Al llamar a `conn.close()`
+la conexión no se cierra: se deshace cualquier transacción pendiente y
+vuelve al pool del hilo para la siguiente llamada.
+
+Cada `conectar()` entrega una conexión que nadie más está usando en ese
+hilo, así que las funciones que se llaman entre sí mientras tienen una
+conexión abierta no comparten transacción. Las conexiones que no se
+devuelven se cierran solas al liberarse, igual que antes.
+
+`conectar_unificada()` da una conexión a jugadores.db con partidos.db
+adjunta (ATTACH) como esquema `partidos`, para cruzar informes y jugadores
+en una sola consulta (ver common/consultas.py).
+"""
+
+import os
+import sqlite3
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Configuración aplicada a cada conexión nueva
+TIMEOUT_POR_DEFECTO = 20.0
+PRAGMAS_CONEXION = [
+    "PRAGMA journal_mode = WAL",          # lectores y escritor no se bloquean entre sí
+    "PRAGMA synchronous = NORMAL",        # seguro con WAL, un fsync por checkpoint
+    "PRAGMA cache_size = -16000",         # ~16 MB de caché de páginas por conexión
+    "PRAGMA mmap_size = 268435456",       # 256 MB mapeados: páginas compartidas vía caché del SO
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA busy_timeout = 10000",
+]
+MAX_CONEXIONES_LIBRES = 4
+
+RUTA_JUGADORES_DB = "data/jugadores.db"
+RUTA_PARTIDOS_DB = "data/partidos.db"
+ESQUEMA_PARTIDOS = "partidos"
+
+_local = threading.local()
+
+
+class ConexionCompartida(sqlite3.Connection):
+    """Conexión que al cerrarse vuelve al pool de su hilo"""
+
+    def close(self):
+        if getattr(self, '_en_pool', True):
+            return  # ya devuelta (doble close) o ajena al pool
+
+        try:
+            if self.in_transaction:
+                self.rollback()
+            self.row_factory = None
+            self.text_factory = str
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Conexión descartada del pool: {e}")
+            self.cerrar_definitivamente()
+            return
+
+        libres = _conexiones_libres(self._ruta_db)
+        if len(libres) < MAX_CONEXIONES_LIBRES:
+            self._en_pool = True
+            libres.append(self)
+        else:
+            self.cerrar_definitivamente()
+
+    def cerrar_definitivamente(self):
+        """Cierra la conexión de verdad"""
+        self._en_pool = True
+        super().close()
+
+
+def _conexiones_libres(ruta_db):
+    if not hasattr(_local, 'pools'):
+        _local.pools = {}
+    return _local.pools.setdefault(ruta_db, [])
+
+
+def _configurar(conn):
+    for pragma in PRAGMAS_CONEXION:
+        try:
+            conn.execute(pragma)
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ No se pudo aplicar '{pragma}': {e}")
+
+
+def _conexion_del_pool(clave_pool):
+    libres = _conexiones_libres(clave_pool)
+
+    while libres:
+        conn = libres.pop()
+        try:
+            conn.execute("SELECT 1")
+        except sqlite3.Error:
+            conn.cerrar_definitivamente()
+            continue
+        conn._en_pool = False
+        return conn
+    return None
+
+
+def _nueva_conexion(ruta_db, clave_pool, timeout):
+    conn = sqlite3.connect(ruta_db, timeout=timeout, factory=ConexionCompartida)
+    conn._ruta_db = clave_pool
+    conn._en_pool = False
+    _configurar(conn)
+    return conn
+
+
+def conectar(db_path, timeout=TIMEOUT_POR_DEFECTO):
+    """
+    Conexión SQLite del pool del hilo actual (se usa igual que
+    `sqlite3.connect`, incluido `conn.close()`).
+    """
+    ruta_db = os.path.abspath(db_path)
+    return _conexion_del_pool(ruta_db) or _nueva_conexion(ruta_db, ruta_db, timeout)
+
+
+def conectar_unificada(ruta_jugadores=RUTA_JUGADORES_DB, ruta_partidos=RUTA_PARTIDOS_DB,
+                       timeout=TIMEOUT_POR_DEFECTO):
+    """
+    Conexión a jugadores.db (esquema `main`) con partidos.db adjunta como
+    `partidos`. Las tablas sin prefijo se resuelven en la primera base que
+    las tenga: jugadores_observados en main, informes_scouting y partidos en
+    partidos. Las conexiones se reutilizan con el ATTACH ya hecho.
+    """
+    ruta_jugadores = os.path.abspath(ruta_jugadores)
+    ruta_partidos = os.path.abspath(ruta_partidos)
+    clave_pool = f"{ruta_jugadores}+{ruta_partidos}"
+
+    conn = _conexion_del_pool(clave_pool)
+    if conn is None:
+        conn = _nueva_conexion(ruta_jugadores, clave_pool, timeout)
+        conn.execute(f"ATTACH DATABASE ? AS {ESQUEMA_PARTIDOS}", (ruta_partidos,))
+        for pragma in ("journal_mode = WAL", "synchronous = NORMAL", "cache_size = -16000"):
+            conn.execute(f"PRAGMA {ESQUEMA_PARTIDOS}.{pragma}")
+    return conn
+
+
+def cerrar_conexiones_hilo():
+    """Cierra las conexiones libres del hilo actual (p. ej. al terminar un proceso por lotes)"""
+    for libres in getattr(_local, 'pools', {}).values():
+        while libres:
+            libres.pop().cerrar_definitivamente()
+
+
+# ==========================================
+# MIGRACIONES DE ESQUEMA
+# ==========================================
+
+def columnas_tabla(conn, tabla):
+    """Nombres de las columnas de una tabla"""
+    return {fila[1] for fila in conn.execute(f"PRAGMA table_info({tabla})")}
+
+
+def asegurar_columna(conn, tabla, columna, tipo):
+    """Añade una columna si no existe (para migraciones sobre bases de datos antiguas)"""
+    if columna not in columnas_tabla(conn, tabla):
+        conn.execute(f"ALTER TABLE {tabla} ADD COLUMN {columna} {tipo}")
+
+
+def aplicar_migraciones(conn, migraciones, nombre_db=""):
+    """
+    Aplica en orden las migraciones pendientes de una base de datos.
+
+    Args:
+        conn: conexión a la base de datos
+        migraciones: lista de (version, descripcion, paso); `paso` es una
+            lista de sentencias SQL o una función que recibe la conexión
+        nombre_db: nombre para los logs
+
+    La versión aplicada se guarda en PRAGMA user_version. Cada migración va
+    en su propia transacción (BEGIN IMMEDIATE), así que dos procesos que
+    arrancan a la vez no la aplican dos veces.
+    """
+    for version, descripcion, paso in sorted(migraciones, key=lambda m: m[0]):
+        if conn.execute("PRAGMA user_version").fetchone()[0] >= version:
+            continue
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Otro proceso puede haberla aplicado mientras esperábamos el bloqueo
+            if conn.execute("PRAGMA user_version").fetchone()[0] >= version:
+                conn.rollback()
+                continue
+
+            if callable(paso):
+                paso(conn)
+            else:
+                for sentencia in paso:
+                    conn.execute(sentencia)
+
+            conn.execute(f"PRAGMA user_version = {int(version)}")
+            conn.commit()
+            logger.info(f"🛠️ Migración {nombre_db} v{version} aplicada: {descripcion}")
+        except Exception:
+            conn.rollback()
+            logger.error(f"❌ Error en la migración {nombre_db} v{version}: {descripcion}")
+            raise
@@ -2,7 +2,7 @@
 
 import streamlit as st
 import hashlib
-import sqlite3
+from common.database import conectar
 import os
 from datetime import datetime, timedelta
 
@@ -16,7 +16,7 @@ class LoginManager:
         # Crear carpeta data si no existe
         os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
         
-        conn = sqlite3.connect(self.db_path)
+        conn = conectar(self.db_path)
         cursor = conn.cursor()
         
         # Crear tabla de usuarios
@@ -61,7 +61,7 @@ class LoginManager:
     
     def verificar_credenciales(self, usuario, password):
         """Verifica las credenciales del usuario"""
-        conn = sqlite3.connect(self.db_path)
+        conn = conectar(self.db_path)
         cursor = conn.cursor()
         
         password_hash = self.hash_password(password)
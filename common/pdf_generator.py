@@ -1,6 +1,6 @@
 from reportlab.lib.pagesizes import letter, A4
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.styles import ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.lib import colors
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
@@ -8,21 +8,23 @@ import plotly.graph_objects as go
 import plotly.express as px
 from datetime import datetime
 import os
-import tempfile
 import base64
 import io
 
+from common.plantilla_pdf import obtener_plantilla_pdf
+
 class PDFGenerator:
     def __init__(self):
-        self.styles = getSampleStyleSheet()
-        self.setup_custom_styles()
+        # La hoja de estilos se construye una vez y se comparte entre instancias
+        self.styles = obtener_plantilla_pdf().estilos('jugador', self.setup_custom_styles)
     
-    def setup_custom_styles(self):
+    @staticmethod
+    def setup_custom_styles(styles):
         """Configurar estilos personalizados para el PDF"""
         # Estilo para títulos principales
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             name='CustomTitle',
-            parent=self.styles['Heading1'],
+            parent=styles['Heading1'],
             fontSize=18,
             spaceAfter=30,
             alignment=TA_CENTER,
@@ -30,25 +32,26 @@ class PDFGenerator:
         ))
         
         # Estilo para subtítulos
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             name='CustomSubtitle',
-            parent=self.styles['Heading2'],
+            parent=styles['Heading2'],
             fontSize=14,
             spaceAfter=20,
             textColor=colors.HexColor('#2c3e50')
         ))
         
         # Estilo para texto normal
-        self.styles.add(ParagraphStyle(
+        styles.add(ParagraphStyle(
             name='CustomNormal',
-            parent=self.styles['Normal'],
+            parent=styles['Normal'],
             fontSize=10,
             spaceAfter=12,
             alignment=TA_LEFT
         ))
+        return styles
     
     def generar_informe_jugador(self, jugador_data, comparacion_data=None):
-        """Genera un informe PDF completo de un jugador"""
+        """Genera un informe PDF completo de un jugador (bytes del PDF)"""
         
         # Convertir Series a dict si es necesario
         if hasattr(jugador_data, 'to_dict'):
@@ -57,12 +60,12 @@ class PDFGenerator:
         if comparacion_data is not None and hasattr(comparacion_data, 'to_dict'):
             comparacion_data = comparacion_data.to_dict()
         
-        # Crear archivo temporal para el PDF
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.pdf')
+        # El documento se construye en memoria
+        buffer = io.BytesIO()
         
         # Crear documento PDF
         doc = SimpleDocTemplate(
-            temp_file.name,
+            buffer,
             pagesize=A4,
             rightMargin=72,
             leftMargin=72,
@@ -98,7 +101,7 @@ class PDFGenerator:
         # Construir el PDF
         doc.build(story)
         
-        return temp_file.name
+        return buffer.getvalue()
     
     def _agregar_encabezado(self, story, data):
         """Agregar encabezado del informe"""
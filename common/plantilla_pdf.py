@@ -0,0 +1,151 @@
+# common/plantilla_pdf.py
+"""
+Plantilla compartida por los generadores de PDF.
+
+Todo lo que no cambia entre informes se prepara una sola vez por proceso y
+se reutiliza en cada documento:
+
+- Logo de identidad: se lee, se reduce a ANCHO_LOGO_PX y se guarda como PNG
+  en memoria (el original de ~2500 px hacía que FPDF lo decodificara y
+  recomprimiera en cada PDF) y como ImageReader para reportlab.
+- Hojas de estilo de reportlab: `getSampleStyleSheet()` más los estilos
+  propios de cada generador, construidas la primera vez que se piden.
+- Mobiliario de página: cabecera con logo, título y línea decorativa (FPDF),
+  logo de pie de página (FPDF) y pie con fecha, página y logo (reportlab).
+
+Los generadores solo estampan el contenido de cada informe encima.
+
+Uso:
+    plantilla = obtener_plantilla_pdf()
+    pdf = plantilla.nuevo_fpdf('INFORME DE SCOUTING')
+    styles = plantilla.estilos('informe', crear_estilos)
+"""
+
+import os
+import logging
+import threading
+from io import BytesIO
+from datetime import datetime
+
+from fpdf import FPDF
+from PIL import Image as PILImage
+from reportlab.lib import colors
+from reportlab.lib.units import inch
+from reportlab.lib.utils import ImageReader
+from reportlab.lib.styles import getSampleStyleSheet
+
+logger = logging.getLogger(__name__)
+
+RUTA_LOGO = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                         'assets', 'images', 'identidad_MPR_1.png')
+ANCHO_LOGO_PX = 480  # de sobra para los 15-20 mm a los que se imprime
+
+COLOR_PRIMARIO = colors.HexColor("#24282a")
+COLOR_SECUNDARIO = colors.HexColor("#007bff")  # Color de acento
+
+
+class PlantillaPDF:
+    """Logo, estilos y cabeceras/pies de los PDFs, preparados una vez"""
+
+    def __init__(self, logo_path=RUTA_LOGO):
+        self.logo_path = logo_path
+        self.primary_color = COLOR_PRIMARIO
+        self.secondary_color = COLOR_SECUNDARIO
+        self.logo_png = self._preparar_logo()
+        self.logo_reportlab = ImageReader(BytesIO(self.logo_png)) if self.logo_png else None
+        self._estilos = {}
+        self._lock = threading.Lock()
+
+    def _preparar_logo(self):
+        """PNG del logo reducido (bytes) o None si no existe"""
+        if not self.logo_path or not os.path.exists(self.logo_path):
+            logger.warning(f"⚠️ Logo no encontrado: {self.logo_path}")
+            return None
+        try:
+            with PILImage.open(self.logo_path) as img:
+                img.thumbnail((ANCHO_LOGO_PX, ANCHO_LOGO_PX), PILImage.Resampling.LANCZOS)
+                buffer = BytesIO()
+                img.save(buffer, 'PNG', optimize=True)
+            return buffer.getvalue()
+        except OSError as e:
+            logger.warning(f"⚠️ No se pudo cargar el logo: {e}")
+            return None
+
+    def estilos(self, nombre, crear):
+        """
+        Hoja de estilos de reportlab `nombre`, construida una vez con
+        `crear(getSampleStyleSheet())`. No debe modificarse después.
+        """
+        with self._lock:
+            if nombre not in self._estilos:
+                self._estilos[nombre] = crear(getSampleStyleSheet())
+            return self._estilos[nombre]
+
+    # --- FPDF ---
+
+    def estampar_logo(self, pdf, x, y, w):
+        if self.logo_png:
+            pdf.image(BytesIO(self.logo_png), x=x, y=y, w=w)
+
+    def nuevo_fpdf(self, titulo, tamano_titulo=20, alto_titulo=12, ancho_logo=15,
+                   color_linea=(102, 126, 234), grosor_linea=0.5):
+        """FPDF con la primera página ya iniciada: logo, título y línea decorativa"""
+        pdf = FPDF()
+        pdf.set_auto_page_break(auto=True, margin=15)
+        pdf.add_page()
+
+        # Logo en esquina superior derecha
+        self.estampar_logo(pdf, x=185, y=10, w=ancho_logo)
+
+        pdf.set_font('Helvetica', 'B', tamano_titulo)
+        pdf.set_text_color(36, 40, 42)
+        pdf.cell(0, alto_titulo, titulo, 0, 1, 'C')
+
+        # Línea decorativa
+        pdf.set_draw_color(*color_linea)
+        pdf.set_line_width(grosor_linea)
+        pdf.line(20, pdf.get_y(), 190, pdf.get_y())
+        pdf.ln(8)
+        return pdf
+
+    def logo_pie(self, pdf):
+        """Logo en la esquina inferior derecha de la página actual"""
+        self.estampar_logo(pdf, x=175, y=270, w=20)
+
+    # --- reportlab ---
+
+    def pie_reportlab(self, canvas, doc):
+        """Pie de cada página: fecha de generación, número de página y logo"""
+        canvas.saveState()
+
+        # Logo pequeño en esquina inferior derecha
+        if self.logo_reportlab is not None:
+            logo_size = 0.8 * inch
+            canvas.drawImage(self.logo_reportlab,
+                             doc.width + doc.rightMargin - logo_size - 10,
+                             15,
+                             width=logo_size,
+                             height=logo_size,
+                             preserveAspectRatio=True,
+                             mask='auto')
+
+        canvas.setFont("Helvetica", 8)
+        canvas.setFillColor(colors.grey)
+        canvas.drawString(doc.leftMargin, 25,
+                          f"Generado: {datetime.now().strftime('%d/%m/%Y %H:%M')}")
+        canvas.drawCentredString(doc.width / 2 + doc.leftMargin, 25, f"Página {doc.page}")
+
+        canvas.restoreState()
+
+
+_plantilla_pdf = None
+_plantilla_lock = threading.Lock()
+
+
+def obtener_plantilla_pdf(logo_path=RUTA_LOGO):
+    """Plantilla de PDFs compartida por todo el proceso"""
+    global _plantilla_pdf
+    with _plantilla_lock:
+        if _plantilla_pdf is None:
+            _plantilla_pdf = PlantillaPDF(logo_path)
+        return _plantilla_pdf
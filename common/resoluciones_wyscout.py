@@ -0,0 +1,100 @@
+# common/resoluciones_wyscout.py
+"""
+Caché de resoluciones nombre -> fila Wyscout (tabla busquedas_wyscout de
+jugadores.db).
+
+La comparten JugadorModel y el extractor personalizado de utils, por eso
+vive en common y no en models. Cada resolución se guarda con la huella del
+dataset Wyscout con la que se calculó: al cambiar el fichero las entradas
+antiguas dejan de usarse. La tabla y sus columnas las crean las
+migraciones de JugadorModel.
+"""
+
+import re
+import logging
+import sqlite3
+
+import pandas as pd
+
+from common.database import conectar, RUTA_JUGADORES_DB
+
+logger = logging.getLogger(__name__)
+
+
+def limpiar_nombre(texto):
+    """Limpia texto para comparación"""
+    if pd.isna(texto) or texto is None:
+        return ""
+
+    # Convertir a string y limpiar
+    texto = str(texto).strip()
+    # Remover caracteres especiales pero mantener acentos
+    texto = re.sub(r'[^\w\sáéíóúñü]', '', texto, flags=re.IGNORECASE)
+    # Normalizar espacios
+    return ' '.join(texto.split())
+
+
+def clave_busqueda(nombre, equipo):
+    """Clave normalizada (nombre, equipo) de una búsqueda"""
+    equipo_normalizado = limpiar_nombre(equipo).lower() if equipo and equipo != "N/A" else ""
+    return f"{limpiar_nombre(nombre).lower()}|{equipo_normalizado}"
+
+
+def obtener_resolucion(nombre, equipo, origen, version_dataset, umbral=None, db_path=RUTA_JUGADORES_DB):
+    """
+    Última resolución guardada para (nombre, equipo) con esta versión del
+    dataset. Las entradas de versiones anteriores no se consideran.
+
+    Returns:
+        (fila_wyscout, confianza, algoritmo) o None si no hay resolución.
+        fila_wyscout es la posición en el dataset o None si no hubo match.
+    """
+    if version_dataset is None:
+        return None
+
+    try:
+        conn = conectar(db_path)
+        fila = conn.execute('''
+            SELECT fila_wyscout, confianza, algoritmo
+            FROM busquedas_wyscout
+            WHERE clave_busqueda = ? AND origen = ? AND version_dataset = ? AND umbral IS ?
+            ORDER BY id DESC
+            LIMIT 1
+        ''', (clave_busqueda(nombre, equipo), origen, version_dataset, umbral)).fetchone()
+        conn.close()
+    except sqlite3.Error as e:
+        logger.warning(f"⚠️ Error leyendo caché de búsquedas: {e}")
+        return None
+
+    return fila
+
+
+def guardar_resoluciones(registros, origen, version_dataset, db_path=RUTA_JUGADORES_DB):
+    """
+    Guarda varias búsquedas en busquedas_wyscout en una sola transacción.
+    Cada registro es un dict con las columnas de la tabla (nombre_buscado,
+    equipo_buscado, nombre_encontrado, ..., fila_wyscout, umbral).
+    """
+    if not registros:
+        return
+
+    filas = [(
+        r.get('nombre_buscado'), r.get('equipo_buscado'), r.get('nombre_encontrado'),
+        r.get('equipo_encontrado'), r.get('confianza'), r.get('algoritmo'), r.get('jugador_id'),
+        clave_busqueda(r.get('nombre_buscado'), r.get('equipo_buscado')),
+        origen, version_dataset, r.get('fila_wyscout'), r.get('umbral')
+    ) for r in registros]
+
+    try:
+        conn = conectar(db_path)
+        conn.executemany('''
+            INSERT INTO busquedas_wyscout (
+                nombre_buscado, equipo_buscado, nombre_encontrado,
+                equipo_encontrado, confianza, algoritmo, jugador_id,
+                clave_busqueda, origen, version_dataset, fila_wyscout, umbral
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', filas)
+        conn.commit()
+        conn.close()
+    except sqlite3.Error as e:
+        logger.warning(f"⚠️ Error guardando búsquedas: {e}")
@@ -0,0 +1,225 @@
+# models/agregados_jugadores.py
+"""
+Valoraciones agregadas de jugadores_observados mantenidas de forma incremental.
+
+Por jugador se guardan sumas y contadores de sus informes (num_informes,
+num_notas, suma_notas, suma_pesos, num_fichar, num_descartar) y a partir de
+ellos las columnas que usan las páginas: nota_promedio (ponderada, los
+análisis de vídeo completo pesan el doble), nota_general, mejor_nota,
+peor_nota, total_informes y recomendacion_final.
+
+- `sumar_informe`: añade un informe nuevo en O(1), sin leer el historial
+- `reconstruir_agregados`: recalcula todos los jugadores con una única
+  consulta agrupada sobre informes_scouting (partidos.db)
+
+informes_sumados guarda qué informes están ya en los agregados de cada
+jugador, para que sumar dos veces el mismo informe (un reintento, una doble
+llamada desde la página) no lo cuente doble.
+"""
+
+import logging
+
+from common.database import conectar
+
+logger = logging.getLogger(__name__)
+
+PESO_VIDEO_COMPLETO = 2.0
+PESO_POR_DEFECTO = 1.0
+
+COLUMNAS_AGREGADOS = [
+    ('num_informes', 'INTEGER'),
+    ('num_notas', 'INTEGER'),
+    ('suma_notas', 'REAL'),
+    ('suma_pesos', 'REAL'),
+    ('num_fichar', 'INTEGER'),
+    ('num_descartar', 'INTEGER'),
+    ('recomendacion_final', 'TEXT'),
+]
+
+SQL_CREAR_INFORMES_SUMADOS = '''
+    CREATE TABLE IF NOT EXISTS informes_sumados (
+        informe_id INTEGER PRIMARY KEY,
+        jugador_id INTEGER NOT NULL
+    )
+'''
+
+SQL_INDICE_INFORMES_SUMADOS = '''
+    CREATE INDEX IF NOT EXISTS idx_informes_sumados_jugador
+    ON informes_sumados (jugador_id)
+'''
+
+# Columnas derivadas de los agregados (solo si el jugador tiene alguna nota válida)
+_SQL_DERIVADOS = '''
+    UPDATE jugadores_observados SET
+        nota_promedio = ROUND(suma_notas / suma_pesos, 1),
+        nota_general = ROUND(suma_notas / suma_pesos, 0),
+        total_informes = num_informes,
+        recomendacion_final = CASE
+            WHEN num_fichar * 2 >= num_informes THEN 'fichar'
+            WHEN num_descartar * 2 >= num_informes THEN 'descartar'
+            ELSE 'seguir_observando'
+        END
+    WHERE num_notas > 0 AND suma_pesos > 0
+'''
+
+_SQL_SUMAR_INFORME = '''
+    UPDATE jugadores_observados SET
+        mejor_nota = CASE
+            WHEN :nota IS NULL THEN mejor_nota
+            WHEN COALESCE(num_notas, 0) = 0 OR mejor_nota IS NULL THEN :nota
+            ELSE MAX(mejor_nota, :nota)
+        END,
+        peor_nota = CASE
+            WHEN :nota IS NULL THEN peor_nota
+            WHEN COALESCE(num_notas, 0) = 0 OR peor_nota IS NULL THEN :nota
+            ELSE MIN(peor_nota, :nota)
+        END,
+        num_informes = COALESCE(num_informes, 0) + 1,
+        num_notas = COALESCE(num_notas, 0) + :valida,
+        suma_notas = COALESCE(suma_notas, 0) + COALESCE(:nota, 0) * :peso,
+        suma_pesos = COALESCE(suma_pesos, 0) + :peso,
+        num_fichar = COALESCE(num_fichar, 0) + :fichar,
+        num_descartar = COALESCE(num_descartar, 0) + :descartar
+    WHERE id = :id
+'''
+
+# Una fila por jugador/equipo con todos sus informes (solo cuentan las notas > 0)
+_SQL_AGREGADOS_INFORMES = f'''
+    SELECT
+        COUNT(*),
+        SUM(nota_general > 0),
+        SUM(CASE WHEN nota_general > 0 THEN nota_general * peso ELSE 0 END),
+        SUM(CASE WHEN nota_general > 0 THEN peso ELSE 0 END),
+        SUM(nota_general > 0 AND recomendacion = 'fichar'),
+        SUM(nota_general > 0 AND recomendacion = 'descartar'),
+        MAX(CASE WHEN nota_general > 0 THEN nota_general END),
+        MIN(CASE WHEN nota_general > 0 THEN nota_general END),
+        jugador_nombre,
+        equipo
+    FROM (
+        SELECT jugador_nombre, equipo, nota_general, recomendacion,
+               CASE WHEN tipo_evaluacion = 'video_completo'
+                    THEN {PESO_VIDEO_COMPLETO} ELSE {PESO_POR_DEFECTO} END AS peso
+        FROM informes_scouting
+        {{filtro}}
+    )
+    GROUP BY jugador_nombre, equipo
+'''
+
+_SQL_IDS_INFORMES = '''
+    SELECT id, jugador_nombre, equipo FROM informes_scouting {filtro}
+'''
+
+_SQL_MARCAR_SUMADO = '''
+    INSERT OR REPLACE INTO informes_sumados (informe_id, jugador_id)
+    SELECT ?, id FROM jugadores_observados WHERE jugador = ? AND equipo = ?
+'''
+
+_SQL_ASIGNAR_AGREGADOS = '''
+    UPDATE jugadores_observados SET
+        num_informes = ?,
+        num_notas = ?,
+        suma_notas = ?,
+        suma_pesos = ?,
+        num_fichar = ?,
+        num_descartar = ?,
+        mejor_nota = COALESCE(?, mejor_nota),
+        peor_nota = COALESCE(?, peor_nota)
+    WHERE jugador = ? AND equipo = ?
+'''
+
+
+def peso_informe(tipo_evaluacion):
+    """Peso de un informe en la nota promedio según su tipo"""
+    return PESO_VIDEO_COMPLETO if tipo_evaluacion == 'video_completo' else PESO_POR_DEFECTO
+
+
+def sumar_informe(conn, jugador_id, nota, tipo_evaluacion=None, recomendacion=None, informe_id=None):
+    """
+    Añade un informe a los agregados de un jugador y actualiza sus columnas
+    derivadas. Las notas nulas o 0 cuentan como informe pero no en la media.
+    Con `informe_id` un informe ya sumado se ignora. No hace commit.
+
+    Returns:
+        True si se ha sumado, False si el informe ya estaba contado
+    """
+    if informe_id is not None:
+        nuevo = conn.execute(
+            "INSERT OR IGNORE INTO informes_sumados (informe_id, jugador_id) VALUES (?, ?)",
+            (informe_id, jugador_id)
+        ).rowcount
+        if not nuevo:
+            logger.info(f"⏭️ Informe {informe_id} ya sumado a los agregados del jugador {jugador_id}")
+            return False
+
+    valida = nota is not None and float(nota) > 0
+    conn.execute(_SQL_SUMAR_INFORME, {
+        'id': jugador_id,
+        'nota': float(nota) if valida else None,
+        'valida': int(valida),
+        'peso': peso_informe(tipo_evaluacion) if valida else 0.0,
+        'fichar': int(valida and recomendacion == 'fichar'),
+        'descartar': int(valida and recomendacion == 'descartar'),
+    })
+    conn.execute(_SQL_DERIVADOS + " AND id = ?", (jugador_id,))
+    return True
+
+
+def sembrar_agregados(conn):
+    """
+    Inicializa los agregados de jugadores que nunca los han tenido a partir
+    de su nota_promedio y total_informes actuales. No hace commit.
+    """
+    return conn.execute('''
+        UPDATE jugadores_observados SET
+            num_informes = MAX(COALESCE(total_informes, 1), 1),
+            num_notas = MAX(COALESCE(total_informes, 1), 1),
+            suma_notas = nota_promedio * MAX(COALESCE(total_informes, 1), 1),
+            suma_pesos = MAX(COALESCE(total_informes, 1), 1),
+            num_fichar = 0,
+            num_descartar = 0
+        WHERE num_informes IS NULL AND nota_promedio > 0
+    ''').rowcount
+
+
+def reconstruir_agregados(conn, ruta_partidos="data/partidos.db", jugador=None, equipo=None):
+    """
+    Recalcula los agregados de todos los jugadores que tienen informes (o
+    solo de `jugador`/`equipo`) con una sola consulta agrupada sobre
+    partidos.db, y con ellos qué informes constan como sumados. Con `ruta_partidos=None` la consulta se hace en la propia
+    conexión, que debe tener partidos.db adjunta (conectar_unificada).
+    No hace commit.
+
+    Returns:
+        número de combinaciones jugador/equipo con informes
+    """
+    if jugador is None:
+        filtro, params = '', ()
+    else:
+        filtro, params = 'WHERE jugador_nombre = ? AND equipo = ?', (jugador, equipo)
+
+    conn.execute(SQL_CREAR_INFORMES_SUMADOS)
+    conn_partidos = conn if ruta_partidos is None else conectar(ruta_partidos)
+    try:
+        filas = conn_partidos.execute(_SQL_AGREGADOS_INFORMES.format(filtro=filtro), params).fetchall()
+        informes = conn_partidos.execute(_SQL_IDS_INFORMES.format(filtro=filtro), params).fetchall()
+    finally:
+        if conn_partidos is not conn:
+            conn_partidos.close()
+
+    conn.executemany(_SQL_ASIGNAR_AGREGADOS, filas)
+    if jugador is None:
+        conn.execute("DELETE FROM informes_sumados")
+    else:
+        conn.execute('''
+            DELETE FROM informes_sumados WHERE jugador_id IN (
+                SELECT id FROM jugadores_observados WHERE jugador = ? AND equipo = ?)
+        ''', (jugador, equipo))
+    conn.executemany(_SQL_MARCAR_SUMADO, informes)
+
+    if jugador is None:
+        conn.execute(_SQL_DERIVADOS)
+        logger.info(f"📊 Agregados reconstruidos para {len(filas)} jugadores con informes")
+    else:
+        conn.execute(_SQL_DERIVADOS + " AND jugador = ? AND equipo = ?", (jugador, equipo))
+    return len(filas)
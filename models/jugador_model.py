@@ -1,38 +1,136 @@
 # models/jugador_model.py - VERSIÓN CON SINGLETON Y CACHE
 
 import sqlite3
+from common.database import conectar, conectar_unificada, aplicar_migraciones, asegurar_columna
+from common.consultas import jugadores_con_informes
+from common.resoluciones_wyscout import (
+    limpiar_nombre, clave_busqueda, obtener_resolucion, guardar_resoluciones
+)
 import pandas as pd
 import os
 from datetime import datetime
 import random
 from fuzzywuzzy import fuzz, process
 import logging
-import time
 import streamlit as st
+from models.wyscout_store import obtener_store_wyscout
+from models.wyscout_indice import IndiceNombres, obtener_indice_nombres
+from models.agregados_jugadores import (
+    COLUMNAS_AGREGADOS, SQL_CREAR_INFORMES_SUMADOS, SQL_INDICE_INFORMES_SUMADOS,
+    sumar_informe, sembrar_agregados, reconstruir_agregados
+)
 
 # Configurar logging para debug
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# FUNCIÓN GLOBAL CACHEADA PARA STREAMLIT
-@st.cache_data(ttl=3600)
+# Origen de las resoluciones guardadas en busquedas_wyscout
+ORIGEN_JUGADOR_MODEL = 'jugador_model'
+
+
+# MIGRACIONES DE jugadores.db (versión en PRAGMA user_version)
+def _migracion_cache_busquedas(conn):
+    """Columnas de la caché de resoluciones en busquedas_wyscout"""
+    for columna, tipo in [('clave_busqueda', 'TEXT'), ('origen', 'TEXT'), ('version_dataset', 'TEXT'),
+                          ('fila_wyscout', 'INTEGER'), ('umbral', 'REAL')]:
+        asegurar_columna(conn, 'busquedas_wyscout', columna, tipo)
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_busquedas_resolucion
+        ON busquedas_wyscout (clave_busqueda, origen, version_dataset)
+    ''')
+
+
+def _migracion_claves_normalizadas(conn):
+    """
+    besoccer_id (lo usa el scraper) y claves normalizadas nombre/equipo,
+    mantenidas por triggers, para no filtrar con LOWER(TRIM()) sin índice
+    """
+    asegurar_columna(conn, 'jugadores_observados', 'besoccer_id', 'TEXT')
+    asegurar_columna(conn, 'jugadores_observados', 'nombre_norm', 'TEXT')
+    asegurar_columna(conn, 'jugadores_observados', 'equipo_norm', 'TEXT')
+    
+    conn.execute('''
+        UPDATE jugadores_observados
+        SET nombre_norm = LOWER(TRIM(nombre_completo)),
+            equipo_norm = LOWER(TRIM(equipo))
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_jugadores_observados_norm_insert
+        AFTER INSERT ON jugadores_observados
+        BEGIN
+            UPDATE jugadores_observados
+            SET nombre_norm = LOWER(TRIM(NEW.nombre_completo)),
+                equipo_norm = LOWER(TRIM(NEW.equipo))
+            WHERE id = NEW.id;
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_jugadores_observados_norm_update
+        AFTER UPDATE OF nombre_completo, equipo ON jugadores_observados
+        BEGIN
+            UPDATE jugadores_observados
+            SET nombre_norm = LOWER(TRIM(NEW.nombre_completo)),
+                equipo_norm = LOWER(TRIM(NEW.equipo))
+            WHERE id = NEW.id;
+        END
+    ''')
+    
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_observados_norm
+        ON jugadores_observados (nombre_norm, equipo_norm)
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_observados_jugador_equipo
+        ON jugadores_observados (jugador, equipo)
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_observados_ultima_fecha
+        ON jugadores_observados (ultima_fecha_visto)
+    ''')
+
+
+def _migracion_agregados(conn):
+    """Sumas y contadores de informes por jugador, calculados a partir de partidos.db"""
+    for columna, tipo in COLUMNAS_AGREGADOS:
+        asegurar_columna(conn, 'jugadores_observados', columna, tipo)
+    sembrar_agregados(conn)
+    _reconstruir_desde_partidos(conn)
+
+
+def _migracion_informes_sumados(conn):
+    """Informes ya contados en los agregados, para no sumar dos veces el mismo"""
+    conn.execute(SQL_CREAR_INFORMES_SUMADOS)
+    conn.execute(SQL_INDICE_INFORMES_SUMADOS)
+    _reconstruir_desde_partidos(conn)
+
+
+def _reconstruir_desde_partidos(conn):
+    """Reconstruye los agregados con el partidos.db junto a la base de datos, si existe"""
+    ruta_db = conn.execute("PRAGMA database_list").fetchone()[2]
+    ruta_partidos = os.path.join(os.path.dirname(ruta_db), 'partidos.db')
+    if os.path.exists(ruta_partidos):
+        try:
+            reconstruir_agregados(conn, ruta_partidos)
+        except sqlite3.OperationalError as e:
+            logger.warning(f"⚠️ Agregados sin reconstruir (partidos.db sin informes): {e}")
+
+
+MIGRACIONES_JUGADORES = [
+    (1, 'caché de resoluciones en busquedas_wyscout', _migracion_cache_busquedas),
+    (2, 'besoccer_id, claves normalizadas e índices de jugadores_observados', _migracion_claves_normalizadas),
+    (3, 'agregados incrementales de valoraciones en jugadores_observados', _migracion_agregados),
+    (4, 'informes ya sumados a los agregados (informes_sumados)', _migracion_informes_sumados),
+]
+
+# FUNCIÓN GLOBAL - DELEGA EN EL STORE COMPARTIDO DEL PROCESO
 def cargar_wyscout_global(wyscout_path):
-    """Carga datos de Wyscout - CACHEADO POR STREAMLIT"""
+    """Carga datos de Wyscout desde el store compartido (una sola lectura por proceso)"""
     try:
         if not os.path.exists(wyscout_path):
             logging.error(f"❌ Archivo no encontrado: {wyscout_path}")
             return pd.DataFrame()
         
-        logging.info("📂 Cargando Wyscout desde archivo...")
-        start_time = time.time()
-        
-        # Cargar Excel
-        df = pd.read_excel(wyscout_path, engine='openpyxl')
-        
-        load_time = time.time() - start_time
-        logging.info(f"✅ Wyscout cargado: {len(df)} jugadores en {load_time:.2f}s")
-        
-        return df
+        return obtener_store_wyscout(wyscout_path).obtener_datos()
         
     except Exception as e:
         logging.error(f"❌ Error cargando Wyscout: {str(e)}")
@@ -55,6 +153,7 @@ class JugadorModel:
         self.db_path = db_path
         self.wyscout_path = wyscout_path
         self._wyscout_cache = None
+        self._indice_manual = None
         
         # MAPEO DE COLUMNAS (guardarlo como atributo de instancia)
         self.column_mapping = {
@@ -109,10 +208,10 @@ class JugadorModel:
     
     @property
     def wyscout_data(self):
-        """Lazy loading de datos Wyscout"""
-        if self._wyscout_cache is None:
-            self._wyscout_cache = self._load_wyscout_data()
-        return self._wyscout_cache
+        """Datos Wyscout del store compartido (salvo que se hayan fijado a mano)"""
+        if self._wyscout_cache is not None:
+            return self._wyscout_cache
+        return self._load_wyscout_data()
     
     @wyscout_data.setter
     def wyscout_data(self, value):
@@ -152,67 +251,107 @@ class JugadorModel:
         """Alias para mantener compatibilidad"""
         return self.buscar_jugador_en_wyscout_mejorado(nombre_jugador, equipo_jugador, umbral_confianza)
     
+    def _normalizar_nombre(self, texto):
+        """Clave normalizada de un nombre para el índice de búsqueda"""
+        return self._limpiar_nombre(texto).lower()
+    
+    def _indice_nombres(self):
+        """Índice de nombres de los datos Wyscout en uso (uno por versión del dataset)"""
+        if self._wyscout_cache is not None:
+            if self._indice_manual is None or self._indice_manual.df is not self._wyscout_cache:
+                self._indice_manual = IndiceNombres(
+                    self._wyscout_cache, self.name_column, self._normalizar_nombre
+                )
+            return self._indice_manual
+        
+        return obtener_indice_nombres(
+            'jugador_model', self.name_column, self._normalizar_nombre, self.wyscout_path
+        )
+    
     def buscar_jugador_en_wyscout_mejorado(self, nombre_jugador, equipo_jugador=None, umbral_confianza=70):
         """
         🔧 VERSIÓN MEJORADA de búsqueda en Wyscout
+        
+        Usa el índice de nombres: coincidencia exacta por diccionario, fuzzy
+        matching solo sobre los candidatos del índice de trigramas y búsqueda
+        parcial por intersección de trigramas.
         """
-        if self.wyscout_data is None or self.wyscout_data.empty:
+        indice = self._indice_nombres()
+        datos = indice.df
+        if datos is None or datos.empty:
             logger.warning("⚠️ No hay datos de Wyscout cargados")
             return None
             
         logger.info(f"🔍 Buscando: '{nombre_jugador}'" + (f" en '{equipo_jugador}'" if equipo_jugador else ""))
         
+        # Resolución ya calculada para esta versión del dataset
+        version_dataset = self._version_dataset()
+        resolucion = self.obtener_resolucion_cache(
+            nombre_jugador, equipo_jugador, ORIGEN_JUGADOR_MODEL, version_dataset, umbral_confianza
+        )
+        if resolucion is not None:
+            posicion, confianza, algoritmo = resolucion
+            if posicion is None or posicion >= len(datos):
+                logger.info(f"♻️ Sin coincidencia (caché): '{nombre_jugador}'")
+                return None
+            logger.info(f"♻️ ENCONTRADO (caché): '{datos.iloc[posicion][self.name_column]}' "
+                        f"- Confianza: {confianza:.1f}% ({algoritmo})")
+            return {
+                'datos_jugador': datos.iloc[posicion],
+                'confianza': confianza,
+                'algoritmo': algoritmo
+            }
+        
         # Preparar datos para búsqueda
         nombre_limpio = self._limpiar_nombre(nombre_jugador)
-        equipo_limpio = self._limpiar_nombre(equipo_jugador) if equipo_jugador else None
+        equipo_limpio = self._limpiar_nombre(equipo_jugador).lower() if equipo_jugador else None
         
         # Obtener columnas relevantes
         col_nombre = self.column_mapping['nombre']  # 'jugador'
         col_equipo = self.column_mapping['equipo']  # 'equipo_durante_el_período_seleccionado'
+        # Solo hace falta la columna de equipo si se busca por equipo
+        pos_equipo = None
+        if equipo_limpio and col_equipo in datos.columns:
+            pos_equipo = datos.columns.get_loc(col_equipo)
+        
+        def coincide_equipo(posicion):
+            if pos_equipo is None:
+                return False
+            equipo_wyscout = str(datos.iat[posicion, pos_equipo]).lower().strip()
+            return equipo_limpio in equipo_wyscout or equipo_wyscout in equipo_limpio
         
         mejores_matches = []
         
         # ALGORITMO 1: Coincidencia exacta por nombre
         logger.info(f"🎯 Buscando coincidencia exacta: '{nombre_limpio}'")
-        exact_matches = self.wyscout_data[
-            self.wyscout_data[col_nombre].str.lower().str.strip() == nombre_limpio.lower()
-        ]
-        
-        if not exact_matches.empty:
-            for _, jugador in exact_matches.iterrows():
-                confianza = 100.0
-                if equipo_jugador:
-                    # Si se especifica equipo, verificar coincidencia
-                    equipo_encontrado = str(jugador[col_equipo]).lower().strip()
-                    if equipo_limpio.lower() in equipo_encontrado or equipo_encontrado in equipo_limpio.lower():
-                        confianza = 100.0
-                    else:
-                        confianza = 90.0  # Penalizar ligeramente si no coincide el equipo
-                
-                mejores_matches.append({
-                    'jugador': jugador,
-                    'confianza': confianza,
-                    'algoritmo': 'exacto_nombre'
-                })
-        
-        # ALGORITMO 2: Fuzzy matching por nombre
+        for posicion in indice.exactos(nombre_limpio):
+            confianza = 100.0
+            if equipo_jugador and not coincide_equipo(posicion):
+                confianza = 90.0  # Penalizar ligeramente si no coincide el equipo
+            
+            mejores_matches.append({
+                'jugador': datos.iloc[posicion],
+                'posicion': posicion,
+                'confianza': confianza,
+                'algoritmo': 'exacto_nombre'
+            })
+        
+        # ALGORITMO 2: Fuzzy matching por nombre (solo candidatos del índice)
         if len(mejores_matches) == 0:
             logger.info(f"🔄 Aplicando fuzzy matching...")
-            for _, jugador in self.wyscout_data.iterrows():
-                nombre_wyscout = str(jugador[col_nombre]).lower().strip()
-                confianza_nombre = fuzz.token_sort_ratio(nombre_limpio.lower(), nombre_wyscout)
+            for posicion in sorted(indice.candidatos(nombre_limpio)):
+                confianza_nombre = fuzz.token_sort_ratio(nombre_limpio.lower(), indice.nombres[posicion])
                 
                 if confianza_nombre >= umbral_confianza:
                     confianza_final = confianza_nombre
                     
                     # Bonus si coincide el equipo
-                    if equipo_jugador:
-                        equipo_wyscout = str(jugador[col_equipo]).lower().strip()
-                        if equipo_limpio.lower() in equipo_wyscout or equipo_wyscout in equipo_limpio.lower():
-                            confianza_final = min(100.0, confianza_final + 10)
+                    if equipo_jugador and coincide_equipo(posicion):
+                        confianza_final = min(100.0, confianza_final + 10)
                     
                     mejores_matches.append({
-                        'jugador': jugador,
+                        'jugador': datos.iloc[posicion],
+                        'posicion': posicion,
                         'confianza': confianza_final,
                         'algoritmo': 'fuzzy_nombre'
                     })
@@ -220,26 +359,25 @@ class JugadorModel:
         # ALGORITMO 3: Búsqueda parcial (apellidos, nombres)
         if len(mejores_matches) == 0:
             logger.info(f"🔄 Buscando por partes del nombre...")
-            palabras_busqueda = nombre_limpio.split()
+            palabras_busqueda = nombre_limpio.lower().split()
             
-            for _, jugador in self.wyscout_data.iterrows():
-                nombre_wyscout = str(jugador[col_nombre]).lower().strip()
-                
-                # Verificar si alguna palabra del nombre buscado está en el nombre de Wyscout
-                matches_parciales = 0
-                for palabra in palabras_busqueda:
-                    if len(palabra) >= 3 and palabra in nombre_wyscout:
-                        matches_parciales += 1
+            # Número de palabras del nombre buscado contenidas en cada nombre de Wyscout
+            matches_parciales = {}
+            for palabra in palabras_busqueda:
+                if len(palabra) >= 3:
+                    for posicion in indice.contienen(palabra):
+                        matches_parciales[posicion] = matches_parciales.get(posicion, 0) + 1
+            
+            for posicion in sorted(matches_parciales):
+                confianza = (matches_parciales[posicion] / len(palabras_busqueda)) * 80  # Máximo 80%
                 
-                if matches_parciales > 0:
-                    confianza = (matches_parciales / len(palabras_busqueda)) * 80  # Máximo 80%
-                    
-                    if confianza >= umbral_confianza:
-                        mejores_matches.append({
-                            'jugador': jugador,
-                            'confianza': confianza,
-                            'algoritmo': 'parcial_nombre'
-                        })
+                if confianza >= umbral_confianza:
+                    mejores_matches.append({
+                        'jugador': datos.iloc[posicion],
+                        'posicion': posicion,
+                        'confianza': confianza,
+                        'algoritmo': 'parcial_nombre'
+                    })
         
         # Ordenar por confianza y seleccionar el mejor
         if mejores_matches:
@@ -247,7 +385,7 @@ class JugadorModel:
             mejor_match = mejores_matches[0]
             
             nombre_encontrado = mejor_match['jugador'][col_nombre]
-            equipo_encontrado = mejor_match['jugador'][col_equipo]
+            equipo_encontrado = mejor_match['jugador'].get(col_equipo)
             
             logger.info(f"✅ ENCONTRADO: '{nombre_encontrado}' ({equipo_encontrado}) "
                        f"- Confianza: {mejor_match['confianza']:.1f}% ({mejor_match['algoritmo']})")
@@ -256,7 +394,9 @@ class JugadorModel:
             self._guardar_busqueda(
                 nombre_jugador, equipo_jugador or "N/A",
                 nombre_encontrado, equipo_encontrado,
-                mejor_match['confianza'], mejor_match['algoritmo']
+                mejor_match['confianza'], mejor_match['algoritmo'],
+                fila_wyscout=mejor_match['posicion'], umbral=umbral_confianza,
+                version_dataset=version_dataset
             )
             
             return {
@@ -266,18 +406,26 @@ class JugadorModel:
             }
         
         logger.warning(f"❌ NO ENCONTRADO: '{nombre_jugador}'" + (f" en '{equipo_jugador}'" if equipo_jugador else ""))
+        self._guardar_busqueda(
+            nombre_jugador, equipo_jugador or "N/A", None, None, 0, 'sin_coincidencia',
+            umbral=umbral_confianza, version_dataset=version_dataset
+        )
         self._sugerir_nombres_similares(nombre_jugador)
         return None
     
     def _sugerir_nombres_similares(self, nombre_buscado, limite=5):
         """Sugiere nombres similares para ayudar con el debug"""
-        if self.wyscout_data is None or self.wyscout_data.empty:
+        indice = self._indice_nombres()
+        if indice.df is None or indice.df.empty:
             return
         
         col_nombre = self.column_mapping['nombre']
-        nombres_disponibles = self.wyscout_data[col_nombre].astype(str).tolist()
+        pos_nombre = indice.df.columns.get_loc(col_nombre)
+        nombres_disponibles = [
+            str(indice.df.iat[posicion, pos_nombre]) for posicion in indice.candidatos(nombre_buscado)
+        ]
         
-        # Usar fuzzywuzzy para encontrar los más similares
+        # Usar fuzzywuzzy sobre los candidatos del índice para encontrar los más similares
         matches = process.extract(nombre_buscado, nombres_disponibles, limit=limite)
         
         if matches:
@@ -290,7 +438,7 @@ class JugadorModel:
         # Crear carpeta data si no existe
         os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
         
-        conn = sqlite3.connect(self.db_path)
+        conn = conectar(self.db_path)
         cursor = conn.cursor()
         
         # ✅ USAR ESTRUCTURA BÁSICA COMPATIBLE
@@ -372,11 +520,19 @@ class JugadorModel:
                 algoritmo TEXT,
                 fecha_busqueda TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 jugador_id INTEGER,
+                clave_busqueda TEXT,
+                origen TEXT,
+                version_dataset TEXT,
+                fila_wyscout INTEGER,
+                umbral REAL,
                 FOREIGN KEY (jugador_id) REFERENCES jugadores (id)
             )
         ''')
         
         conn.commit()
+        
+        # Índices, columnas nuevas y normalizaciones versionadas
+        aplicar_migraciones(conn, MIGRACIONES_JUGADORES, 'jugadores.db')
         conn.close()
         
         # Poblar con datos de ejemplo si está vacía
@@ -387,7 +543,7 @@ class JugadorModel:
         Inserta o actualiza un jugador en la tabla jugadores_observados
         usando datos combinados de Wyscout o BeSoccer + informe
         """
-        conn = sqlite3.connect(self.db_path)
+        conn = conectar(self.db_path)
         cursor = conn.cursor()
         
         nombre = str(datos.get("jugador", "")).strip()
@@ -396,36 +552,27 @@ class JugadorModel:
         
         # Buscar jugador existente
         cursor.execute('''
-            SELECT id, veces_observado, nota_promedio, mejor_nota, peor_nota, total_informes
+            SELECT id
             FROM jugadores_observados
-            WHERE LOWER(TRIM(nombre_completo)) = LOWER(TRIM(?)) AND LOWER(TRIM(equipo)) = LOWER(TRIM(?))
+            WHERE nombre_norm = LOWER(TRIM(?)) AND equipo_norm = LOWER(TRIM(?))
         ''', (nombre_completo, equipo))
         
         jugador_existente = cursor.fetchone()
         
         # Sacamos la nota del informe (por defecto 5 si no hay)
         nueva_nota = informe_data.get("nota_general", 5) if informe_data else 5
+        tipo_evaluacion = informe_data.get("tipo_evaluacion") if informe_data else None
+        recomendacion = informe_data.get("recomendacion") if informe_data else None
         scout = informe_data.get("scout_usuario", "admin") if informe_data else "admin"
         fecha_actual = datetime.now().strftime('%Y-%m-%d')
         
         try:
             if jugador_existente:
-                jugador_id, veces_observado, nota_promedio, mejor_nota, peor_nota, total_informes = jugador_existente
-                veces_observado += 1
-                total_informes = (total_informes or 0) + 1
-                
-                nueva_nota_prom = ((nota_promedio or 0) * (veces_observado - 1) + nueva_nota) / veces_observado
-                mejor_nota = max(mejor_nota or nueva_nota, nueva_nota)
-                peor_nota = min(peor_nota or nueva_nota, nueva_nota)
+                jugador_id = jugador_existente[0]
                 
                 cursor.execute('''
                     UPDATE jugadores_observados SET
-                        veces_observado = ?,
-                        total_informes = ?,
-                        nota_general = ?,
-                        nota_promedio = ?,
-                        mejor_nota = ?,
-                        peor_nota = ?,
+                        veces_observado = veces_observado + 1,
                         ultima_fecha_visto = ?,
                         scout_agregado = ?,
                         url_besoccer = COALESCE(?, url_besoccer),
@@ -433,8 +580,7 @@ class JugadorModel:
                         escudo_equipo = COALESCE(?, escudo_equipo)
                     WHERE id = ?
                 ''', (
-                    veces_observado, total_informes, nueva_nota, nueva_nota_prom,
-                    mejor_nota, peor_nota, fecha_actual, scout,
+                    fecha_actual, scout,
                     datos.get("url_besoccer", ""),
                     datos.get("imagen_url", ""),
                     datos.get("escudo_equipo", ""),
@@ -474,6 +620,9 @@ class JugadorModel:
                 jugador_id = cursor.lastrowid
                 logger.info(f"✅ Nuevo jugador añadido: {nombre} ({equipo}) - ID: {jugador_id}")
             
+            # Media ponderada, mejor/peor nota y total de informes
+            informe_id = informe_data.get("id") if informe_data else None
+            sumar_informe(conn, jugador_id, nueva_nota, tipo_evaluacion, recomendacion, informe_id)
             conn.commit()
             return jugador_id
         
@@ -485,13 +634,13 @@ class JugadorModel:
             conn.close()
 
     def añadir_jugador_manual(self, nombre, equipo, posicion='N/A', nota_promedio=5, scout='admin', informe_id=None):
-        conn = sqlite3.connect(self.db_path)
+        conn = conectar(self.db_path)
         cursor = conn.cursor()
 
         try:
             # Ver si ya existe
             cursor.execute('''
-                SELECT id, veces_observado, nota_general 
+                SELECT id
                 FROM jugadores_observados 
                 WHERE (jugador = ? OR nombre_completo = ?) AND equipo = ?
             ''', (nombre, nombre, equipo))
@@ -499,22 +648,15 @@ class JugadorModel:
             existe = cursor.fetchone()
 
             if existe:
-                jugador_id, veces_actual, nota_anterior = existe
-                nueva_nota = ((nota_anterior or 0) * veces_actual + nota_promedio) / (veces_actual + 1)
+                jugador_id = existe[0]
 
                 cursor.execute('''
                     UPDATE jugadores_observados SET
                         veces_observado = veces_observado + 1,
-                        nota_general = ?,
-                        nota_promedio = ?,
-                        mejor_nota = MAX(mejor_nota, ?),
-                        peor_nota = MIN(peor_nota, ?),
-                        total_informes = total_informes + 1,
                         ultima_fecha_visto = ?,
                         scout_agregado = ?
                     WHERE id = ?
                 ''', (
-                    nueva_nota, nueva_nota, nota_promedio, nota_promedio,
                     datetime.now().strftime('%Y-%m-%d'), scout, jugador_id
                 ))
 
@@ -540,6 +682,7 @@ class JugadorModel:
 
                 jugador_id = cursor.lastrowid
 
+            sumar_informe(conn, jugador_id, nota_promedio, informe_id=informe_id)
             conn.commit()
             logger.info(f"✅ Jugador {'actualizado' if existe else 'añadido'}: {nombre} (ID: {jugador_id})")
             return jugador_id
@@ -552,20 +695,23 @@ class JugadorModel:
         finally:
             conn.close()
     
+    def reconstruir_estadisticas(self, ruta_partidos="data/partidos.db"):
+        """Recalcula las valoraciones agregadas de todos los jugadores desde sus informes"""
+        conn = conectar(self.db_path)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            jugadores = reconstruir_agregados(conn, ruta_partidos)
+            conn.commit()
+            return jugadores
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+    
     def _limpiar_nombre(self, texto):
         """Limpia texto para comparación"""
-        import re
-        if pd.isna(texto) or texto is None:
-            return ""
-        
-        # Convertir a string y limpiar
-        texto = str(texto).strip()
-        # Remover caracteres especiales pero mantener acentos
-        texto = re.sub(r'[^\w\sáéíóúñü]', '', texto, flags=re.IGNORECASE)
-        # Normalizar espacios
-        texto = ' '.join(texto.split())
-        
-        return texto
+        return limpiar_nombre(texto)
     
     def _safe_int(self, valor):
         """Convierte valor a int de forma segura"""
@@ -586,61 +732,69 @@ class JugadorModel:
             return None
     
     def _guardar_busqueda(self, nombre_buscado, equipo_buscado, nombre_encontrado, 
-                         equipo_encontrado, confianza, algoritmo, jugador_id=None):
-        """Guarda registro de búsqueda para debug"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO busquedas_wyscout (
-                nombre_buscado, equipo_buscado, nombre_encontrado, 
-                equipo_encontrado, confianza, algoritmo, jugador_id
-            ) VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            nombre_buscado, equipo_buscado, nombre_encontrado,
-            equipo_encontrado, confianza, algoritmo, jugador_id
-        ))
-        
-        conn.commit()
-        conn.close()
+                         equipo_encontrado, confianza, algoritmo, jugador_id=None,
+                         fila_wyscout=None, umbral=None, version_dataset=None,
+                         origen=ORIGEN_JUGADOR_MODEL):
+        """Guarda registro de búsqueda (historial y caché de resoluciones)"""
+        self.guardar_resoluciones([{
+            'nombre_buscado': nombre_buscado,
+            'equipo_buscado': equipo_buscado,
+            'nombre_encontrado': nombre_encontrado,
+            'equipo_encontrado': equipo_encontrado,
+            'confianza': confianza,
+            'algoritmo': algoritmo,
+            'jugador_id': jugador_id,
+            'fila_wyscout': fila_wyscout,
+            'umbral': umbral
+        }], origen, version_dataset)
+    
+    # === CACHÉ DE RESOLUCIONES NOMBRE -> FILA WYSCOUT ===
+    
+    def _clave_busqueda(self, nombre, equipo):
+        """Clave normalizada (nombre, equipo) de una búsqueda"""
+        return clave_busqueda(nombre, equipo)
+    
+    def _version_dataset(self):
+        """Huella del dataset Wyscout en uso (None si los datos se fijaron a mano)"""
+        if self._wyscout_cache is not None:
+            return None
+        try:
+            return obtener_store_wyscout(self.wyscout_path).huella
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudo obtener la versión del dataset Wyscout: {e}")
+            return None
+    
+    def obtener_resolucion_cache(self, nombre, equipo, origen, version_dataset, umbral=None):
+        """
+        Última resolución guardada para (nombre, equipo) con esta versión del
+        dataset: (fila_wyscout, confianza, algoritmo) o None
+        """
+        return obtener_resolucion(nombre, equipo, origen, version_dataset, umbral, db_path=self.db_path)
+    
+    def guardar_resoluciones(self, registros, origen, version_dataset):
+        """Guarda varias búsquedas en busquedas_wyscout en una sola transacción"""
+        guardar_resoluciones(registros, origen, version_dataset, db_path=self.db_path)
     
     # === MÉTODOS EXISTENTES (mantener todos) ===
     
     def obtener_jugadores_observados_con_informes(self):
         """
         Obtiene SOLO jugadores que tienen informes reales asociados
+        (una consulta sobre jugadores.db con partidos.db adjunta)
         """
-        conn = sqlite3.connect(self.db_path)
-        
-        # Query que une jugadores con informes para asegurar que solo mostramos 
-        # jugadores con informes reales
-        df = pd.read_sql_query('''
-            SELECT DISTINCT j.*, 
-                COUNT(DISTINCT i.id) as total_informes,
-                MAX(i.fecha_creacion) as ultimo_informe,
-                AVG(i.nota_general) as nota_promedio,
-                CASE 
-                    WHEN j.veces_observado = 1 THEN 'Nuevo'
-                    WHEN j.veces_observado <= 3 THEN 'Seguimiento'
-                    ELSE 'Objetivo'
-                END as estado_observacion
-            FROM jugadores j
-            INNER JOIN informes_scouting i ON (
-                LOWER(TRIM(j.nombre_completo)) = LOWER(TRIM(i.jugador_nombre))
-                AND LOWER(TRIM(j.equipo)) = LOWER(TRIM(i.equipo))
-            )
-            GROUP BY j.id
-            ORDER BY ultimo_informe DESC
-        ''', conn)
-        
-        conn.close()
+        ruta_partidos = os.path.join(os.path.dirname(self.db_path), 'partidos.db')
+        conn = conectar_unificada(self.db_path, ruta_partidos)
+        try:
+            df = jugadores_con_informes(conn)
+        finally:
+            conn.close()
         
         logger.info(f"📊 Obtenidos {len(df)} jugadores con informes reales")
         return df
     
     def obtener_jugadores_observados(self):
         """Obtiene todos los jugadores observados por el scout"""
-        conn = sqlite3.connect(self.db_path)
+        conn = conectar(self.db_path)
         df = pd.read_sql_query('''
             SELECT *, 
                 CASE 
@@ -656,7 +810,7 @@ class JugadorModel:
     
     def obtener_estadisticas_busquedas(self):
         """Obtiene estadísticas de las búsquedas realizadas"""
-        conn = sqlite3.connect(self.db_path)
+        conn = conectar(self.db_path)
         df = pd.read_sql_query('''
             SELECT algoritmo, 
                    COUNT(*) as total_busquedas,
@@ -672,7 +826,7 @@ class JugadorModel:
     
     def poblar_datos_ejemplo(self):
         """Puebla la base de datos con datos de ejemplo realistas"""
-        conn = sqlite3.connect(self.db_path)
+        conn = conectar(self.db_path)
         cursor = conn.cursor()
         
         # Verificar si ya hay datos
@@ -724,14 +878,14 @@ class JugadorModel:
     
     def obtener_todos_jugadores(self):
         """Obtiene todos los jugadores"""
-        conn = sqlite3.connect(self.db_path)
+        conn = conectar(self.db_path)
         df = pd.read_sql_query("SELECT * FROM jugadores", conn)
         conn.close()
         return df
     
     def buscar_jugadores(self, nombre=None, posicion=None, equipo=None, liga=None, pais=None):
         """Busca jugadores con filtros"""
-        conn = sqlite3.connect(self.db_path)
+        conn = conectar(self.db_path)
         
         query = "SELECT * FROM jugadores WHERE 1=1"
         params = []
@@ -762,7 +916,7 @@ class JugadorModel:
     
     def obtener_jugador_por_id(self, jugador_id):
         """Obtiene un jugador específico por ID"""
-        conn = sqlite3.connect(self.db_path)
+        conn = conectar(self.db_path)
         cursor = conn.cursor()
         
         cursor.execute("SELECT * FROM jugadores WHERE id = ?", (jugador_id,))
@@ -780,7 +934,7 @@ class JugadorModel:
     
     def obtener_posiciones(self):
         """Obtiene todas las posiciones únicas"""
-        conn = sqlite3.connect(self.db_path)
+        conn = conectar(self.db_path)
         cursor = conn.cursor()
         cursor.execute("SELECT DISTINCT posicion FROM jugadores WHERE posicion IS NOT NULL ORDER BY posicion")
         posiciones = [row[0] for row in cursor.fetchall()]
@@ -789,7 +943,7 @@ class JugadorModel:
     
     def obtener_ligas(self):
         """Obtiene todas las ligas únicas"""
-        conn = sqlite3.connect(self.db_path)
+        conn = conectar(self.db_path)
         cursor = conn.cursor()
         cursor.execute("SELECT DISTINCT liga FROM jugadores WHERE liga IS NOT NULL ORDER BY liga")
         ligas = [row[0] for row in cursor.fetchall()]
@@ -798,7 +952,7 @@ class JugadorModel:
     
     def obtener_paises(self):
         """Obtiene todos los países únicos"""
-        conn = sqlite3.connect(self.db_path)
+        conn = conectar(self.db_path)
         cursor = conn.cursor()
         cursor.execute("SELECT DISTINCT pais FROM jugadores WHERE pais IS NOT NULL ORDER BY pais")
         paises = [row[0] for row in cursor.fetchall()]
@@ -814,5 +968,7 @@ class JugadorModel:
     def clear_wyscout_cache(self):
         """Limpia el cache de Wyscout (para admin)"""
         st.cache_data.clear()
+        obtener_store_wyscout(self.wyscout_path).recargar()
         self._wyscout_cache = None
+        self._indice_manual = None
         logging.info("🗑️ Cache de Wyscout limpiado")
\ No newline at end of file
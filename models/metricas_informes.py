@@ -0,0 +1,175 @@
+# models/metricas_informes.py
+"""
+Métricas de los informes normalizadas en partidos.db.
+
+Cada valoración numérica de un informe es una fila de
+informe_metricas(informe_id, categoria, aspecto, valor). La columna JSON
+informes_scouting.metricas se sigue guardando igual (compatibilidad), pero
+los promedios por categoría y las comparaciones entre informes se calculan
+con consultas agrupadas sobre esta tabla en lugar de parsear el JSON de
+cada fila en Python.
+
+Categorías: tecnicos, tacticos, fisicos y mentales en los informes de vídeo
+completo; las evaluaciones de campo (sin categorías) van a 'general'.
+"""
+
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+CATEGORIAS = ['tecnicos', 'tacticos', 'fisicos', 'mentales']
+CATEGORIA_GENERAL = 'general'
+
+# Claves de metadatos del JSON que no son valoraciones
+_CLAVES_NO_METRICAS = {'tipo', 'posicion', 'posicion_evaluada', 'version', 'timestamp',
+                       'num_metricas_evaluadas', 'promedios', 'evaluaciones_cualitativas'}
+
+SQL_CREAR_TABLA = '''
+    CREATE TABLE IF NOT EXISTS informe_metricas (
+        informe_id INTEGER NOT NULL,
+        categoria TEXT NOT NULL,
+        aspecto TEXT NOT NULL,
+        valor REAL NOT NULL,
+        PRIMARY KEY (informe_id, categoria, aspecto),
+        FOREIGN KEY (informe_id) REFERENCES informes_scouting (id)
+    ) WITHOUT ROWID
+'''
+
+SQL_INDICE_ASPECTO = '''
+    CREATE INDEX IF NOT EXISTS idx_informe_metricas_aspecto
+    ON informe_metricas (categoria, aspecto)
+'''
+
+_SQL_INSERTAR = '''
+    INSERT OR REPLACE INTO informe_metricas (informe_id, categoria, aspecto, valor)
+    VALUES (?, ?, ?, ?)
+'''
+
+_SQL_PROMEDIOS_INFORMES = '''
+    SELECT informe_id, categoria, AVG(valor)
+    FROM informe_metricas
+    {filtro}
+    GROUP BY informe_id, categoria
+'''
+
+
+def _numero(valor):
+    try:
+        return float(valor)
+    except (TypeError, ValueError):
+        return None
+
+
+def _valores(diccionario):
+    """(aspecto, valor) numéricos de un dict de valoraciones"""
+    if not isinstance(diccionario, dict):
+        return []
+    return [(str(aspecto), _numero(v)) for aspecto, v in diccionario.items() if _numero(v) is not None]
+
+
+def aspectos_de_metricas(metricas):
+    """
+    Filas (categoria, aspecto, valor) de un JSON de métricas, en cualquiera
+    de sus formatos: 'categorias' (vídeo completo), categorías en la raíz
+    (formato antiguo), 'evaluaciones' (campo) o un dict plano de notas.
+    """
+    if isinstance(metricas, str):
+        try:
+            metricas = json.loads(metricas)
+        except (TypeError, ValueError):
+            return []
+    if not isinstance(metricas, dict):
+        return []
+
+    if isinstance(metricas.get('categorias'), dict) and metricas['categorias']:
+        origen = metricas['categorias']
+    elif any(isinstance(metricas.get(c), dict) for c in CATEGORIAS):
+        origen = {c: metricas.get(c) for c in CATEGORIAS}
+    elif isinstance(metricas.get('evaluaciones'), dict):
+        origen = {CATEGORIA_GENERAL: metricas['evaluaciones']}
+    else:
+        origen = {CATEGORIA_GENERAL: {k: v for k, v in metricas.items() if k not in _CLAVES_NO_METRICAS}}
+
+    return [(categoria, aspecto, valor)
+            for categoria, valores in origen.items()
+            for aspecto, valor in _valores(valores)]
+
+
+def guardar_metricas(conn, informe_id, metricas):
+    """Sustituye las filas de métricas de un informe. No hace commit."""
+    filas = aspectos_de_metricas(metricas)
+    conn.execute("DELETE FROM informe_metricas WHERE informe_id = ?", (informe_id,))
+    conn.executemany(_SQL_INSERTAR, [(informe_id, c, a, v) for c, a, v in filas])
+    return len(filas)
+
+
+def migracion_metricas(conn):
+    """Crea informe_metricas y la rellena con el JSON de los informes existentes"""
+    conn.execute(SQL_CREAR_TABLA)
+    conn.execute(SQL_INDICE_ASPECTO)
+
+    total = 0
+    for informe_id, metricas in conn.execute("SELECT id, metricas FROM informes_scouting").fetchall():
+        total += guardar_metricas(conn, informe_id, metricas)
+    logger.info(f"📊 {total} métricas de informes volcadas a informe_metricas")
+
+
+def promedios_por_categoria(conn, informe_ids=None):
+    """
+    {informe_id: {categoria: promedio}} de los informes indicados (o de todos)
+    con una sola consulta agrupada
+    """
+    if informe_ids is None:
+        filas = conn.execute(_SQL_PROMEDIOS_INFORMES.format(filtro='')).fetchall()
+    else:
+        informe_ids = list(informe_ids)
+        if not informe_ids:
+            return {}
+        marcas = ','.join('?' * len(informe_ids))
+        filas = conn.execute(_SQL_PROMEDIOS_INFORMES.format(filtro=f'WHERE informe_id IN ({marcas})'),
+                             informe_ids).fetchall()
+
+    promedios = {}
+    for informe_id, categoria, promedio in filas:
+        promedios.setdefault(informe_id, {})[categoria] = round(promedio, 2)
+    return promedios
+
+
+def _promedios_guardados(conn, informe_ids):
+    """{informe_id: metricas['promedios']} del JSON de los informes indicados"""
+    marcas = ','.join('?' * len(informe_ids))
+    filas = conn.execute(f"SELECT id, metricas FROM informes_scouting WHERE id IN ({marcas})",
+                         list(informe_ids)).fetchall()
+    guardados = {}
+    for informe_id, metricas in filas:
+        try:
+            promedios = json.loads(metricas).get('promedios') if metricas else None
+        except (TypeError, ValueError, AttributeError):
+            promedios = None
+        if isinstance(promedios, dict):
+            guardados[informe_id] = promedios
+    return guardados
+
+
+def comparar_informes(conn, informe_ids, categorias=CATEGORIAS):
+    """
+    Promedios por categoría de varios informes, alineados para compararlos:
+    {categoria: [promedio del informe 1, promedio del informe 2, ...]}
+
+    Si un informe no tiene valoraciones en una categoría se usa el promedio
+    guardado al crearlo (metricas['promedios'], que rellena las categorías
+    vacías con la media de las demás) y, si tampoco existe, 0.
+    """
+    promedios = promedios_por_categoria(conn, informe_ids)
+    incompletos = [i for i in informe_ids
+                   if any(c not in promedios.get(i, {}) for c in categorias)]
+    guardados = _promedios_guardados(conn, incompletos) if incompletos else {}
+
+    def promedio(informe_id, categoria):
+        if categoria in promedios.get(informe_id, {}):
+            return promedios[informe_id][categoria]
+        return _numero(guardados.get(informe_id, {}).get(categoria)) or 0
+
+    return {categoria: [promedio(i, categoria) for i in informe_ids]
+            for categoria in categorias}
@@ -1,6 +1,7 @@
 # models/partido_model.py - VERSIÓN CORREGIDA
 
-import sqlite3
+from common.database import conectar, aplicar_migraciones
+from models.metricas_informes import guardar_metricas, migracion_metricas, promedios_por_categoria
 import json
 from datetime import datetime, date
 import os
@@ -11,6 +12,45 @@ from typing import Dict, List, Optional, Any
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Migraciones de partidos.db (versión en PRAGMA user_version)
+MIGRACIONES_PARTIDOS = [
+    (1, 'índices de informes_scouting y partidos', [
+        "CREATE INDEX IF NOT EXISTS idx_informes_scout_fecha ON informes_scouting (scout_usuario, fecha_creacion)",
+        "CREATE INDEX IF NOT EXISTS idx_informes_jugador_equipo ON informes_scouting (jugador_nombre, equipo)",
+        "CREATE INDEX IF NOT EXISTS idx_informes_partido ON informes_scouting (partido_id)",
+        "CREATE INDEX IF NOT EXISTS idx_informes_fecha ON informes_scouting (fecha_creacion)",
+        "CREATE INDEX IF NOT EXISTS idx_partidos_fecha ON partidos (fecha, hora)",
+    ]),
+    (2, 'métricas de informes normalizadas en informe_metricas', migracion_metricas),
+]
+
+class InformeScouting(dict):
+    """
+    Fila de informes_scouting como dict. Los campos JSON (métricas,
+    metadata, integraciones) se parsean la primera vez que se leen: los
+    listados solo muestran columnas simples y no pagan el json.loads de
+    cada informe.
+    """
+
+    CAMPOS_JSON = ('metricas', 'metadata', 'integraciones')
+
+    def __getitem__(self, clave):
+        valor = super().__getitem__(clave)
+        if clave in self.CAMPOS_JSON and isinstance(valor, str) and valor:
+            try:
+                valor = json.loads(valor)
+            except ValueError:
+                valor = {}
+            super().__setitem__(clave, valor)
+        return valor
+
+    def get(self, clave, defecto=None):
+        return self[clave] if clave in self else defecto
+
+    def copy(self):
+        return InformeScouting(self)
+
+
 class PartidoModel:
     _instance = None
     _initialized = False
@@ -33,7 +73,7 @@ class PartidoModel:
         """Inicializa las tablas de partidos e informes"""
         os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
         
-        conn = sqlite3.connect(self.db_path)
+        conn = conectar(self.db_path)
         cursor = conn.cursor()
         
         # Tabla de partidos - CORREGIDA
@@ -91,6 +131,8 @@ class PartidoModel:
         ''')
         
         conn.commit()
+        
+        aplicar_migraciones(conn, MIGRACIONES_PARTIDOS, 'partidos.db')
         conn.close()
 
     def crear_informe_scouting(self, informe_data):
@@ -110,7 +152,7 @@ class PartidoModel:
             }
             self.guardar_partido_si_no_existe(partido_data)
         
-        conn = sqlite3.connect(self.db_path)
+        conn = conectar(self.db_path)
         cursor = conn.cursor()
         
         try:
@@ -172,6 +214,7 @@ class PartidoModel:
             ))
             
             informe_id = cursor.lastrowid
+            guardar_metricas(conn, informe_id, metricas)
             conn.commit()
             logger.info(f"✅ Informe JSON guardado con ID: {informe_id}")
             
@@ -298,9 +341,10 @@ class PartidoModel:
     
     def obtener_informes_por_usuario(self, usuario):
         """
-        Obtiene informes parseando JSON automáticamente
+        Obtiene informes (los campos JSON se parsean al leerlos), con los
+        promedios por categoría calculados en SQL ('promedios_categorias')
         """
-        conn = sqlite3.connect(self.db_path)
+        conn = conectar(self.db_path)
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -312,38 +356,15 @@ class PartidoModel:
         ''', (usuario,))
         
         columnas = [description[0] for description in cursor.description]
-        informes = []
-        
-        for row in cursor.fetchall():
-            informe = dict(zip(columnas, row))
-            
-            # Parsear JSON automáticamente
-            if informe.get('metricas'):
-                try:
-                    informe['metricas'] = json.loads(informe['metricas'])
-                except:
-                    informe['metricas'] = {}
-            
-            if informe.get('metadata'):
-                try:
-                    informe['metadata'] = json.loads(informe['metadata'])
-                except:
-                    informe['metadata'] = {}
-                    
-            if informe.get('integraciones'):
-                try:
-                    informe['integraciones'] = json.loads(informe['integraciones'])
-                except:
-                    informe['integraciones'] = {}
-            
-            informes.append(informe)
+        informes = [InformeScouting(zip(columnas, row)) for row in cursor.fetchall()]
+        self._añadir_promedios_categorias(conn, informes)
         
         conn.close()
         return informes
     
     def obtener_partidos_por_fecha(self, fecha=None):
         """Obtiene partidos filtrados por fecha"""
-        conn = sqlite3.connect(self.db_path)
+        conn = conectar(self.db_path)
         cursor = conn.cursor()
         
         if fecha:
@@ -380,7 +401,7 @@ class PartidoModel:
     
     def obtener_partido_por_id(self, partido_id):
         """Obtiene un partido específico por ID"""
-        conn = sqlite3.connect(self.db_path)
+        conn = conectar(self.db_path)
         cursor = conn.cursor()
         
         cursor.execute('SELECT * FROM partidos WHERE id = ?', (partido_id,))
@@ -408,7 +429,7 @@ class PartidoModel:
     
     def guardar_partido_si_no_existe(self, partido_data):
         """Guarda el partido en la BD si no existe"""
-        conn = sqlite3.connect(self.db_path)
+        conn = conectar(self.db_path)
         cursor = conn.cursor()
         
         try:
@@ -449,7 +470,7 @@ class PartidoModel:
     
     def obtener_todos_informes(self):
         """Obtiene TODOS los informes de scouting"""
-        conn = sqlite3.connect(self.db_path)
+        conn = conectar(self.db_path)
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -460,27 +481,22 @@ class PartidoModel:
         ''')
         
         columns = [description[0] for description in cursor.description]
-        informes = []
-        
-        for row in cursor.fetchall():
-            informe = dict(zip(columns, row))
-            
-            # Parsear JSONs
-            for campo_json in ['metricas', 'metadata', 'integraciones']:
-                if informe.get(campo_json):
-                    try:
-                        informe[campo_json] = json.loads(informe[campo_json])
-                    except:
-                        informe[campo_json] = {}
-            
-            informes.append(informe)
+        informes = [InformeScouting(zip(columns, row)) for row in cursor.fetchall()]
+        self._añadir_promedios_categorias(conn, informes)
         
         conn.close()
         return informes
 
+    @staticmethod
+    def _añadir_promedios_categorias(conn, informes):
+        """Añade 'promedios_categorias' ({categoria: promedio}) desde informe_metricas"""
+        promedios = promedios_por_categoria(conn, [i['id'] for i in informes])
+        for informe in informes:
+            informe['promedios_categorias'] = promedios.get(informe['id'], {})
+
     def obtener_estadisticas_dashboard(self):
         """Obtiene estadísticas para el dashboard"""
-        conn = sqlite3.connect(self.db_path)
+        conn = conectar(self.db_path)
         cursor = conn.cursor()
         
         # Estadísticas generales
@@ -0,0 +1,139 @@
+# models/wyscout_indice.py
+"""
+Índice de nombres de jugadores Wyscout.
+
+Se construye una vez por versión del dataset y permite:
+- coincidencias exactas por nombre normalizado (diccionario)
+- generar candidatos para el fuzzy matching con un índice invertido de
+  trigramas de caracteres, de modo que fuzzywuzzy solo puntúa los K
+  nombres más parecidos en lugar de recorrer todo el DataFrame
+- buscar nombres que contienen una palabra sin recorrerlos todos
+"""
+
+import logging
+from collections import defaultdict
+
+import numpy as np
+
+from models.wyscout_store import obtener_store_wyscout
+
+logger = logging.getLogger(__name__)
+
+CANDIDATOS_POR_DEFECTO = 50
+
+
+def normalizar_basico(texto):
+    """Normalización mínima: minúsculas y espacios simples"""
+    if texto is None:
+        return ""
+    return ' '.join(str(texto).lower().split())
+
+
+def trigramas(texto, relleno=True):
+    """Trigramas de caracteres de un texto (con espacios de relleno en los extremos)"""
+    if relleno:
+        texto = f" {texto} "
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+
+class IndiceNombres:
+    """
+    Índice sobre una columna de nombres de un DataFrame.
+
+    Las posiciones que devuelve son posicionales (para `df.iloc`) sobre el
+    DataFrame con el que se construyó, que se guarda en `self.df`.
+
+    Args:
+        df: DataFrame de jugadores
+        columna: columna con el nombre del jugador
+        normalizar: función texto -> texto normalizado para claves y trigramas
+    """
+
+    def __init__(self, df, columna='jugador', normalizar=normalizar_basico):
+        self.df = df
+        self.columna = columna
+        self.normalizar = normalizar
+
+        if columna in df.columns:
+            nombres = df[columna].fillna('').astype(str).tolist()
+        else:
+            nombres = [''] * len(df)
+
+        self.nombres = [' '.join(n.lower().split()) for n in nombres]
+        self.claves = [normalizar(n) for n in nombres]
+
+        exactos = defaultdict(list)
+        postings = defaultdict(list)
+        for posicion, clave in enumerate(self.claves):
+            if not clave:
+                continue
+            exactos[clave].append(posicion)
+            for trigrama in trigramas(clave):
+                postings[trigrama].append(posicion)
+
+        self._exactos = dict(exactos)
+        self._trigramas = {t: np.asarray(p, dtype=np.int32) for t, p in postings.items()}
+
+        logger.info(f"🗂️ Índice de nombres: {len(self.claves)} jugadores, {len(self._trigramas)} trigramas")
+
+    def __len__(self):
+        return len(self.claves)
+
+    def exactos(self, texto):
+        """Posiciones cuyo nombre normalizado coincide exactamente"""
+        return list(self._exactos.get(self.normalizar(texto), []))
+
+    def candidatos(self, texto, k=CANDIDATOS_POR_DEFECTO):
+        """
+        Las K posiciones que más trigramas comparten con el texto, ordenadas
+        de más a menos parecidas.
+        """
+        clave = self.normalizar(texto)
+        listas = [self._trigramas[t] for t in trigramas(clave) if t in self._trigramas]
+        if not listas:
+            return []
+
+        comunes = np.bincount(np.concatenate(listas), minlength=len(self.claves))
+        con_coincidencias = np.flatnonzero(comunes)
+        if len(con_coincidencias) > k:
+            seleccion = np.argpartition(comunes[con_coincidencias], -k)[-k:]
+            con_coincidencias = con_coincidencias[seleccion]
+
+        # Orden estable: más trigramas comunes primero y, a igualdad, orden del dataset
+        orden = np.lexsort((con_coincidencias, -comunes[con_coincidencias]))
+        return con_coincidencias[orden].tolist()
+
+    def contienen(self, palabra):
+        """Posiciones cuyo nombre normalizado contiene la palabra"""
+        palabra = self.normalizar(palabra)
+        if not palabra:
+            return []
+        if len(palabra) < 3:
+            return [i for i, clave in enumerate(self.claves) if palabra in clave]
+
+        # Todos los trigramas de la palabra deben estar en el nombre;
+        # la intersección de listas reduce los nombres a verificar
+        posiciones = None
+        for trigrama in trigramas(palabra, relleno=False):
+            lista = self._trigramas.get(trigrama)
+            if lista is None:
+                return []
+            posiciones = lista if posiciones is None else np.intersect1d(posiciones, lista, assume_unique=True)
+            if len(posiciones) == 0:
+                return []
+
+        return [int(i) for i in posiciones if palabra in self.claves[i]]
+
+
+def obtener_indice_nombres(nombre_indice='jugador', columna='jugador',
+                           normalizar=normalizar_basico, data_path=None):
+    """
+    Índice de nombres del dataset Wyscout compartido. Se construye una vez
+    por versión del fichero; `nombre_indice` distingue índices con distinta
+    normalización.
+    """
+    store = obtener_store_wyscout(data_path)
+    return store.derivado(
+        ('indice_nombres', nombre_indice),
+        lambda df: IndiceNombres(df, columna=columna, normalizar=normalizar)
+    )
@@ -1,61 +1,63 @@
 import pandas as pd
 import streamlit as st
-from pathlib import Path
 import os
+from models.wyscout_store import (
+    obtener_store_wyscout, obtener_catalogo_wyscout, COL_LIGA, COL_TEMPORADA
+)
 
-# FUNCIÓN GLOBAL PARA CACHE DE STREAMLIT
-@st.cache_data(ttl=3600)
+# FUNCIÓN GLOBAL - DELEGA EN EL STORE COMPARTIDO DEL PROCESO
 def cargar_datos_wyscout(data_path):
-    """Carga los datos del archivo XLSX - CACHEADO POR STREAMLIT"""
+    """Carga un único archivo XLSX a través del store compartido"""
     try:
         if not os.path.exists(data_path):
             return pd.DataFrame(), {}
         
-        # Cargar el archivo XLSX
-        df = pd.read_excel(data_path)
-        
-        # Limpiar nombres de columnas
-        df.columns = df.columns.str.strip()
-        
-        # Detectar columnas automáticamente
-        column_patterns = {
-            'player': ['player', 'name', 'nombre', 'jugador', 'full name', 'apellidos'],
-            'team': ['team', 'club', 'equipo', 'squad', 'equipo_durante_el_período_seleccionado'],
-            'position': ['position', 'pos', 'posicion', 'posición', 'role', 'pos_principal'],
-            'age': ['age', 'edad', 'años'],
-            'goals': ['goals', 'goles', 'goal'],
-            'assists': ['assists', 'asistencias', 'assist'],
-            'minutes': ['minutes', 'minutos', 'min', 'minutes played'],
-            'matches': ['matches', 'partidos', 'games', 'apps', 'appearances']
-        }
-        
-        detected = {}
-        df_columns_lower = [col.lower().strip() for col in df.columns]
-        
-        for key, patterns in column_patterns.items():
-            for pattern in patterns:
-                for i, col_lower in enumerate(df_columns_lower):
-                    if pattern in col_lower:
-                        detected[key] = df.columns[i]
-                        break
-                if key in detected:
-                    break
-        
-        return df, detected
+        store = obtener_store_wyscout(data_path)
+        return store.obtener_datos(), store.obtener_columnas_detectadas()
         
     except Exception as e:
         st.error(f"❌ Error al cargar el archivo: {str(e)}")
         return pd.DataFrame(), {}
 
 class WyscoutModel:
-    def __init__(self):
-        self.data_path = Path("data/wyscout_LaLiga_limpio.xlsx")
+    def __init__(self, leagues=None, seasons=None):
+        """
+        Args:
+            leagues: ligas a cargar por defecto (None = todas las particiones)
+            seasons: temporadas a cargar por defecto (None = todas)
+        """
+        self.catalogo = obtener_catalogo_wyscout()
+        self.leagues = leagues
+        self.seasons = seasons
         self._detected_columns = None
     
+    def _cargar_particiones(self, leagues=None, seasons=None, teams=None):
+        """Carga solo las particiones que tocan el filtro (poda por liga/temporada/equipo)"""
+        try:
+            leagues = leagues if leagues else self.leagues
+            seasons = seasons if seasons else self.seasons
+            df = self.catalogo.obtener_datos(leagues, seasons, teams)
+            self._detected_columns = self.catalogo.obtener_columnas_detectadas(leagues, seasons)
+            return df
+        except Exception as e:
+            st.error(f"❌ Error al cargar datos Wyscout: {str(e)}")
+            return pd.DataFrame()
+    
     def get_all_players(self):
-        """Obtiene todos los jugadores usando el cache de Streamlit"""
-        df, self._detected_columns = cargar_datos_wyscout(str(self.data_path))
-        return df
+        """Obtiene todos los jugadores de las ligas/temporadas del modelo"""
+        return self._cargar_particiones()
+    
+    def get_leagues(self):
+        """Ligas disponibles en el catálogo de particiones"""
+        return self.catalogo.ligas()
+    
+    def get_seasons(self, leagues=None):
+        """Temporadas disponibles (opcionalmente para unas ligas)"""
+        return self.catalogo.temporadas(leagues)
+    
+    def get_data_version(self):
+        """Versión de los datos del modelo (cambia si cambia alguna partición)"""
+        return self.catalogo.version(self.leagues, self.seasons)
     
     def get_detected_columns(self):
         """Obtiene el mapeo de columnas detectadas"""
@@ -69,14 +71,25 @@ class WyscoutModel:
         return detected.get(standard_name.lower(), standard_name)
     
     def get_filtered_players(self, filters=None):
-        """Aplica filtros a los datos usando nombres de columnas detectados"""
-        df = self.get_all_players()
+        """
+        Aplica filtros a los datos usando nombres de columnas detectados.
+        Los filtros 'leagues', 'seasons' y 'teams' se usan además para leer
+        solo las particiones necesarias.
+        """
+        if filters is None:
+            return self.get_all_players()
+        
+        df = self._cargar_particiones(
+            leagues=filters.get('leagues'),
+            seasons=filters.get('seasons'),
+            teams=filters.get('teams')
+        )
         detected_cols = self.get_detected_columns()
         
-        if df.empty or filters is None:
+        if df.empty:
             return df
         
-        filtered_df = df.copy()
+        filtered_df = df
         
         # Filtro por equipo
         if filters.get('teams') and len(filters['teams']) > 0:
@@ -195,7 +208,7 @@ class WyscoutModel:
     
     def get_team_players(self, team_name):
         """Obtiene todos los jugadores de un equipo específico"""
-        df = self.get_all_players()
+        df = self._cargar_particiones(teams=[team_name])
         detected_cols = self.get_detected_columns()
         team_col = detected_cols.get('team')
         
@@ -220,8 +233,9 @@ class WyscoutModel:
         df = self.get_all_players()
         detected_cols = self.get_detected_columns()
         
-        # Excluir columnas básicas
+        # Excluir columnas básicas (y las de partición)
         basic_cols = [detected_cols.get(key, key) for key in ['player', 'team', 'position', 'age']]
+        basic_cols += [COL_LIGA, COL_TEMPORADA]
         basic_cols = [col for col in basic_cols if col in df.columns]
         
         # Obtener columnas de estadísticas
@@ -0,0 +1,240 @@
+# models/wyscout_percentiles.py
+"""
+Motor de percentiles para las métricas Wyscout.
+
+Al cargar el dataset se ordenan una sola vez todas las columnas numéricas,
+globalmente y por grupo de posición (los de
+`determinar_grupo_posicion_wyscout`), y se precalculan las matrices de
+rangos de cada jugador. A partir de ahí el percentil de un valor es una
+búsqueda binaria y el de un jugador del dataset una consulta directa, en
+lugar de recorrer la columna entera por cada métrica y jugador.
+
+Los tipos de percentil siguen la convención de `scipy.stats.percentileofscore`:
+- 'rank':   media de los rangos de los empates (lo que usa Mis Informes)
+- 'weak':   % de valores <= x (lo que usan las Visualizaciones)
+- 'strict': % de valores < x
+- 'mean':   media de 'weak' y 'strict'
+"""
+
+import logging
+
+import numpy as np
+import pandas as pd
+
+from models.wyscout_store import obtener_store_wyscout
+
+logger = logging.getLogger(__name__)
+
+GRUPO_GENERAL = 'general'
+MIN_JUGADORES_GRUPO = 10
+
+
+def determinar_grupo_posicion_wyscout(pos_principal):
+    """
+    Determina el grupo de posición basándose en la columna pos_principal de Wyscout
+    """
+    if not pos_principal or pd.isna(pos_principal):
+        return GRUPO_GENERAL
+
+    pos = str(pos_principal).upper().strip()
+
+    # Mapeo de posiciones (códigos y nombres completos del Excel)
+    if pos in ['GK', 'POR', 'G', 'PORTERO', 'GOALKEEPER']:
+        return 'portero'
+    elif pos in ['CB', 'DC', 'DFC', 'DCB', 'DEFENSA CENTRAL', 'CENTRE-BACK']:
+        return 'defensa_central'
+    elif pos in ['LB', 'RB', 'LWB', 'RWB', 'LAT', 'LI', 'LD', 'LATERAL', 'LEFT-BACK', 'RIGHT-BACK', 'WING-BACK',
+                 'LATERAL DERECHO', 'LATERAL IZQUIERDO', 'CARRILERO DERECHO', 'CARRILERO IZQUIERDO']:
+        return 'lateral'
+    elif pos in ['DMC', 'DM', 'CDM', 'MCD', 'MEDIOCENTRO DEFENSIVO', 'DEFENSIVE MIDFIELDER', 'MC', 'CM', 'CMF', 'MEDIOCENTRO', 'CENTRAL MIDFIELDER']:
+        return 'mediocentro'
+    elif pos in ['AMC', 'CAM', 'AM', 'MCO', 'MEDIAPUNTA', 'ATTACKING MIDFIELDER', 'MEDIOCENTRO OFENSIVO']:
+        return 'mediapunta'
+    elif pos in ['LW', 'RW', 'LM', 'RM', 'WF', 'EXTREMO', 'WINGER', 'AML', 'AMR', 'EXT', 'ED', 'EI', 'EXTREMO IZQUIERDO', 'EXTREMO DERECHO']:
+        return 'extremo'
+    elif pos in ['CF', 'ST', 'FW', 'DC', 'DEL', 'DELANTERO', 'DELANTERO CENTRO', 'STRIKER', 'FORWARD', 'SS']:
+        return 'delantero'
+    else:
+        return GRUPO_GENERAL
+
+
+def _percentil_desde_conteos(izquierda, derecha, n, kind):
+    """
+    Convierte los conteos (valores < x, valores <= x) en percentil 0-100.
+    Funciona tanto con escalares como con arrays de numpy.
+    """
+    if kind == 'rank':
+        return (izquierda + derecha + (derecha > izquierda)) * 50.0 / n
+    elif kind == 'weak':
+        return derecha * 100.0 / n
+    elif kind == 'strict':
+        return izquierda * 100.0 / n
+    elif kind == 'mean':
+        return (izquierda + derecha) * 50.0 / n
+    raise ValueError(f"Tipo de percentil no soportado: {kind}")
+
+
+class _ColumnasOrdenadas:
+    """Columnas de una población ordenadas para búsquedas binarias"""
+
+    def __init__(self, valores):
+        # np.sort deja los NaN al final; `conteos` marca dónde empiezan
+        self.ordenados = np.sort(valores, axis=0)
+        self.conteos = np.count_nonzero(~np.isnan(valores), axis=0)
+
+    def conteos_de(self, j, x):
+        """(valores < x, valores <= x, n) de la columna j"""
+        n = self.conteos[j]
+        columna = self.ordenados[:n, j]
+        return (np.searchsorted(columna, x, side='left'),
+                np.searchsorted(columna, x, side='right'),
+                n)
+
+
+class TablaPercentiles:
+    """
+    Percentiles precalculados de todas las columnas numéricas de un dataset,
+    globales y por grupo de posición.
+
+    Args:
+        df: DataFrame Wyscout (población de comparación)
+        min_minutos: minutos mínimos para entrar en la población
+        col_minutos / col_posicion: columnas de minutos y posición principal
+        min_grupo: tamaño mínimo de un grupo; por debajo se compara con todos
+        por_grupo: si False solo se calculan los percentiles globales
+    """
+
+    def __init__(self, df, min_minutos=0, col_minutos='min', col_posicion='pos_principal',
+                 min_grupo=MIN_JUGADORES_GRUPO, por_grupo=True):
+        if min_minutos and col_minutos in df.columns:
+            df = df[df[col_minutos] >= min_minutos]
+
+        self.columnas = [
+            col for col, dtype in df.dtypes.items()
+            if pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)
+        ]
+        self._indice_columna = {col: j for j, col in enumerate(self.columnas)}
+        self._posicion_fila = pd.Index(df.index)
+        self.n_jugadores = len(df)
+
+        valores = df[self.columnas].to_numpy(dtype=float, na_value=np.nan) if self.columnas \
+            else np.empty((len(df), 0))
+
+        if por_grupo and col_posicion in df.columns:
+            grupos = df[col_posicion].map(determinar_grupo_posicion_wyscout).to_numpy(dtype=object)
+        else:
+            grupos = np.full(len(df), GRUPO_GENERAL, dtype=object)
+        self._grupo_fila = grupos
+
+        # Poblaciones ordenadas: la global y una por cada grupo con tamaño suficiente
+        self._poblaciones = {GRUPO_GENERAL: _ColumnasOrdenadas(valores)}
+        self.tamano_grupos = {}
+        for grupo in pd.unique(grupos):
+            mascara = grupos == grupo
+            self.tamano_grupos[grupo] = int(mascara.sum())
+            if grupo != GRUPO_GENERAL and mascara.sum() >= min_grupo:
+                self._poblaciones[grupo] = _ColumnasOrdenadas(valores[mascara])
+
+        # Matrices de conteos (< x, <= x) de cada jugador frente a su población
+        globales = self._matrices_conteo(valores, np.full(len(df), GRUPO_GENERAL, dtype=object))
+        if len(self._poblaciones) > 1:
+            de_grupo = self._matrices_conteo(valores, np.array(
+                [g if g in self._poblaciones else GRUPO_GENERAL for g in grupos], dtype=object))
+        else:
+            de_grupo = globales
+        self._matrices = {False: globales, True: de_grupo}
+
+        logger.info(f"📊 Tabla de percentiles: {self.n_jugadores} jugadores, "
+                    f"{len(self.columnas)} métricas, {len(self._poblaciones) - 1} grupos")
+
+    def _matrices_conteo(self, valores, poblacion_fila):
+        izquierda = np.zeros(valores.shape, dtype=np.int32)
+        derecha = np.zeros(valores.shape, dtype=np.int32)
+        total = np.zeros(valores.shape, dtype=np.int32)
+        for grupo in pd.unique(poblacion_fila):
+            filas = poblacion_fila == grupo
+            poblacion = self._poblaciones[grupo]
+            sub = valores[filas].T
+            izq = np.empty(sub.shape, dtype=np.int32)
+            der = np.empty(sub.shape, dtype=np.int32)
+            for j in range(sub.shape[0]):
+                izq[j], der[j], _ = poblacion.conteos_de(j, sub[j])
+            izquierda[filas] = izq.T
+            derecha[filas] = der.T
+            total[filas] = poblacion.conteos
+        # Los valores NaN no tienen percentil
+        total[np.isnan(valores)] = 0
+        return izquierda, derecha, total
+
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+
+    def tiene_metrica(self, metrica):
+        return metrica in self._indice_columna
+
+    def grupo_comparacion(self, grupo):
+        """Grupo realmente usado (general si el grupo no existe o es pequeño)"""
+        return grupo if grupo in self._poblaciones else GRUPO_GENERAL
+
+    def grupo_de(self, fila):
+        """Grupo de posición de un jugador del dataset (etiqueta del índice)"""
+        return self._grupo_fila[self._posicion_fila.get_loc(fila)]
+
+    def percentil(self, metrica, valor, grupo=None, kind='rank'):
+        """
+        Percentil de un valor cualquiera en la población global o del grupo.
+        None si la métrica no existe o no tiene datos.
+        """
+        j = self._indice_columna.get(metrica)
+        if j is None or valor is None or pd.isna(valor):
+            return None
+        poblacion = self._poblaciones[self.grupo_comparacion(grupo or GRUPO_GENERAL)]
+        izquierda, derecha, n = poblacion.conteos_de(j, float(valor))
+        if n == 0:
+            return None
+        return float(_percentil_desde_conteos(izquierda, derecha, n, kind))
+
+    def percentiles(self, valores, metricas, grupo=None, kind='rank'):
+        """Percentiles de un jugador externo (dict o Series) para varias métricas"""
+        return [self.percentil(m, valores.get(m), grupo, kind) for m in metricas]
+
+    def percentiles_fila(self, fila, metricas, por_grupo=False, kind='rank'):
+        """
+        Percentiles de un jugador del dataset (etiqueta del índice) leídos de
+        las matrices precalculadas. None donde la métrica no existe o es NaN.
+        """
+        i = self._posicion_fila.get_loc(fila)
+        izquierda, derecha, total = self._matrices[bool(por_grupo)]
+        resultado = []
+        for metrica in metricas:
+            j = self._indice_columna.get(metrica)
+            if j is None or total[i, j] == 0:
+                resultado.append(None)
+            else:
+                resultado.append(float(_percentil_desde_conteos(
+                    izquierda[i, j], derecha[i, j], total[i, j], kind)))
+        return resultado
+
+    def matriz(self, metricas=None, por_grupo=False, kind='rank'):
+        """DataFrame jugadores x métricas con los percentiles de todo el dataset"""
+        metricas = list(metricas) if metricas is not None else self.columnas
+        metricas = [m for m in metricas if m in self._indice_columna]
+        columnas = [self._indice_columna[m] for m in metricas]
+        izquierda, derecha, total = (m[:, columnas] for m in self._matrices[bool(por_grupo)])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            datos = _percentil_desde_conteos(izquierda, derecha, total, kind)
+        datos = np.where(total > 0, datos, np.nan)
+        return pd.DataFrame(datos, index=self._posicion_fila, columns=metricas)
+
+
+def obtener_tabla_percentiles(min_minutos=0, data_path=None):
+    """
+    Tabla de percentiles del dataset Wyscout compartido. Se calcula una vez
+    por versión del fichero y se reutiliza en todo el proceso.
+    """
+    store = obtener_store_wyscout(data_path)
+    return store.derivado(
+        ('percentiles', min_minutos),
+        lambda df: TablaPercentiles(df, min_minutos=min_minutos)
+    )
@@ -0,0 +1,603 @@
+# models/wyscout_store.py
+"""
+Servicio único de datos Wyscout para todo el proceso.
+
+Carga el Excel una sola vez, normaliza los tipos numéricos, detecta las
+columnas principales y entrega a cada llamador una vista de solo lectura
+del mismo DataFrame. Sustituye a las lecturas independientes que hacían
+los modelos y las páginas.
+
+El Excel se compila a un snapshot columnar (Feather/Arrow sin comprimir)
+junto al fichero original, con los tipos ya limpios. Las cargas siguientes
+leen ese snapshot mapeado en memoria y solo se regenera cuando cambia el
+Excel (mtime/tamaño y, si difieren, hash SHA-256 del contenido).
+
+Para trabajar con varias ligas y temporadas, los Excel se organizan en
+particiones `data/wyscout/liga=<Liga>/temporada=<Temporada>/*.xlsx` y el
+CatalogoWyscout solo carga las particiones que tocan los filtros (liga,
+temporada y equipo, este último gracias a la lista de equipos guardada en
+los metadatos de cada snapshot).
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import glob
+import threading
+from collections import namedtuple, OrderedDict
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow.feather as feather
+    ARROW_DISPONIBLE = True
+except ImportError:
+    ARROW_DISPONIBLE = False
+
+logger = logging.getLogger(__name__)
+
+# Desde pandas 3 Copy-on-Write está siempre activo: una copia superficial ya
+# aísla al llamador del DataFrame compartido
+COPY_ON_WRITE = int(pd.__version__.split('.')[0]) >= 3
+
+
+def _vista(df):
+    """
+    Copia del DataFrame compartido que el llamador puede modificar sin
+    afectar al store: superficial con Copy-on-Write, completa sin él.
+    """
+    return df.copy(deep=not COPY_ON_WRITE)
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RUTA_WYSCOUT_POR_DEFECTO = os.path.join(BASE_DIR, "data", "wyscout_LaLiga_limpio.xlsx")
+DIRECTORIO_PARTICIONES = os.path.join(BASE_DIR, "data", "wyscout")
+
+# El Excel histórico de LaLiga se expone como una partición más
+LIGA_POR_DEFECTO = "LaLiga"
+TEMPORADA_POR_DEFECTO = "actual"
+
+# Columnas añadidas al combinar particiones
+COL_LIGA = "liga"
+COL_TEMPORADA = "temporada"
+
+# Columnas de equipo usadas para podar particiones por equipo
+COLUMNAS_EQUIPO = ['equipo', 'equipo_durante_el_período_seleccionado']
+
+# Subir este número invalida los snapshots existentes (p. ej. si cambian
+# las reglas de limpieza de tipos)
+VERSION_FORMATO_SNAPSHOT = 2
+
+# Valores que Wyscout usa como "sin dato" en columnas numéricas
+VALORES_NULOS = ['-', '', 'N/A', 'nan', 'null']
+
+# Patrones para detectar columnas automáticamente
+PATRONES_COLUMNAS = {
+    'player': ['player', 'name', 'nombre', 'jugador', 'full name', 'apellidos'],
+    'team': ['team', 'club', 'equipo', 'squad', 'equipo_durante_el_período_seleccionado'],
+    'position': ['position', 'pos', 'posicion', 'posición', 'role', 'pos_principal'],
+    'age': ['age', 'edad', 'años'],
+    'goals': ['goals', 'goles', 'goal'],
+    'assists': ['assists', 'asistencias', 'assist'],
+    'minutes': ['minutes', 'minutos', 'min', 'minutes played'],
+    'matches': ['matches', 'partidos', 'games', 'apps', 'appearances']
+}
+
+
+def limpiar_tipos_wyscout(df):
+    """
+    Convierte a numéricas las columnas de texto cuyos valores son todos
+    números (tratando '-', 'N/A', etc. como NaN). El resto se deja igual.
+    """
+    df.columns = df.columns.str.strip()
+
+    for col in df.columns:
+        serie = df[col]
+        if not (pd.api.types.is_object_dtype(serie) or pd.api.types.is_string_dtype(serie)):
+            continue
+
+        serie = serie.replace(VALORES_NULOS, np.nan)
+        numerica = pd.to_numeric(serie, errors='coerce')
+        no_nulos = serie.notna().sum()
+
+        # Solo convertir si TODOS los valores presentes son numéricos
+        if no_nulos > 0 and numerica.notna().sum() == no_nulos:
+            df[col] = numerica
+        else:
+            df[col] = serie
+
+    return df
+
+
+def detectar_columnas(df):
+    """Detecta las columnas estándar (jugador, equipo, posición...) del dataset"""
+    detected = {}
+    df_columns_lower = [col.lower().strip() for col in df.columns]
+
+    for key, patterns in PATRONES_COLUMNAS.items():
+        for pattern in patterns:
+            for i, col_lower in enumerate(df_columns_lower):
+                if pattern in col_lower:
+                    detected[key] = df.columns[i]
+                    break
+            if key in detected:
+                break
+
+    return detected
+
+
+def equipos_dataset(df):
+    """Equipos presentes en cualquiera de las columnas de equipo del dataset"""
+    columnas = set(COLUMNAS_EQUIPO)
+    team_col = detectar_columnas(df).get('team')
+    if team_col:
+        columnas.add(team_col)
+
+    equipos = set()
+    for col in columnas:
+        if col in df.columns:
+            equipos.update(str(v) for v in df[col].dropna().unique())
+    return sorted(equipos)
+
+
+def rutas_snapshot(data_path):
+    """Rutas del snapshot columnar y de sus metadatos junto al Excel"""
+    base, _ = os.path.splitext(data_path)
+    return f"{base}.feather", f"{base}.snapshot.json"
+
+
+def _hash_fichero(ruta, bloque=1024 * 1024):
+    """SHA-256 del contenido de un fichero"""
+    h = hashlib.sha256()
+    with open(ruta, 'rb') as f:
+        for trozo in iter(lambda: f.read(bloque), b''):
+            h.update(trozo)
+    return h.hexdigest()
+
+
+def _leer_meta_snapshot(ruta_meta):
+    try:
+        with open(ruta_meta, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _escribir_json_atomico(ruta, datos):
+    tmp = f"{ruta}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(datos, f)
+    os.replace(tmp, ruta)
+
+
+def _snapshot_vigente(data_path, stat):
+    """
+    Comprueba si el snapshot corresponde al Excel actual. Si solo ha
+    cambiado el mtime pero el contenido es el mismo, actualiza los
+    metadatos y lo da por bueno sin recompilar.
+    """
+    ruta_snapshot, ruta_meta = rutas_snapshot(data_path)
+    meta = _leer_meta_snapshot(ruta_meta)
+
+    if not meta or not os.path.exists(ruta_snapshot):
+        return False
+    if meta.get('formato') != VERSION_FORMATO_SNAPSHOT:
+        return False
+    if meta.get('mtime_ns') == stat.st_mtime_ns and meta.get('size') == stat.st_size:
+        return True
+
+    if meta.get('sha256') and meta['sha256'] == _hash_fichero(data_path):
+        meta.update(mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+        _escribir_json_atomico(ruta_meta, meta)
+        return True
+
+    return False
+
+
+def compilar_snapshot(data_path, df, stat):
+    """Escribe el snapshot columnar del DataFrame ya limpio"""
+    ruta_snapshot, ruta_meta = rutas_snapshot(data_path)
+    tmp = f"{ruta_snapshot}.tmp"
+
+    feather.write_feather(df.reset_index(drop=True), tmp, compression='uncompressed')
+    os.replace(tmp, ruta_snapshot)
+
+    _escribir_json_atomico(ruta_meta, {
+        'formato': VERSION_FORMATO_SNAPSHOT,
+        'mtime_ns': stat.st_mtime_ns,
+        'size': stat.st_size,
+        'sha256': _hash_fichero(data_path),
+        'filas': len(df),
+        'equipos': equipos_dataset(df),
+        'fecha_compilacion': time.strftime('%Y-%m-%d %H:%M:%S')
+    })
+    logger.info(f"💾 Snapshot Wyscout compilado: {ruta_snapshot}")
+
+
+def leer_snapshot(data_path):
+    """Lee el snapshot mapeado en memoria"""
+    ruta_snapshot, _ = rutas_snapshot(data_path)
+    tabla = feather.read_table(ruta_snapshot, memory_map=True)
+    return tabla.to_pandas(split_blocks=True)
+
+
+def leer_equipos_snapshot(data_path):
+    """
+    Equipos de un fichero según los metadatos de su snapshot, sin cargar
+    los datos. Devuelve None si el snapshot no existe o no está al día.
+    """
+    _, ruta_meta = rutas_snapshot(data_path)
+    meta = _leer_meta_snapshot(ruta_meta)
+    if not meta or meta.get('formato') != VERSION_FORMATO_SNAPSHOT or 'equipos' not in meta:
+        return None
+
+    try:
+        stat = os.stat(data_path)
+    except OSError:
+        return None
+    if meta.get('mtime_ns') != stat.st_mtime_ns or meta.get('size') != stat.st_size:
+        return None
+
+    return meta['equipos']
+
+
+def cargar_dataset_wyscout(data_path):
+    """
+    Devuelve el dataset limpio, usando el snapshot si está al día y
+    regenerándolo desde el Excel en caso contrario.
+    """
+    stat = os.stat(data_path)
+
+    if ARROW_DISPONIBLE:
+        try:
+            if _snapshot_vigente(data_path, stat):
+                return leer_snapshot(data_path)
+        except Exception as e:
+            logger.warning(f"⚠️ Snapshot Wyscout ilegible, se recompila: {e}")
+
+    df = pd.read_excel(data_path, engine='openpyxl')
+    df = limpiar_tipos_wyscout(df)
+
+    if ARROW_DISPONIBLE:
+        try:
+            compilar_snapshot(data_path, df, stat)
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudo escribir el snapshot Wyscout: {e}")
+
+    return df
+
+
+class WyscoutStore:
+    """
+    Dataset Wyscout compartido por todo el proceso (uno por fichero).
+
+    La versión del dataset se deriva del mtime y tamaño del fichero: si el
+    Excel cambia en disco, la siguiente lectura lo recarga automáticamente.
+    """
+
+    _instancias = {}
+    _lock_instancias = threading.Lock()
+
+    def __init__(self, data_path):
+        self.data_path = data_path
+        self._df = None
+        self._detected_columns = {}
+        self._version = None
+        self._equipos = None
+        self._derivados = {}
+        self._huella = None
+        self._lock = threading.RLock()
+
+    @classmethod
+    def obtener(cls, data_path=None):
+        """Devuelve la instancia única asociada al fichero indicado"""
+        ruta = os.path.abspath(data_path or RUTA_WYSCOUT_POR_DEFECTO)
+        with cls._lock_instancias:
+            if ruta not in cls._instancias:
+                cls._instancias[ruta] = cls(ruta)
+            return cls._instancias[ruta]
+
+    # ------------------------------------------------------------------
+    # Carga
+    # ------------------------------------------------------------------
+
+    def _version_en_disco(self):
+        """Identificador de versión del fichero fuente (None si no existe)"""
+        try:
+            stat = os.stat(self.data_path)
+        except OSError:
+            return None
+        return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+    def _asegurar_cargado(self):
+        version_disco = self._version_en_disco()
+        if self._df is not None and version_disco == self._version:
+            return
+
+        with self._lock:
+            version_disco = self._version_en_disco()
+            if self._df is not None and version_disco == self._version:
+                return
+
+            if version_disco is None:
+                logger.error(f"❌ Archivo Wyscout no encontrado: {self.data_path}")
+                self._df, self._detected_columns, self._version = pd.DataFrame(), {}, None
+                return
+
+            logger.info(f"📂 Cargando Wyscout desde {self.data_path}...")
+            start_time = time.time()
+
+            df = cargar_dataset_wyscout(self.data_path)
+
+            self._df = df
+            self._detected_columns = detectar_columnas(df)
+            self._equipos = None
+            self._derivados = {}
+            self._huella = None
+            self._version = version_disco
+
+            logger.info(f"✅ Wyscout cargado: {len(df)} jugadores en {time.time() - start_time:.2f}s")
+
+    def recargar(self):
+        """Fuerza la relectura del fichero en el próximo acceso"""
+        with self._lock:
+            self._df = None
+            self._version = None
+            self._derivados = {}
+            self._huella = None
+
+    # ------------------------------------------------------------------
+    # Acceso
+    # ------------------------------------------------------------------
+
+    def obtener_datos(self):
+        """
+        Vista del dataset compartido. Las modificaciones del llamador no
+        afectan al original; con pandas >= 3 además no duplica memoria.
+        """
+        self._asegurar_cargado()
+        return _vista(self._df)
+
+    def obtener_columnas_detectadas(self):
+        """Mapeo de columnas estándar -> columna real del dataset"""
+        self._asegurar_cargado()
+        return dict(self._detected_columns)
+
+    @property
+    def version(self):
+        """Versión del dataset cargado (cambia cuando cambia el fichero)"""
+        self._asegurar_cargado()
+        return self._version
+
+    @property
+    def huella(self):
+        """
+        Huella del contenido del dataset (SHA-256 del fichero). A diferencia
+        de `version`, no cambia si el fichero solo se ha vuelto a guardar
+        con el mismo contenido.
+        """
+        self._asegurar_cargado()
+        with self._lock:
+            if self._huella is None and self._version is not None:
+                _, ruta_meta = rutas_snapshot(self.data_path)
+                meta = _leer_meta_snapshot(ruta_meta)
+                if meta and meta.get('sha256') and \
+                        f"{meta.get('mtime_ns')}-{meta.get('size')}" == self._version:
+                    self._huella = meta['sha256']
+                else:
+                    self._huella = _hash_fichero(self.data_path)
+            return self._huella
+
+    def equipos(self):
+        """
+        Equipos del fichero. Si los datos no están en memoria se leen de los
+        metadatos del snapshot; None si no se pueden saber sin cargarlos.
+        """
+        if self._df is not None and self._version == self._version_en_disco():
+            if self._equipos is None:
+                self._equipos = equipos_dataset(self._df)
+            return self._equipos
+        return leer_equipos_snapshot(self.data_path)
+
+    def derivado(self, clave, fabrica):
+        """
+        Estructura calculada a partir del dataset (tablas de percentiles,
+        índices...). Se construye una vez por versión con `fabrica(df)` y se
+        descarta automáticamente cuando el fichero cambia.
+        """
+        self._asegurar_cargado()
+        version = self._version
+        valor = self._derivados.get(clave)
+        if valor is not None and valor[0] == version:
+            return valor[1]
+
+        with self._lock:
+            self._asegurar_cargado()
+            valor = self._derivados.get(clave)
+            if valor is not None and valor[0] == self._version:
+                return valor[1]
+            resultado = fabrica(_vista(self._df))
+            self._derivados[clave] = (self._version, resultado)
+            return resultado
+
+
+def obtener_store_wyscout(data_path=None):
+    """Atajo para obtener el store Wyscout del proceso"""
+    return WyscoutStore.obtener(data_path)
+
+
+# ==========================================
+# PARTICIONES POR LIGA / TEMPORADA
+# ==========================================
+
+ParticionWyscout = namedtuple('ParticionWyscout', ['liga', 'temporada', 'ruta'])
+
+
+def descubrir_particiones(directorio=DIRECTORIO_PARTICIONES, incluir_legado=True):
+    """
+    Lista las particiones disponibles con el layout
+    `<directorio>/liga=<Liga>/temporada=<Temporada>/*.xlsx`.
+    Si `incluir_legado`, añade el Excel histórico de LaLiga.
+    """
+    particiones = []
+
+    patron = os.path.join(directorio, 'liga=*', 'temporada=*', '*.xlsx')
+    for ruta in sorted(glob.glob(patron)):
+        if os.path.basename(ruta).startswith('~$'):  # Ficheros de bloqueo de Excel
+            continue
+        dir_temporada = os.path.dirname(ruta)
+        dir_liga = os.path.dirname(dir_temporada)
+        particiones.append(ParticionWyscout(
+            liga=os.path.basename(dir_liga).split('=', 1)[1],
+            temporada=os.path.basename(dir_temporada).split('=', 1)[1],
+            ruta=os.path.abspath(ruta)
+        ))
+
+    if incluir_legado and os.path.exists(RUTA_WYSCOUT_POR_DEFECTO):
+        particiones.append(ParticionWyscout(
+            liga=LIGA_POR_DEFECTO,
+            temporada=TEMPORADA_POR_DEFECTO,
+            ruta=os.path.abspath(RUTA_WYSCOUT_POR_DEFECTO)
+        ))
+
+    return particiones
+
+
+def _normalizar_filtro(valores):
+    """Convierte un filtro (str, lista o None) a set o None"""
+    if valores is None:
+        return None
+    if isinstance(valores, str):
+        valores = [valores]
+    valores = set(valores)
+    return valores or None
+
+
+class CatalogoWyscout:
+    """
+    Dataset Wyscout multi-liga y multi-temporada con poda de particiones.
+
+    Cada partición tiene su propio WyscoutStore (y su snapshot), así que
+    solo se leen de disco las particiones que pide el filtro.
+    """
+
+    _instancia = None
+    _lock_instancia = threading.Lock()
+
+    TTL_DESCUBRIMIENTO = 30  # segundos entre re-escaneos del directorio
+    MAX_COMBINACIONES_CACHE = 8
+
+    def __init__(self, directorio=DIRECTORIO_PARTICIONES):
+        self.directorio = directorio
+        self._particiones = []
+        self._ultimo_escaneo = 0
+        self._combinados = OrderedDict()
+        self._lock = threading.RLock()
+
+    @classmethod
+    def obtener(cls):
+        with cls._lock_instancia:
+            if cls._instancia is None:
+                cls._instancia = cls()
+            return cls._instancia
+
+    def particiones(self):
+        """Particiones disponibles (re-escanea el directorio cada pocos segundos)"""
+        with self._lock:
+            if time.time() - self._ultimo_escaneo > self.TTL_DESCUBRIMIENTO:
+                self._particiones = descubrir_particiones(self.directorio)
+                self._ultimo_escaneo = time.time()
+            return list(self._particiones)
+
+    def ligas(self):
+        return sorted({p.liga for p in self.particiones()})
+
+    def temporadas(self, ligas=None):
+        ligas = _normalizar_filtro(ligas)
+        return sorted({p.temporada for p in self.particiones() if ligas is None or p.liga in ligas})
+
+    def podar(self, ligas=None, temporadas=None, equipos=None):
+        """Particiones que pueden contener filas que cumplan el filtro"""
+        ligas = _normalizar_filtro(ligas)
+        temporadas = _normalizar_filtro(temporadas)
+        equipos = _normalizar_filtro(equipos)
+
+        seleccion = []
+        for particion in self.particiones():
+            if ligas is not None and particion.liga not in ligas:
+                continue
+            if temporadas is not None and particion.temporada not in temporadas:
+                continue
+            if equipos is not None:
+                equipos_particion = WyscoutStore.obtener(particion.ruta).equipos()
+                # Sin metadatos no se puede descartar: se incluye
+                if equipos_particion is not None and not equipos.intersection(equipos_particion):
+                    continue
+            seleccion.append(particion)
+
+        return seleccion
+
+    def version(self, ligas=None, temporadas=None, equipos=None):
+        """(ruta, versión) de cada partición seleccionada: cambia si cambia alguna"""
+        return tuple((p.ruta, WyscoutStore.obtener(p.ruta).version)
+                     for p in self.podar(ligas, temporadas, equipos))
+
+    def obtener_datos(self, ligas=None, temporadas=None, equipos=None):
+        """
+        Filas de las particiones seleccionadas, con las columnas `liga` y
+        `temporada` añadidas. El filtro por equipo solo poda particiones:
+        el filtrado fila a fila lo hace quien llama.
+        """
+        seleccion = self.podar(ligas, temporadas, equipos)
+        if not seleccion:
+            return pd.DataFrame()
+
+        stores = [WyscoutStore.obtener(p.ruta) for p in seleccion]
+        clave = tuple((p.ruta, store.version) for p, store in zip(seleccion, stores))
+
+        with self._lock:
+            if clave in self._combinados:
+                self._combinados.move_to_end(clave)
+                return _vista(self._combinados[clave])
+
+        frames = []
+        for particion, store in zip(seleccion, stores):
+            df = store.obtener_datos()
+            if df.empty:
+                continue
+            # Un único concat evita insertar columnas en un frame con muchos bloques
+            etiquetas = pd.DataFrame({
+                COL_LIGA: pd.Categorical([particion.liga] * len(df)),
+                COL_TEMPORADA: pd.Categorical([particion.temporada] * len(df)),
+            }, index=df.index)
+            frames.append(pd.concat([df, etiquetas], axis=1))
+
+        if not frames:
+            combinado = pd.DataFrame()
+        elif len(frames) == 1:
+            combinado = frames[0]
+        else:
+            combinado = pd.concat(frames, ignore_index=True, sort=False)
+            for col in (COL_LIGA, COL_TEMPORADA):
+                combinado[col] = combinado[col].astype('category')
+
+        with self._lock:
+            self._combinados[clave] = combinado
+            while len(self._combinados) > self.MAX_COMBINACIONES_CACHE:
+                self._combinados.popitem(last=False)
+
+        return _vista(combinado)
+
+    def obtener_columnas_detectadas(self, ligas=None, temporadas=None):
+        """Columnas detectadas en la primera partición seleccionada"""
+        seleccion = self.podar(ligas, temporadas)
+        if not seleccion:
+            return {}
+        return WyscoutStore.obtener(seleccion[0].ruta).obtener_columnas_detectadas()
+
+
+def obtener_catalogo_wyscout():
+    """Atajo para obtener el catálogo de particiones Wyscout del proceso"""
+    return CatalogoWyscout.obtener()
@@ -3,6 +3,7 @@ import pandas as pd
 from common.login import LoginManager
 from models.jugador_model import JugadorModel
 from models.partido_model import PartidoModel
+from models.wyscout_store import obtener_store_wyscout
 import os
 import json
 import uuid
@@ -162,16 +163,10 @@ def cargar_estadisticas_dashboard():
     """Cache para estadísticas del dashboard"""
     return partido_model.obtener_estadisticas_dashboard()
 
-@st.cache_data(ttl=600)  # Cache por 10 minutos
 def cargar_datos_wyscout():
-    """Carga datos de Wyscout para discovery"""
+    """Datos de Wyscout para discovery (store compartido del proceso)"""
     try:
-        wyscout_path = "data/wyscout_LaLiga_limpio.xlsx"
-        if os.path.exists(wyscout_path):
-            df_wyscout = pd.read_excel(wyscout_path, engine='openpyxl')
-            return df_wyscout
-        else:
-            return pd.DataFrame()
+        return obtener_store_wyscout().obtener_datos()
     except Exception:
         return pd.DataFrame()
     
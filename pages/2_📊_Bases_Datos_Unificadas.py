@@ -4,7 +4,6 @@ import sys
 import os
 import json
 from datetime import datetime
-import sqlite3
 
 # Añadir el directorio raíz al path
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -15,6 +14,9 @@ sys.path.append(parent_dir)
 from common.login import LoginManager
 from models.wyscout_model import WyscoutModel
 from models.jugador_model import JugadorModel
+from models.wyscout_store import obtener_store_wyscout
+from common.database import conectar
+from common.consultas import informes_jugador
 
 # Inicializar modelo y forzar creación de tablas si no existen
 jm = JugadorModel()
@@ -24,6 +26,7 @@ from utils.normalizacion import normalizar_nombre_metrica
 from utils.normalizacion import generar_o_cargar_mapping_wyscout
 from utils.aspectos import obtener_aspectos_evaluacion_completa 
 from utils.pdf_generator import PDFGenerator
+from utils.cache_imagenes import imagen_para_pagina
 try:
     from utils.pdf_generator import PDFGenerator
     PDF_DISPONIBLE = True
@@ -214,13 +217,10 @@ def limpiar_columnas_duplicadas(columnas):
             resultado.append(col)
     return resultado
 
-@st.cache_data(ttl=3600)  # Cache por 1 hora
 def cargar_datos_wyscout_simple():
-    """Carga datos directamente del Excel"""
+    """Datos de Wyscout desde el store compartido del proceso"""
     try:
-        # En lugar de: wyscout_model.get_all_players()
-        df = pd.read_excel(excel_path)
-        return df
+        return obtener_store_wyscout(excel_path).obtener_datos()
     except Exception as e:
         st.error(f"Error cargando Excel: {str(e)}")
         return pd.DataFrame()
@@ -230,9 +230,8 @@ def cargar_datos_personales_reales():
     Carga los jugadores directamente de jugadores_observados con TODAS las nuevas columnas.
     """
     try:
-        import sqlite3
         import pandas as pd
-        conn = sqlite3.connect('data/jugadores.db')
+        conn = conectar('data/jugadores.db')
         
         query = """
         SELECT 
@@ -326,47 +325,14 @@ def obtener_informes_jugador(jugador_nombre, jugador_equipo):
     Ahora incluye `url_besoccer` desde la base de jugadores_observados si no existe en el informe.
     """
     try:
-        import sqlite3
         import json
 
-        # Conexión a la base de datos de partidos
-        conn = sqlite3.connect('data/partidos.db')
-        cursor = conn.cursor()
-
-        # Query para obtener informes con datos del partido
-        cursor.execute('''
-            SELECT 
-                i.id,
-                i.partido_id,
-                i.fecha_creacion,
-                i.nota_general,
-                i.tipo_evaluacion,
-                i.recomendacion,
-                i.observaciones,
-                i.scout_usuario,
-                i.minutos_observados,
-                i.posicion_evaluada as posicion,
-                i.fortalezas,
-                i.debilidades,
-                i.metricas,
-                i.metadata,
-                i.imagen_url,
-                p.equipo_local,
-                p.equipo_visitante,
-                p.fecha as fecha_partido,
-                p.resultado_local,
-                p.resultado_visitante
-            FROM informes_scouting i
-            JOIN partidos p ON i.partido_id = p.id
-            WHERE i.jugador_nombre = ? AND i.equipo = ?
-            ORDER BY i.fecha_creacion DESC
-        ''', (jugador_nombre, jugador_equipo))
-
-        columns = [description[0] for description in cursor.description]
         informes = []
 
-        for row in cursor.fetchall():
-            informe_dict = dict(zip(columns, row))
+        # Informes, datos del partido y url_besoccer en una sola consulta
+        for informe_dict in informes_jugador(jugador_nombre, jugador_equipo):
+            if not informe_dict.get('url_besoccer'):
+                informe_dict.pop('url_besoccer', None)
 
             # Parsear campos JSON
             if informe_dict.get('metricas'):
@@ -395,25 +361,6 @@ def obtener_informes_jugador(jugador_nombre, jugador_equipo):
 
             informes.append(informe_dict)
 
-        conn.close()
-
-        # --- NUEVO BLOQUE: Añadir url_besoccer desde jugadores_observados ---
-        if informes:
-            try:
-                conn_jug = sqlite3.connect('data/jugadores.db')
-                cur_jug = conn_jug.cursor()
-                cur_jug.execute(
-                    "SELECT url_besoccer FROM jugadores_observados WHERE jugador = ? AND equipo = ? LIMIT 1",
-                    (jugador_nombre, jugador_equipo)
-                )
-                result = cur_jug.fetchone()
-                if result and result[0]:
-                    for inf in informes:
-                        inf['url_besoccer'] = result[0]
-                conn_jug.close()
-            except Exception as e:
-                print(f"⚠️ No se pudo obtener url_besoccer desde jugadores.db: {e}")
-
         return informes
 
     except Exception as e:
@@ -1037,7 +984,7 @@ with tab2:
                     
                     with col_header1:
                         if pd.notna(jugador_data.get('imagen_url')) and jugador_data['imagen_url'] != '':
-                            st.image(jugador_data['imagen_url'], width=100)
+                            st.image(imagen_para_pagina(jugador_data['imagen_url'], (200, 200)), width=100)
                         else:
                             st.markdown("### 👤")
                     
@@ -1173,7 +1120,7 @@ with tab2:
                         
                         with col1:
                             if pd.notna(jugador.get('imagen_url')) and jugador['imagen_url'] != '':
-                                st.image(jugador['imagen_url'], width=60)
+                                st.image(imagen_para_pagina(jugador['imagen_url'], (120, 120)), width=60)
                             else:
                                 st.markdown("👤")
                         
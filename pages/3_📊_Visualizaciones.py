@@ -3,10 +3,8 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
-import numpy as np
 import sys
 import os
-import matplotlib.pyplot as plt
 from matplotlib.patches import Circle
 import matplotlib.patches as patches
 from mplsoccer import Radar, grid
@@ -19,7 +17,9 @@ sys.path.append(parent_dir)
 # Importar modelos necesarios
 from common.login import LoginManager
 from models.wyscout_model import WyscoutModel
+from models.wyscout_percentiles import TablaPercentiles
 from utils.normalizacion import normalizar_nombre_metrica
+from utils.cache_radares import radar_png
 from utils.normalizacion import generar_o_cargar_mapping_wyscout
 
 excel_path = os.path.join(parent_dir, "data", "wyscout_LaLiga_limpio.xlsx")
@@ -130,8 +130,8 @@ st.markdown(f"""
 </div>
 """, unsafe_allow_html=True)
 
-# Función para limpiar y procesar datos
-@st.cache_data
+# Función para limpiar y procesar datos (sin st.cache_data: el store
+# compartido ya mantiene una única copia en memoria)
 def load_and_clean_data():
     """Cargar y limpiar datos de Wyscout con manejo robusto de errores"""
     wyscout_model = WyscoutModel()
@@ -140,23 +140,9 @@ def load_and_clean_data():
     if df_raw.empty:
         return pd.DataFrame(), {}, {}, wyscout_model
     
-    # Copiar datos para trabajar
-    df = df_raw.copy()
-    
-    # Limpiar datos problemáticos
-    # Convertir '-' y valores no numéricos a NaN en columnas numéricas
-    for col in df.columns:
-        if df[col].dtype == 'object':
-            # Intentar convertir a numérico si es posible
-            try:
-                # Reemplazar '-' y valores no válidos
-                df[col] = df[col].replace(['-', '', 'N/A', 'nan', 'null'], np.nan)
-                # Intentar conversión numérica
-                df_numeric = pd.to_numeric(df[col], errors='ignore')
-                if df_numeric.notna().sum() > 0 and df_numeric.dtype in ['int64', 'float64']:
-                    df[col] = df_numeric
-            except:
-                pass
+    # Los tipos numéricos ('-' -> NaN, texto -> número) ya vienen
+    # normalizados desde el store compartido de Wyscout
+    df = df_raw
     
     # Definir columnas principales con nombres exactos del dataset
     detected_columns = {
@@ -698,6 +684,14 @@ def apply_filters_advanced(df, filters_dict):
     
     return filtered_df
 
+@st.cache_resource(max_entries=20, show_spinner=False)
+def tabla_percentiles_filtrada(clave_filtros, version_datos, _df_filtrado):
+    """
+    Tabla de percentiles de la población filtrada. Se reconstruye solo si
+    cambian los filtros o los datos, no en cada rerun de la página.
+    """
+    return TablaPercentiles(_df_filtrado, por_grupo=False)
+
 # Preparar filtros
 filters = {
     'player_search': player_search,
@@ -711,6 +705,14 @@ filters = {
 # Aplicar filtros
 with st.spinner("🔄 Aplicando filtros..."):
     df_filtered = apply_filters_advanced(df, filters)
+    # Percentiles de todas las métricas frente a la población filtrada:
+    # se ordena cada columna una vez y el resto son consultas directas
+    clave_filtros = tuple(
+        (k, tuple(v) if isinstance(v, (list, tuple)) else v) for k, v in filters.items()
+    )
+    tabla_percentiles = tabla_percentiles_filtrada(
+        clave_filtros, wyscout_model.get_data_version(), df_filtered
+    )
 
 # Función auxiliar para obtener métricas disponibles con validación
 def get_available_metrics(df, category_metrics):
@@ -773,12 +775,16 @@ if "Radar" in tipo_analisis:
                     metrics_labels_clean = []
                     raw_values_dict = {}
                     
+                    percentiles_jugador = dict(zip(
+                        selected_metrics,
+                        tabla_percentiles.percentiles_fila(player_data.name, selected_metrics, kind='weak')
+                    ))
+                    
                     for metric in selected_metrics:
                         if metric in player_data.index and pd.notna(player_data[metric]):
-                            # Calcular percentil
-                            metric_data = df_filtered[metric].dropna()
-                            if len(metric_data) > 1:
-                                percentile = (metric_data <= player_data[metric]).mean() * 100
+                            # Percentil precalculado
+                            if df_filtered[metric].count() > 1:
+                                percentile = percentiles_jugador[metric]
                             else:
                                 percentile = 50
                             
@@ -798,19 +804,23 @@ if "Radar" in tipo_analisis:
                     col1, col2 = st.columns([3, 1])
                     
                     with col1:
-                        # Crear el radar profesional
-                        fig = create_individual_radar(
-                            player_data=player_data,
-                            metrics_values=metrics_values,
-                            metrics_labels=metrics_labels_clean,
-                            player_info=player_info,
-                            percentiles=True,
-                            color_scheme='#007bff'  # Color corporativo
+                        # Crear el radar profesional (o reutilizarlo de la caché por contenido)
+                        png = radar_png(
+                            'visualizaciones_individual', metrics_labels_clean, metrics_values,
+                            lambda: create_individual_radar(
+                                player_data=player_data,
+                                metrics_values=metrics_values,
+                                metrics_labels=metrics_labels_clean,
+                                player_info=player_info,
+                                percentiles=True,
+                                color_scheme='#007bff'  # Color corporativo
+                            ),
+                            estilo={'jugador': player_info, 'color': '#007bff'},
+                            version_datos=wyscout_model.get_data_version()
                         )
                         
                         # Mostrar el gráfico en Streamlit
-                        st.pyplot(fig, use_container_width=True)
-                        plt.close()  # Cerrar la figura para liberar memoria
+                        st.image(png, use_container_width=True)
                         
                         # Explicación del percentil
                         st.caption("📊 **Valores en percentiles:** 100% = mejor del dataset, 0% = peor del dataset")
@@ -836,8 +846,7 @@ if "Radar" in tipo_analisis:
                         for metric, clean_label in zip(selected_metrics[:6], metrics_labels_clean[:6]):
                             if metric in raw_values_dict:
                                 raw_value = raw_values_dict[metric]
-                                metric_data = df_filtered[metric].dropna()
-                                percentile = (metric_data <= raw_value).mean() * 100 if len(metric_data) > 1 else 50
+                                percentile = percentiles_jugador[metric] if df_filtered[metric].count() > 1 else 50
                                 
                                 values_data.append({
                                     'Métrica': clean_label,
@@ -904,28 +913,34 @@ elif "Comparación" in tipo_analisis:
                         for player in selected_players:
                             player_data = df_filtered[df_filtered[player_col] == player].iloc[0]
                             player_values = {}
+                            percentiles_jugador = tabla_percentiles.percentiles_fila(
+                                player_data.name, selected_stats, kind='weak'
+                            )
                             
-                            for metric, clean_label in zip(selected_stats, metrics_labels_clean):
+                            for metric, clean_label, percentile in zip(selected_stats, metrics_labels_clean, percentiles_jugador):
                                 if metric in player_data.index and pd.notna(player_data[metric]):
-                                    metric_data = df_filtered[metric].dropna()
-                                    percentile = (metric_data <= player_data[metric]).mean() * 100
                                     player_values[clean_label] = min(max(percentile, 0), 100)
                                 else:
                                     player_values[clean_label] = 0
                             
                             players_data[player] = player_values
                         
-                        # Crear el radar comparativo profesional
-                        fig = create_comparison_radar(
-                            players_data=players_data,
-                            metrics_labels=metrics_labels_clean,
-                            max_players=5,
-                            colors=['#FF6B6B', '#4ECDC4', '#45B7D1', '#FFA07A', '#98D8C8']
+                        # Crear el radar comparativo profesional (o reutilizarlo de la caché)
+                        colores_radar = ['#FF6B6B', '#4ECDC4', '#45B7D1', '#FFA07A', '#98D8C8']
+                        png = radar_png(
+                            'visualizaciones_comparacion', metrics_labels_clean, players_data,
+                            lambda: create_comparison_radar(
+                                players_data=players_data,
+                                metrics_labels=metrics_labels_clean,
+                                max_players=5,
+                                colors=colores_radar
+                            ),
+                            estilo={'colores': colores_radar, 'max_jugadores': 5},
+                            version_datos=wyscout_model.get_data_version()
                         )
                         
                         # Mostrar el gráfico
-                        st.pyplot(fig, use_container_width=True)
-                        plt.close()
+                        st.image(png, use_container_width=True)
                         
                         # Tabla de comparación detallada
                         st.markdown("#### 📋 Tabla de Comparación Detallada")
@@ -935,12 +950,13 @@ elif "Comparación" in tipo_analisis:
                         for player in selected_players:
                             player_data = df_filtered[df_filtered[player_col] == player].iloc[0]
                             row_data = {'Jugador': player}
+                            percentiles_jugador = tabla_percentiles.percentiles_fila(
+                                player_data.name, selected_stats, kind='weak'
+                            )
                             
-                            for metric, clean_label in zip(selected_stats, metrics_labels_clean):
+                            for metric, clean_label, percentile in zip(selected_stats, metrics_labels_clean, percentiles_jugador):
                                 if metric in player_data.index and pd.notna(player_data[metric]):
                                     value = player_data[metric]
-                                    metric_data = df_filtered[metric].dropna()
-                                    percentile = (metric_data <= value).mean() * 100
                                     row_data[clean_label] = f"{format_value(value)} ({percentile:.0f}%)"
                                 else:
                                     row_data[clean_label] = "N/A"
@@ -983,8 +999,9 @@ elif "Comparación" in tipo_analisis:
                                     
                                     if comparison_type == "Percentiles":
                                         # Convertir a percentil
-                                        metric_data = df_filtered[stat].dropna()
-                                        value = (metric_data <= value).mean() * 100
+                                        value = tabla_percentiles.percentiles_fila(
+                                            player_data.name, [stat], kind='weak'
+                                        )[0]
                                     
                                     clean_stat_name = normalizar_nombre_metrica(stat)
                                     comparison_data.append({
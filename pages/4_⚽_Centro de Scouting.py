@@ -15,6 +15,7 @@ sys.path.append(parent_dir)
 from common.login import LoginManager
 from models.partido_model import PartidoModel
 from models.jugador_model import JugadorModel
+from utils.cache_imagenes import MODO_AJUSTAR, imagen_para_pagina
 
 jm = JugadorModel(db_path="data/jugadores.db")
 jm.init_database()  # fuerza creación de tablas
@@ -25,7 +26,10 @@ partido_model = PartidoModel()
 # Import del scraper de BeSoccer CORREGIDO
 try:
     from utils.besoccer_scraper import obtener_partidos_besoccer, obtener_alineaciones_besoccer, BeSoccerAlineacionesScraper
+    from utils.precarga_besoccer import iniciar_planificador, partidos_precargados, precargar_jornada_desde_pagina
     BESOCCER_DISPONIBLE = True
+    # Partidos de hoy y mañana, alineaciones y perfiles precargados en segundo plano
+    iniciar_planificador()
     print("✅ BeSoccer scraper CORREGIDO disponible")
 except ImportError as e:
     print(f"⚠️ BeSoccer scraper no disponible: {e}")
@@ -652,21 +656,32 @@ def buscar_alineaciones_manual(partido):
         return None
 
 def cargar_partidos_limpio(fecha_str):
-    """FUNCIÓN CORREGIDA: Carga partidos con interface LIMPIA - SIN CACHE DE SESSION STATE"""
+    """
+    FUNCIÓN CORREGIDA: Carga partidos con interface LIMPIA - SIN CACHE DE SESSION STATE
+    Lee del índice local que mantiene la precarga y solo hace scraping si
+    esa fecha no está precargada o está desactualizada
+    """
     if not BESOCCER_DISPONIBLE:
         return partido_model.obtener_partidos_por_fecha(fecha_str)
     
     try:
         print(f"🔍 Carga limpia para {fecha_str}")
         
-        # IMPORTANTE: No usar cache de session state, siempre buscar nuevos
-        scraper_livescore = BeSoccerAlineacionesScraper()
-        partidos_livescore = scraper_livescore.buscar_partidos_en_fecha(fecha_str)
+        partidos_livescore = partidos_precargados(fecha_str)
+        if partidos_livescore:
+            print(f"⚡ {len(partidos_livescore)} partidos desde la precarga local")
+        else:
+            # IMPORTANTE: No usar cache de session state, siempre buscar nuevos
+            scraper_livescore = BeSoccerAlineacionesScraper()
+            partidos_livescore = scraper_livescore.buscar_partidos_en_fecha(fecha_str)
         
         if not partidos_livescore:
             st.info("📅 No hay partidos disponibles para esta fecha")
             return []
         
+        # Alineaciones y perfiles de la jornada en paralelo, sin bloquear la página
+        precargar_jornada_desde_pagina(fecha_str, partidos_livescore)
+        
         # Convertir con información LIMPIA y CORREGIDA
         partidos_convertidos = []
         
@@ -2170,7 +2185,7 @@ if st.session_state.modo_vista == 'lista_partidos':
                 if partido.get('escudo_local'):
                     st.markdown(f"""
                     <div style='display: flex; align-items: center; justify-content: center;'>
-                        <img src="{partido['escudo_local']}" width="50" style='margin-right: 15px;'>
+                        <img src="{imagen_para_pagina(partido['escudo_local'], (100, 100), MODO_AJUSTAR, data_uri=True)}" width="50" style='margin-right: 15px;'>
                         <div>
                             <h3 style='margin: 0;'>{partido['equipo_local']}</h3>
                             <p style='margin: 0; color: gray; font-size: 0.9em;'>🏠 Local</p>
@@ -2202,7 +2217,7 @@ if st.session_state.modo_vista == 'lista_partidos':
                             <h3 style='margin: 0;'>{partido['equipo_visitante']}</h3>
                             <p style='margin: 0; color: gray; font-size: 0.9em;'>✈️ Visitante</p>
                         </div>
-                        <img src="{partido['escudo_visitante']}" width="50">
+                        <img src="{imagen_para_pagina(partido['escudo_visitante'], (100, 100), MODO_AJUSTAR, data_uri=True)}" width="50">
                     </div>
                     """, unsafe_allow_html=True)
                 else:
@@ -2362,7 +2377,7 @@ elif st.session_state.modo_vista == 'observacion':
                     
                     # Crear imagen del jugador
                     if imagen_url:
-                        imagen_html = f'<img src="{imagen_url}" class="jugador-foto" alt="{nombre}">'
+                        imagen_html = f'<img src="{imagen_para_pagina(imagen_url, (80, 80), data_uri=True)}" class="jugador-foto" alt="{nombre}">'
                     else:
                         imagen_html = '<div style="width: 40px; height: 40px; border-radius: 50%; background: #e9ecef; display: flex; align-items: center; justify-content: center; font-size: 1.2em;">👤</div>'
                     
@@ -2406,7 +2421,7 @@ elif st.session_state.modo_vista == 'observacion':
                             with cols_suplente[0]:
                                 # Crear imagen pequeña
                                 if imagen_url:
-                                    imagen_mini = f'<img src="{imagen_url}" style="width: 30px; height: 30px; border-radius: 50%; margin-right: 10px;" alt="{nombre}">'
+                                    imagen_mini = f'<img src="{imagen_para_pagina(imagen_url, (60, 60), data_uri=True)}" style="width: 30px; height: 30px; border-radius: 50%; margin-right: 10px;" alt="{nombre}">'
                                 else:
                                     imagen_mini = '<div style="width: 30px; height: 30px; border-radius: 50%; background: #e9ecef; display: inline-flex; align-items: center; justify-content: center; margin-right: 10px; font-size: 0.8em;">👤</div>'
                                 
@@ -2473,7 +2488,7 @@ elif st.session_state.modo_vista == 'observacion':
                     
                     # Crear imagen del jugador
                     if imagen_url:
-                        imagen_html = f'<img src="{imagen_url}" class="jugador-foto" alt="{nombre}">'
+                        imagen_html = f'<img src="{imagen_para_pagina(imagen_url, (80, 80), data_uri=True)}" class="jugador-foto" alt="{nombre}">'
                     else:
                         imagen_html = '<div style="width: 40px; height: 40px; border-radius: 50%; background: #e9ecef; display: flex; align-items: center; justify-content: center; font-size: 1.2em;">👤</div>'
                     
@@ -2517,7 +2532,7 @@ elif st.session_state.modo_vista == 'observacion':
                             with cols_suplente[0]:
                                 # Crear imagen pequeña
                                 if imagen_url:
-                                    imagen_mini = f'<img src="{imagen_url}" style="width: 30px; height: 30px; border-radius: 50%; margin-right: 10px;" alt="{nombre}">'
+                                    imagen_mini = f'<img src="{imagen_para_pagina(imagen_url, (60, 60), data_uri=True)}" style="width: 30px; height: 30px; border-radius: 50%; margin-right: 10px;" alt="{nombre}">'
                                 else:
                                     imagen_mini = '<div style="width: 30px; height: 30px; border-radius: 50%; background: #e9ecef; display: inline-flex; align-items: center; justify-content: center; margin-right: 10px; font-size: 0.8em;">👤</div>'
                                 
@@ -9,13 +9,8 @@ import sys
 import os
 import re
 import numpy as np
-from scipy import stats
 import matplotlib.pyplot as plt
 from mplsoccer import Radar
-import tempfile
-from fpdf import FPDF
-from PIL import Image
-import requests
 from io import BytesIO
 from datetime import datetime, timedelta
 import json
@@ -31,6 +26,16 @@ sys.path.append(parent_dir)
 from common.login import LoginManager
 from models.partido_model import PartidoModel
 from models.jugador_model import JugadorModel
+from models.metricas_informes import CATEGORIAS, comparar_informes
+from utils.cache_radares import radar_png
+from utils.cache_imagenes import imagen_buffer
+from utils.exportacion_pdf import FORMATO_PDF, FORMATO_ZIP, PYPDF_DISPONIBLE, exportar_informes
+from common.database import conectar
+from common.plantilla_pdf import obtener_plantilla_pdf
+from models.wyscout_store import obtener_store_wyscout
+from models.wyscout_percentiles import (
+    determinar_grupo_posicion_wyscout, obtener_tabla_percentiles, TablaPercentiles
+)
 
 
 # Configurar nivel de logging
@@ -108,33 +113,6 @@ with nav_col1:
 
 st.markdown("---")
 
-def determinar_grupo_posicion_wyscout(pos_principal):
-    """
-    Determina el grupo de posición basándose en la columna pos_principal de Wyscout
-    """
-    if not pos_principal:
-        return 'general'
-    
-    pos = str(pos_principal).upper().strip()
-    
-    # Mapeo de posiciones
-    if pos in ['GK', 'POR', 'G', 'PORTERO', 'GOALKEEPER']:
-        return 'portero'
-    elif pos in ['CB', 'DC', 'DFC', 'DCB', 'DEFENSA CENTRAL', 'CENTRE-BACK']:
-        return 'defensa_central'
-    elif pos in ['LB', 'RB', 'LWB', 'RWB', 'LAT', 'LI', 'LD', 'LATERAL', 'LEFT-BACK', 'RIGHT-BACK', 'WING-BACK']:
-        return 'lateral'
-    elif pos in ['DMC', 'DM', 'CDM', 'MCD', 'MEDIOCENTRO DEFENSIVO', 'DEFENSIVE MIDFIELDER', 'MC', 'CM', 'CMF', 'MEDIOCENTRO', 'CENTRAL MIDFIELDER']:
-        return 'mediocentro'
-    elif pos in ['AMC', 'CAM', 'AM', 'MCO', 'MEDIAPUNTA', 'ATTACKING MIDFIELDER','MEDIOCENTRO OFENSIVO']:
-        return 'mediapunta'
-    elif pos in ['LW', 'RW', 'LM', 'RM', 'WF', 'EXTREMO', 'WINGER', 'AML', 'AMR', 'EXT', 'ED', 'EI', 'EXTREMO IZQUIERDO', 'EXTREMO DERECHO']:
-        return 'extremo'
-    elif pos in ['CF', 'ST', 'FW', 'DC', 'DEL', 'DELANTERO', 'STRIKER', 'FORWARD', 'SS']:
-        return 'delantero'
-    else:
-        return 'general'
-
 def obtener_parametros_radar_wyscout(grupo_posicion, dict_jugador, mapping_wyscout):
     """
     Obtiene los parámetros del radar según la posición y verifica disponibilidad
@@ -290,7 +268,8 @@ def calcular_percentiles_liga(df_jugador, parametros, df_wyscout_completo=None,
     Args:
         df_jugador: dict con los datos del jugador
         parametros: lista de métricas a evaluar
-        df_wyscout_completo: DataFrame con todos los jugadores de Wyscout (opcional)
+        df_wyscout_completo: DataFrame con todos los jugadores de Wyscout (opcional,
+            por defecto se usa la tabla precalculada del dataset compartido)
         grupo_posicion: grupo de posición del jugador para comparación más precisa
     
     Returns:
@@ -299,27 +278,23 @@ def calcular_percentiles_liga(df_jugador, parametros, df_wyscout_completo=None,
     
     percentiles = []
     
-    # Si no se proporciona el DataFrame, intentar cargarlo
-    if df_wyscout_completo is None:
-        try:
-            rutas_posibles = [
-                'data/wyscout_LaLiga_limpio.xlsx',
-                '../data/wyscout_LaLiga_limpio.xlsx',
-                os.path.join(os.path.dirname(__file__), '../data/wyscout_LaLiga_limpio.xlsx')
-            ]
-            
-            for ruta in rutas_posibles:
-                if os.path.exists(ruta):
-                    print(f"📊 Cargando datos Wyscout para percentiles desde: {ruta}")
-                    df_wyscout_completo = pd.read_excel(ruta)
-                    break
-                    
-        except Exception as e:
-            print(f"⚠️ No se pudieron cargar datos Wyscout para percentiles: {e}")
-            df_wyscout_completo = None
+    # Filtrar jugadores con minutos mínimos (ej: 500 minutos)
+    min_minutos = 500
+    
+    # Tabla de percentiles precalculada: la del dataset compartido o, si se
+    # pasa otro DataFrame, una construida para él
+    tabla = None
+    try:
+        if df_wyscout_completo is None:
+            tabla = obtener_tabla_percentiles(min_minutos)
+        elif not df_wyscout_completo.empty:
+            tabla = TablaPercentiles(df_wyscout_completo, min_minutos=min_minutos)
+    except Exception as e:
+        print(f"⚠️ No se pudieron cargar datos Wyscout para percentiles: {e}")
+        tabla = None
     
     # Si no hay datos de comparación, usar el método simplificado anterior
-    if df_wyscout_completo is None or df_wyscout_completo.empty:
+    if tabla is None or tabla.n_jugadores == 0:
         print("⚠️ Usando percentiles simulados (sin datos de comparación)")
         for param in parametros:
             valor = df_jugador.get(param, 0)
@@ -340,42 +315,17 @@ def calcular_percentiles_liga(df_jugador, parametros, df_wyscout_completo=None,
     
     # CÁLCULO DE PERCENTILES REALES
     print(f"\n📊 Calculando percentiles reales para {len(parametros)} métricas")
+    print(f"👥 Jugadores con >{min_minutos} min: {tabla.n_jugadores}")
     
-    # Filtrar jugadores con minutos mínimos (ej: 500 minutos)
-    min_minutos = 500
-    df_filtrado = df_wyscout_completo[df_wyscout_completo['min'] >= min_minutos].copy()
-    print(f"👥 Jugadores con >{min_minutos} min: {len(df_filtrado)}/{len(df_wyscout_completo)}")
-    
-    # Si es posible, filtrar por grupo de posición similar
-    if grupo_posicion != 'general' and 'pos_principal' in df_filtrado.columns:
-        # Mapeo de grupos de posición
-        grupos_similares = {
-            'portero': ['GK', 'POR', 'G', 'PORTERO'],
-            'defensa_central': ['CB', 'DC', 'DFC', 'DCB'],
-            'lateral': ['LB', 'RB', 'LWB', 'RWB', 'LAT', 'LI', 'LD'],
-            'mediocentro': ['DMC', 'DM', 'CDM', 'MC', 'CM', 'CMF'],
-            'mediapunta': ['AMC', 'CAM', 'AM', 'MCO', 'MEDIOCENTRO OFENSIVO'],
-            'extremo': ['LW', 'RW', 'LM', 'RM', 'WF', 'AML', 'AMR'],
-            'delantero': ['CF', 'ST', 'FW', 'DC', 'DEL']
-        }
-        
-        if grupo_posicion in grupos_similares:
-            posiciones_validas = grupos_similares[grupo_posicion]
-            mascara_posicion = df_filtrado['pos_principal'].str.upper().isin(posiciones_validas)
-            df_comparacion = df_filtrado[mascara_posicion].copy()
-            
-            if len(df_comparacion) < 10:  # Si hay muy pocos jugadores, usar todos
-                print(f"⚠️ Solo {len(df_comparacion)} jugadores en {grupo_posicion}, usando todos")
-                df_comparacion = df_filtrado
-            else:
-                print(f"🎯 Comparando con {len(df_comparacion)} jugadores de {grupo_posicion}")
-        else:
-            df_comparacion = df_filtrado
-    else:
-        df_comparacion = df_filtrado
+    # Comparar con el grupo de posición si tiene jugadores suficientes
+    grupo_comparacion = tabla.grupo_comparacion(grupo_posicion)
+    if grupo_posicion != 'general' and grupo_comparacion == 'general':
+        print(f"⚠️ Solo {tabla.tamano_grupos.get(grupo_posicion, 0)} jugadores en {grupo_posicion}, usando todos")
+    elif grupo_comparacion != 'general':
+        print(f"🎯 Comparando con {tabla.tamano_grupos[grupo_comparacion]} jugadores de {grupo_comparacion}")
     
     # Calcular percentil para cada parámetro
-    for i, param in enumerate(parametros):
+    for param in parametros:
         valor_jugador = df_jugador.get(param, 0)
         if pd.isna(valor_jugador):
             valor_jugador = 0
@@ -388,40 +338,11 @@ def calcular_percentiles_liga(df_jugador, parametros, df_wyscout_completo=None,
             percentiles.append(50)  # Valor neutral
             continue
         
-        # Obtener todos los valores de esta métrica
-        if param in df_comparacion.columns:
-            # Obtener la columna y limpiar valores no numéricos
-            valores_liga_raw = df_comparacion[param]
-            
-            # Convertir a numérico, forzando errores a NaN
-            valores_liga = pd.to_numeric(valores_liga_raw, errors='coerce')
+        if tabla.tiene_metrica(param):
+            percentil = tabla.percentil(param, valor_jugador, grupo_comparacion, kind='rank')
             
-            # Eliminar NaN
-            valores_liga = valores_liga.dropna()
-            
-            # Verificar que tengamos valores válidos
-            if len(valores_liga) > 0:
-                # Verificar que todos los valores sean numéricos
-                if valores_liga.dtype in ['float64', 'int64', 'float32', 'int32']:
-                    # Calcular percentil real
-                    percentil = stats.percentileofscore(valores_liga, valor_jugador, kind='rank')
-                    
-                    # Información adicional para debug
-                    media_liga = valores_liga.mean()
-                    mediana_liga = valores_liga.median()
-                    
-                    print(f"📈 {param}:")
-                    print(f"   - Valor jugador: {valor_jugador:.2f}")
-                    print(f"   - Media liga: {media_liga:.2f}")
-                    print(f"   - Mediana liga: {mediana_liga:.2f}")
-                    print(f"   - Percentil: {percentil:.1f}")
-                else:
-                    print(f"⚠️ {param}: Valores no numéricos después de conversión")
-                    # Usar método simple como fallback
-                    if '%' in param:
-                        percentil = min(valor_jugador, 100)
-                    else:
-                        percentil = min(valor_jugador * 20, 100)
+            if percentil is not None:
+                print(f"📈 {param}: valor {valor_jugador:.2f} → percentil {percentil:.1f}")
             else:
                 print(f"⚠️ {param}: Sin datos válidos de comparación")
                 # Fallback al método simple
@@ -439,41 +360,16 @@ def calcular_percentiles_liga(df_jugador, parametros, df_wyscout_completo=None,
     return percentiles
 
 
-# Función auxiliar para cargar y cachear datos Wyscout (optimización)
-@st.cache_data
+# Función auxiliar para obtener los datos Wyscout (ya limpios) del store compartido
 def cargar_datos_wyscout_para_percentiles():
     """
-    Carga los datos de Wyscout una sola vez y los cachea para eficiencia
-    Incluye limpieza de datos
+    Devuelve los datos de Wyscout del store compartido del proceso.
+    La limpieza de columnas numéricas ya la hace el store al cargar.
     """
     try:
-        rutas_posibles = [
-            'data/wyscout_LaLiga_limpio.xlsx',
-            '../data/wyscout_LaLiga_limpio.xlsx',
-            os.path.join(os.path.dirname(os.path.abspath(__file__)), '../data/wyscout_LaLiga_limpio.xlsx')
-        ]
-        
-        for ruta in rutas_posibles:
-            if os.path.exists(ruta):
-                print(f"💾 Cargando y cacheando datos Wyscout desde: {ruta}")
-                df = pd.read_excel(ruta)
-                
-                # Limpiar columnas numéricas
-                columnas_numericas = [
-                    'goles/90', 'xg/90', 'asistencias/90', 'xa/90', 
-                    'regates/90', 'remates/90', 'jugadas_claves/90',
-                    '%duelos_ganados,_', '%precisión_pases,_', 
-                    'intercep/90', 'entradas/90', 'pases/90'
-                ]
-                
-                for col in columnas_numericas:
-                    if col in df.columns:
-                        # Convertir a numérico, reemplazando errores con NaN
-                        df[col] = pd.to_numeric(df[col], errors='coerce')
-                
-                print(f"✅ Datos cargados y limpiados: {len(df)} jugadores")
-                return df
-                
+        df = obtener_store_wyscout().obtener_datos()
+        if not df.empty:
+            return df
     except Exception as e:
         print(f"❌ Error cargando datos Wyscout: {e}")
     
@@ -485,20 +381,21 @@ def calcular_percentiles_con_datos_reales(jugador_wyscout, parametros_disponible
     """
     Wrapper para calcular percentiles con datos reales de Wyscout
     """
-    # Cargar datos cacheados
+    # Cargar datos compartidos
     df_wyscout = cargar_datos_wyscout_para_percentiles()
     
     if df_wyscout is not None:
-        # Calcular percentiles reales
+        # Percentiles reales sobre la tabla precalculada del dataset compartido
         percentiles = calcular_percentiles_liga(
             jugador_wyscout, 
             parametros_disponibles,
-            df_wyscout,
-            grupo_posicion
+            grupo_posicion=grupo_posicion
         )
     else:
         # Fallback al método simple
-        percentiles = calcular_percentiles_liga(jugador_wyscout, parametros_disponibles)
+        percentiles = calcular_percentiles_liga(
+            jugador_wyscout, parametros_disponibles, df_wyscout_completo=pd.DataFrame()
+        )
     
     return percentiles
 
@@ -819,8 +716,16 @@ def obtener_metricas_para_pdf(informe_data):
         }
     }
 
+    # CASO 0: Promedios ya calculados en SQL desde informe_metricas
+    promedios_sql = informe_data.get('promedios_categorias') or {}
+    if all(cat in promedios_sql for cat in CATEGORIAS):
+        resultado["modo"] = "completo"
+        resultado["promedios"] = {cat: float(promedios_sql[cat]) for cat in CATEGORIAS}
+        if 'categorias' in metricas:
+            resultado["categorias"] = metricas['categorias']
+
     # CASO 1: Estructura nueva con promedios
-    if 'promedios' in metricas:
+    elif 'promedios' in metricas:
         resultado["modo"] = "completo"
         resultado["promedios"] = {
             'tecnicos': float(metricas['promedios'].get('tecnicos', 0)),
@@ -1170,192 +1075,6 @@ def crear_radar_hibrido(informes_ordenados, posicion, num_campo, num_video):
         # Si no hay suficientes métricas específicas, usar el básico
         return radar_basico
     
-# def crear_radar_chart_jugador(datos_wyscout, nombre_jugador, equipo_jugador=None, informes_scout=None):
-    """
-    Versión mejorada del radar chart con sistema híbrido
-    """
-    try:
-        # Cache para evitar búsquedas repetidas
-        if not hasattr(st.session_state, 'wyscout_cache'):
-            st.session_state.wyscout_cache = {}
-        
-        cache_key = f"{nombre_jugador}_{equipo_jugador or 'sin_equipo'}"
-        
-        print(f"🎯 Generando radar híbrido para {nombre_jugador}")
-
-        jugador_wyscout = None
-        usar_datos_wyscout = False
-        fuente = "Evaluación Scout"
-        grupo_posicion = "general"
-        
-        # === PROCESAR DATOS WYSCOUT ===
-        if datos_wyscout is not None:
-            print("📊 Procesando datos Wyscout...")
-            
-            # Convertir a diccionario si es necesario
-            if isinstance(datos_wyscout, pd.Series):
-                jugador_wyscout = datos_wyscout.to_dict()
-            elif isinstance(datos_wyscout, dict):
-                jugador_wyscout = datos_wyscout
-            else:
-                jugador_wyscout = None
-            
-            if jugador_wyscout:
-                # Determinar grupo de posición
-                pos_principal = jugador_wyscout.get('pos_principal', '')
-                if pos_principal:
-                    grupo_posicion = determinar_grupo_posicion_wyscout(pos_principal)
-                    print(f"📍 Posición detectada: {pos_principal} → Grupo: {grupo_posicion}")
-                
-                # Obtener parámetros disponibles
-                params_disponibles, etiquetas = obtener_parametros_radar_wyscout(
-                    grupo_posicion, 
-                    jugador_wyscout, 
-                    mapping_wyscout
-                )
-                
-                if len(params_disponibles) >= 4:  # Mínimo 4 métricas
-                    print(f"✅ Métricas Wyscout disponibles: {len(params_disponibles)}")
-                    
-                    # Calcular percentiles
-                    valores_jugador = calcular_percentiles_con_datos_reales(
-                        jugador_wyscout, 
-                        params_disponibles, 
-                        grupo_posicion
-                    )
-                    
-                    # Configurar para radar
-                    params = etiquetas
-                    min_range = [0] * len(params)
-                    max_range = [100] * len(params)  # Percentiles van de 0 a 100
-                    usar_percentiles = True
-                    usar_datos_wyscout = True
-                    fuente = "Datos Wyscout"
-                else:
-                    print(f"⚠️ Solo {len(params_disponibles)} métricas Wyscout, usando scout")
-                    usar_datos_wyscout = False
-        
-        # === SI NO HAY WYSCOUT O NO SUFICIENTES DATOS, USAR SCOUT ===
-        if not usar_datos_wyscout and informes_scout:
-            print("📊 Usando evaluaciones del scout...")
-            datos_reales = crear_datos_desde_evaluaciones_mejorado(informes_scout)
-            
-            if datos_reales and 'etiquetas' in datos_reales:
-                params = datos_reales['etiquetas']
-                valores_jugador = datos_reales['valores']
-                min_range = [0] * len(params)
-                max_range = [10] * len(params)
-                usar_percentiles = False
-                
-                # Información del modo en la fuente
-                num_eval = datos_reales.get('_num_evaluaciones', len(informes_scout))
-                num_video = datos_reales.get('_num_video_completo', 0)
-                modo = datos_reales.get('modo', 'basico')
-                
-                if modo == 'especifico':
-                    fuente = f"Análisis detallado ({num_eval} eval, {num_video} video)"
-                elif modo == 'hibrido':
-                    fuente = f"Análisis mixto ({num_eval} eval: {num_video} video, {num_eval-num_video} campo)"
-                else:
-                    fuente = f"Evaluación campo ({num_eval} observaciones)"
-            else:
-                # Fallback al sistema original
-                params = ['Técnica', 'Táctica', 'Físico', 'Mental', 'Finalización', 'Creatividad', 'Trabajo Def.', 'Liderazgo']
-                min_range = [0] * 8
-                max_range = [10] * 8
-                valores_jugador = [5] * 8
-                usar_percentiles = False
-                fuente = "Evaluación Scout (datos limitados)"
-        
-        # === SI NO HAY NADA, VALORES POR DEFECTO ===
-        if 'params' not in locals():
-            print("⚠️ Sin datos suficientes, usando valores por defecto")
-            params = ['Técnica', 'Táctica', 'Físico', 'Mental']
-            valores_jugador = [5, 5, 5, 5]
-            min_range = [0, 0, 0, 0]
-            max_range = [10, 10, 10, 10]
-            usar_percentiles = False
-            fuente = "Sin datos"
-        
-        # === CREAR RADAR (código de visualización permanece igual) ===
-        print(f"📊 Creando radar con {len(params)} parámetros")
-        
-        radar = Radar(
-            params, 
-            min_range, 
-            max_range,
-            round_int=[True] * len(params) if usar_percentiles else [False] * len(params),
-            num_rings=4,
-            ring_width=1, 
-            center_circle_radius=1
-        )
-        
-        # Setup axis
-        fig, ax = radar.setup_axis()
-        fig.set_size_inches(10, 8)
-        
-        # Colores según fuente
-        if usar_datos_wyscout:
-            color_principal = '#1e3a8a'
-            color_secundario = '#3b82f6'
-            titulo_adicional = f"Percentiles Liga - {grupo_posicion.replace('_', ' ').title()}"
-        else:
-            color_principal = '#059669'
-            color_secundario = '#10b981'
-            titulo_adicional = "Evaluación Scout"
-        
-        # Dibujar radar
-        rings_inner = radar.draw_circles(ax=ax, facecolor='#f8fafc', edgecolor='#e2e8f0')
-        
-        radar_output = radar.draw_radar(
-            valores_jugador, 
-            ax=ax,
-            kwargs_radar={
-                'facecolor': color_principal, 
-                'alpha': 0.3,
-                'edgecolor': color_secundario,
-                'linewidth': 2
-            },
-            kwargs_rings={'facecolor': color_secundario, 'alpha': 0.1}
-        )
-        
-        radar_poly, rings_outer, vertices = radar_output
-        
-        # Puntos en vértices
-        ax.scatter(vertices[:, 0], vertices[:, 1], 
-                  c='#ef4444', s=50, zorder=5, 
-                  edgecolors='white', linewidth=2)
-        
-        # Etiquetas
-        radar.draw_range_labels(ax=ax, fontsize=9)
-        radar.draw_param_labels(ax=ax, fontsize=10)
-        
-        # Título
-        fig.suptitle(f'{nombre_jugador} - {titulo_adicional}', 
-                    fontsize=14, color=color_principal, 
-                    fontweight='bold', y=0.98)
-        
-        # Subtítulo
-        plt.figtext(0.5, 0.94, f'Fuente: {fuente}', 
-                   ha='center', fontsize=10, color='#64748b')
-        
-        # Guardar
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.png') as tmp_file:
-            tmp_path = tmp_file.name
-        
-        plt.savefig(tmp_path, dpi=300, bbox_inches='tight', 
-                   facecolor='white', edgecolor='none')
-        plt.close()
-        
-        print(f"✅ Radar híbrido generado exitosamente")
-        return tmp_path
-        
-    except Exception as e:
-        print(f"❌ Error generando radar: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        return None
-
 def crear_radar_chart_jugador(datos_wyscout, nombre_jugador, equipo_jugador=None, informes_scout=None):
     """
     Versión mejorada del radar chart con sistema híbrido
@@ -1484,20 +1203,6 @@ def crear_radar_chart_jugador(datos_wyscout, nombre_jugador, equipo_jugador=None
         # === CREAR RADAR (código de visualización permanece igual) ===
         print(f"📊 Creando radar con {len(params)} parámetros")
         
-        radar = Radar(
-            params, 
-            min_range, 
-            max_range,
-            round_int=[True] * len(params) if usar_percentiles else [False] * len(params),
-            num_rings=4,
-            ring_width=1, 
-            center_circle_radius=1
-        )
-        
-        # Setup axis
-        fig, ax = radar.setup_axis()
-        fig.set_size_inches(10, 8)
-        
         # Colores según fuente
         if usar_datos_wyscout:
             color_principal = '#1e3a8a'
@@ -1508,51 +1213,68 @@ def crear_radar_chart_jugador(datos_wyscout, nombre_jugador, equipo_jugador=None
             color_secundario = '#10b981'
             titulo_adicional = "Evaluación Scout"
         
-        # Dibujar radar
-        rings_inner = radar.draw_circles(ax=ax, facecolor='#f8fafc', edgecolor='#e2e8f0')
-        
-        radar_output = radar.draw_radar(
-            valores_jugador, 
-            ax=ax,
-            kwargs_radar={
-                'facecolor': color_principal, 
-                'alpha': 0.3,
-                'edgecolor': color_secundario,
-                'linewidth': 2
-            },
-            kwargs_rings={'facecolor': color_secundario, 'alpha': 0.1}
+        def dibujar():
+            radar = Radar(
+                params, 
+                min_range, 
+                max_range,
+                round_int=[True] * len(params) if usar_percentiles else [False] * len(params),
+                num_rings=4,
+                ring_width=1, 
+                center_circle_radius=1
+            )
+            
+            # Setup axis
+            fig, ax = radar.setup_axis()
+            fig.set_size_inches(10, 8)
+            
+            # Dibujar radar
+            radar.draw_circles(ax=ax, facecolor='#f8fafc', edgecolor='#e2e8f0')
+            
+            radar_output = radar.draw_radar(
+                valores_jugador, 
+                ax=ax,
+                kwargs_radar={
+                    'facecolor': color_principal, 
+                    'alpha': 0.3,
+                    'edgecolor': color_secundario,
+                    'linewidth': 2
+                },
+                kwargs_rings={'facecolor': color_secundario, 'alpha': 0.1}
+            )
+            
+            radar_poly, rings_outer, vertices = radar_output
+            
+            # Puntos en vértices
+            ax.scatter(vertices[:, 0], vertices[:, 1], 
+                      c='#ef4444', s=50, zorder=5, 
+                      edgecolors='white', linewidth=2)
+            
+            # Etiquetas
+            radar.draw_range_labels(ax=ax, fontsize=9)
+            radar.draw_param_labels(ax=ax, fontsize=10)
+            
+            # Título
+            fig.suptitle(f'{nombre_jugador} - {titulo_adicional}', 
+                        fontsize=14, color=color_principal, 
+                        fontweight='bold', y=0.98)
+            
+            # Subtítulo
+            fig.text(0.5, 0.94, f'Fuente: {fuente}', 
+                     ha='center', fontsize=10, color='#64748b')
+            return fig
+        
+        # PNG del radar desde la caché por contenido (los percentiles dependen del dataset)
+        png = radar_png(
+            'jugador', params, valores_jugador, dibujar,
+            estilo={'titulo': f'{nombre_jugador} - {titulo_adicional}', 'fuente': fuente,
+                    'rango': [min_range, max_range], 'percentiles': usar_percentiles},
+            version_datos=obtener_store_wyscout().version if usar_datos_wyscout else None,
+            dpi=300, edgecolor='none'
         )
         
-        radar_poly, rings_outer, vertices = radar_output
-        
-        # Puntos en vértices
-        ax.scatter(vertices[:, 0], vertices[:, 1], 
-                  c='#ef4444', s=50, zorder=5, 
-                  edgecolors='white', linewidth=2)
-        
-        # Etiquetas
-        radar.draw_range_labels(ax=ax, fontsize=9)
-        radar.draw_param_labels(ax=ax, fontsize=10)
-        
-        # Título
-        fig.suptitle(f'{nombre_jugador} - {titulo_adicional}', 
-                    fontsize=14, color=color_principal, 
-                    fontweight='bold', y=0.98)
-        
-        # Subtítulo
-        plt.figtext(0.5, 0.94, f'Fuente: {fuente}', 
-                   ha='center', fontsize=10, color='#64748b')
-        
-        # Guardar
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.png') as tmp_file:
-            tmp_path = tmp_file.name
-        
-        plt.savefig(tmp_path, dpi=300, bbox_inches='tight', 
-                   facecolor='white', edgecolor='none')
-        plt.close()
-        
         print(f"✅ Radar generado exitosamente")
-        return tmp_path
+        return BytesIO(png)
         
     except Exception as e:
         print(f"❌ Error generando radar: {str(e)}")
@@ -1580,42 +1302,38 @@ def crear_radar_chart_scout_individual(informe_data):
         
         print(f"✅ Valores para radar: {values}")
 
-        # Crear radar chart
-        N = len(params)
-        angles = np.linspace(0, 2 * np.pi, N, endpoint=False).tolist()
-        values_plot = values + values[:1]
-        angles += angles[:1]
+        def dibujar():
+            N = len(params)
+            angles = np.linspace(0, 2 * np.pi, N, endpoint=False).tolist()
+            values_plot = values + values[:1]
+            angles += angles[:1]
 
-        fig, ax = plt.subplots(figsize=(6, 6), subplot_kw=dict(polar=True))
-        ax.set_theta_offset(np.pi / 2)
-        ax.set_theta_direction(-1)
+            fig, ax = plt.subplots(figsize=(6, 6), subplot_kw=dict(polar=True))
+            ax.set_theta_offset(np.pi / 2)
+            ax.set_theta_direction(-1)
 
-        # Configuración
-        ax.set_ylim(0, 10)
-        ax.set_xticks(angles[:-1])
-        ax.set_xticklabels(params, size=11)
-        ax.set_yticks([2, 4, 6, 8, 10])
-        ax.set_yticklabels(['2', '4', '6', '8', '10'], size=9)
-        ax.grid(True, linestyle='--', alpha=0.6)
+            # Configuración
+            ax.set_ylim(0, 10)
+            ax.set_xticks(angles[:-1])
+            ax.set_xticklabels(params, size=11)
+            ax.set_yticks([2, 4, 6, 8, 10])
+            ax.set_yticklabels(['2', '4', '6', '8', '10'], size=9)
+            ax.grid(True, linestyle='--', alpha=0.6)
 
-        # Dibujar
-        ax.plot(angles, values_plot, 'o-', linewidth=2, color='#007bff')
-        ax.fill(angles, values_plot, alpha=0.3, color='#007bff')
+            # Dibujar
+            ax.plot(angles, values_plot, 'o-', linewidth=2, color='#007bff')
+            ax.fill(angles, values_plot, alpha=0.3, color='#007bff')
 
-        # Valores en puntos
-        for angle, value in zip(angles[:-1], values):
-            ax.text(angle, value + 0.3, f'{value:.1f}', 
-                   ha='center', va='center', fontsize=9, weight='bold')
+            # Valores en puntos
+            for angle, value in zip(angles[:-1], values):
+                ax.text(angle, value + 0.3, f'{value:.1f}', 
+                       ha='center', va='center', fontsize=9, weight='bold')
 
-        plt.title('Evaluación del Jugador', size=14, weight='bold', pad=20)
+            ax.set_title('Evaluación del Jugador', size=14, weight='bold', pad=20)
+            return fig
 
-        # Guardar
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.png') as tmp_file:
-            tmp_path = tmp_file.name
-        plt.savefig(tmp_path, dpi=150, bbox_inches='tight', facecolor='white')
-        plt.close(fig)
-
-        return tmp_path
+        # Crear radar chart (o reutilizarlo de la caché por contenido)
+        return BytesIO(radar_png('scout_individual', params, values, dibujar))
 
     except Exception as e:
         print(f"❌ Error creando radar chart: {e}")
@@ -2052,33 +1770,12 @@ def generar_pdf_profesional(informe_data, datos_wyscout=None, user_info=None, to
         if pos_principal:
             posicion = pos_principal
         
-        # Ruta del logo
-        logo_path = os.path.join('C:\\Users\\manue\\OneDrive\\Escritorio\\WebScouting\\assets\\images\\identidad_MPR_1.png')
-        
-        # === CREAR PDF ===
-        pdf = FPDF()
-        pdf.set_auto_page_break(auto=True, margin=15)
+        # Logo, cabecera y pies salen de la plantilla compartida
+        plantilla = obtener_plantilla_pdf()
         
         # ==================== PÁGINA 1: PRESENTACIÓN + RADAR ====================
-        pdf.add_page()
-        
-        # Logo en esquina superior derecha
-        if logo_path and os.path.exists(logo_path):
-            try:
-                pdf.image(logo_path, x=185, y=10, w=18)
-            except:
-                pass
-        
-        # Header compacto
-        pdf.set_font('Helvetica', 'B', 24)
-        pdf.set_text_color(36, 40, 42)
-        pdf.cell(0, 15, 'INFORME DE SCOUTING', 0, 1, 'C')
-        
-        # Línea decorativa
-        pdf.set_draw_color(220, 220, 220)
-        pdf.set_line_width(0.4)
-        pdf.line(20, pdf.get_y(), 190, pdf.get_y())
-        pdf.ln(8)
+        pdf = plantilla.nuevo_fpdf('INFORME DE SCOUTING', tamano_titulo=24, alto_titulo=15, ancho_logo=18,
+                                   color_linea=(220, 220, 220), grosor_linea=0.4)
         
         # === SECCIÓN SUPERIOR: FOTO + DATOS ===
         y_top = pdf.get_y() + 5
@@ -2091,33 +1788,11 @@ def generar_pdf_profesional(informe_data, datos_wyscout=None, user_info=None, to
 
         if url_foto_pdf:
             try:
-                response = requests.get(url_foto_pdf, timeout=5)
-                if response.status_code == 200:
-                    img = Image.open(BytesIO(response.content))
-
-                    # Convertir a cuadrada si hace falta
-                    ancho, alto = img.size
-                    if ancho != alto:
-                        lado = min(ancho, alto)
-                        left = (ancho - lado) // 2
-                        top = (alto - lado) // 2
-                        img = img.crop((left, top, left + lado, top + lado))
-                    
-                    if img.format == "PNG":
-                        img = img.convert("RGB")
-                    
-                    fd, temp_path = tempfile.mkstemp(suffix='.jpg')
-                    os.close(fd)
-                    
-                    img.save(temp_path, 'JPEG', quality=95)
-                    
-                    pdf.image(temp_path, x=x_foto, y=y_top, w=ancho_foto, h=ancho_foto)
+                # Recorte cuadrado centrado en JPEG desde la caché de imágenes
+                foto = imagen_buffer(url_foto_pdf)
+                if foto is not None:
+                    pdf.image(foto, x=x_foto, y=y_top, w=ancho_foto, h=ancho_foto)
                     foto_mostrada = True
-
-                    try:
-                        os.unlink(temp_path)
-                    except:
-                        pass
             except Exception as e:
                 print(f"⚠️ Error con foto: {e}")
         
@@ -2226,7 +1901,7 @@ def generar_pdf_profesional(informe_data, datos_wyscout=None, user_info=None, to
         # PRIORIDAD 1: Datos Wyscout REALES (no BeSoccer)
         if datos_wyscout and not datos_wyscout.get('es_besoccer', False):
             print("📊 Usando datos Wyscout reales para radar")
-            radar_path = crear_radar_chart_jugador(
+            imagen_radar = crear_radar_chart_jugador(
                 datos_wyscout=datos_wyscout,
                 nombre_jugador=informe_data['jugador_nombre'],
                 equipo_jugador=informe_data['equipo'],
@@ -2235,7 +1910,7 @@ def generar_pdf_profesional(informe_data, datos_wyscout=None, user_info=None, to
         else:
             # PRIORIDAD 2: Siempre usar el sistema mejorado con TODOS los informes
             print(f"📊 Usando evaluaciones del scout ({len(todos_informes_para_radar)} informes)")
-            radar_path = crear_radar_chart_jugador(
+            imagen_radar = crear_radar_chart_jugador(
                 datos_wyscout=None,
                 nombre_jugador=informe_data['jugador_nombre'],
                 equipo_jugador=informe_data['equipo'],
@@ -2243,26 +1918,16 @@ def generar_pdf_profesional(informe_data, datos_wyscout=None, user_info=None, to
             )
         
         # Insertar radar en PDF
-        if radar_path and os.path.exists(radar_path):
+        if imagen_radar:
             ancho_radar = 150
             x_radar = (pdf.w - ancho_radar) / 2
-            pdf.image(radar_path, x=x_radar, y=pdf.get_y(), w=ancho_radar)
+            pdf.image(imagen_radar, x=x_radar, y=pdf.get_y(), w=ancho_radar)
             pdf.set_y(pdf.get_y() + ancho_radar + 15)
-            
-            # Limpiar archivo temporal
-            try:
-                os.unlink(radar_path)
-            except:
-                pass
         
         # ==================== PÁGINA 2: EVALUACIÓN + ANÁLISIS IA ====================
         pdf.add_page()
         # Logo
-        try:
-            if os.path.exists(logo_path):
-                pdf.image(logo_path, x=175, y=270, w=20)
-        except:
-            pass
+        plantilla.logo_pie(pdf)
         
         # Header
         pdf.set_font('Helvetica', 'B', 16)
@@ -2393,11 +2058,7 @@ def generar_pdf_profesional(informe_data, datos_wyscout=None, user_info=None, to
             if pdf.get_y() + espacio_necesario > 270:
                 pdf.add_page()
                 # Logo en nueva página
-                try:
-                    if os.path.exists(logo_path):
-                        pdf.image(logo_path, x=175, y=270, w=20)
-                except:
-                    pass
+                plantilla.logo_pie(pdf)
                 pdf.ln(10)
             
             # Llamar a la nueva función de análisis IA
@@ -2417,11 +2078,7 @@ def generar_pdf_profesional(informe_data, datos_wyscout=None, user_info=None, to
         
         if espacio_disponible < espacio_para_recomendacion:
             pdf.add_page()
-            try:
-                if os.path.exists(logo_path):
-                    pdf.image(logo_path, x=175, y=270, w=20)
-            except:
-                pass
+            plantilla.logo_pie(pdf)
             pdf.set_y(120)
         else:
             pdf.set_y(max(pdf.get_y() + 15, 210))
@@ -2459,16 +2116,8 @@ def generar_pdf_profesional(informe_data, datos_wyscout=None, user_info=None, to
         fecha_actual = datetime.now().strftime("%d/%m/%Y")
         pdf.cell(0, 5, f"Scout: {scout_nombre} | {fecha_actual}", 0, 1, 'C')   
 
-        # === GUARDAR PDF ===
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as tmp_file:
-            tmp_path = tmp_file.name
-        
-        pdf.output(tmp_path)
-        
-        with open(tmp_path, 'rb') as f:
-            pdf_bytes = f.read()
-        
-        os.unlink(tmp_path)
+        # === PDF EN MEMORIA ===
+        pdf_bytes = bytes(pdf.output())
         
         print("✅ PDF v3 (JSON) generado exitosamente")
         return pdf_bytes, "application/pdf", "pdf"
@@ -2982,6 +2631,48 @@ try:
                             import traceback
                             traceback.print_exc()
 
+        # === DOSSIER: VARIOS INFORMES EN UNA SOLA DESCARGA ===
+        with st.expander("📦 Exportar dossier (varios informes)", expanded=False):
+            ids_dossier = st.multiselect(
+                "📋 Informes del dossier:",
+                options=df_filtrado['id'].tolist(),
+                default=df_filtrado['id'].tolist(),
+                format_func=lambda i: opciones_pdf[df_filtrado['id'].tolist().index(i)],
+                key="selector_dossier"
+            )
+            formatos_dossier = [FORMATO_ZIP, FORMATO_PDF] if PYPDF_DISPONIBLE else [FORMATO_ZIP]
+            formato_dossier = st.radio(
+                "Formato:",
+                formatos_dossier,
+                format_func=lambda f: "ZIP (un PDF por informe)" if f == FORMATO_ZIP else "PDF único",
+                horizontal=True,
+                key="formato_dossier"
+            )
+            
+            if st.button("📦 Generar dossier", use_container_width=True, disabled=not ids_dossier):
+                barra = st.progress(0.0, text="Preparando informes...")
+                
+                def actualizar_progreso(hechos, total, informe):
+                    barra.progress(hechos / total, text=f"📄 {hechos}/{total} - {informe.get('jugador_nombre', '')}")
+                
+                try:
+                    resumen = exportar_informes(ids_dossier, formato_dossier, progreso=actualizar_progreso)
+                    if resumen['fallidos']:
+                        st.warning(f"⚠️ {len(resumen['fallidos'])} informes no se pudieron generar: "
+                                   f"{', '.join(f'#{i}' for i, _ in resumen['fallidos'])}")
+                    if resumen['generados']:
+                        st.download_button(
+                            label=f"📥 Descargar dossier ({resumen['generados']} informes)",
+                            data=resumen['contenido'],
+                            file_name=f"Dossier_{datetime.now().strftime('%Y-%m-%d')}.{resumen['formato']}",
+                            mime="application/zip" if resumen['formato'] == FORMATO_ZIP else "application/pdf",
+                            use_container_width=True,
+                            key="download_dossier"
+                        )
+                        st.success(f"✅ Dossier generado en {resumen['segundos']:.1f}s")
+                except Exception as e:
+                    st.error(f"❌ Error generando el dossier: {str(e)}")
+
     # Separador visual
     st.markdown("---")
 
@@ -3062,27 +2753,21 @@ try:
                     info_j1 = df_posicion[df_posicion['jugador_nombre'] == jugador1].iloc[0]
                     info_j2 = df_posicion[df_posicion['jugador_nombre'] == jugador2].iloc[0]
                     
-                    # Extraer métricas del JSON
-                    metricas_j1 = info_j1.get('metricas', {})
-                    metricas_j2 = info_j2.get('metricas', {})
+                    # Promedios por categoría de ambos informes (consulta agrupada en partidos.db)
+                    conn_metricas = conectar(partido_model.db_path)
+                    try:
+                        comparacion = comparar_informes(conn_metricas, [int(info_j1['id']), int(info_j2['id'])])
+                    finally:
+                        conn_metricas.close()
                     
                     # Comparación por categorías
                     st.markdown("##### Comparación por Categorías")
                     
-                    categorias = ['tecnicos', 'tacticos', 'fisicos', 'mentales']
-                    
                     # Crear DataFrame para comparación
                     data_comp = []
                     
-                    for cat in categorias:
-                        prom_j1 = 0
-                        prom_j2 = 0
-                        
-                        if isinstance(metricas_j1, dict) and 'promedios' in metricas_j1:
-                            prom_j1 = metricas_j1['promedios'].get(cat, 0)
-                        
-                        if isinstance(metricas_j2, dict) and 'promedios' in metricas_j2:
-                            prom_j2 = metricas_j2['promedios'].get(cat, 0)
+                    for cat in CATEGORIAS:
+                        prom_j1, prom_j2 = comparacion[cat]
                         
                         data_comp.append({
                             'Categoría': cat.title().rstrip('s'),
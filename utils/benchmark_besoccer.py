@@ -0,0 +1,263 @@
+# utils/benchmark_besoccer.py
+"""
+Benchmark del scraper de BeSoccer sobre fixtures HTML guardados (sin red).
+
+1. Parseo: tiempo de parseo + extracción por tipo de página con el método
+   original (árbol completo con html.parser) y con la capa de
+   `utils.besoccer_parser` (lxml + XPath y el respaldo html.parser +
+   SoupStrainer), comprobando que la salida es idéntica.
+2. Memoria: pico de memoria asignada (tracemalloc) por página.
+3. Jornada: ingesta completa de una fecha reproduciendo los fixtures
+   (livescore, alineaciones y perfiles en paralelo y volcado en una
+   jugadores.db temporal con procesar_alineaciones_completas).
+
+Uso:
+    python -m utils.benchmark_besoccer [--fixtures DIR] [--repeticiones N]
+                                       [--fecha YYYY-MM-DD] [--sin-jornada]
+"""
+
+import io
+import os
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+import contextlib
+import tracemalloc
+
+from bs4 import BeautifulSoup
+
+from common.database import cerrar_conexiones_hilo
+from utils.besoccer_cache import configurar_ruta_cache
+from utils.besoccer_fixtures import MODO_REPRODUCIR, activar_fixtures
+from utils.besoccer_parser import PARSER_HTML, soup_livescore, soup_alineaciones
+from utils.besoccer_scraper import BeSoccerScraper
+
+DIRECTORIO_FIXTURES = "data/fixtures_besoccer"
+REPETICIONES_POR_DEFECTO = 5
+FECHA_FIXTURES = "2025-03-15"
+
+
+def cargar_fixtures(directorio=DIRECTORIO_FIXTURES):
+    """{tipo: [(nombre, contenido)]} según el prefijo del fichero (livescore_, alineaciones_, perfil_)"""
+    fixtures = {}
+    for nombre in sorted(os.listdir(directorio)):
+        if not nombre.endswith('.html'):
+            continue
+        tipo = nombre.split('_', 1)[0]
+        with open(os.path.join(directorio, nombre), 'rb') as f:
+            fixtures.setdefault(tipo, []).append((nombre, f.read()))
+    return fixtures
+
+
+def extraer_livescore(scraper, soup):
+    """Partidos de una página de livescore (lo mismo que obtener_partidos_por_fecha)"""
+    table_matches = soup.find('div', id='tableMatches')
+    if not table_matches:
+        return []
+    return [scraper._extraer_partido_con_url_completa(link)
+            for link in table_matches.find_all('a', class_='match-link match-home')]
+
+
+def extraer_alineaciones(scraper, soup):
+    """Alineaciones de una página de partido (lo mismo que obtener_alineaciones_partido)"""
+    return scraper._extraer_con_metodo_panel(soup)
+
+
+def extraer_perfil(scraper, soup):
+    """Datos de una página de perfil (lo mismo que obtener_datos_perfil_jugador)"""
+    return scraper._extraer_datos_perfil(soup)
+
+
+def _soup_completo(contenido, parser=None):
+    # Los perfiles se siguen parseando completos con html.parser
+    return BeautifulSoup(contenido, 'html.parser')
+
+
+# tipo -> (parseo rápido, extractor)
+PAGINAS = {
+    'livescore': (soup_livescore, extraer_livescore),
+    'alineaciones': (soup_alineaciones, extraer_alineaciones),
+    'perfil': (_soup_completo, extraer_perfil),
+}
+
+
+def _medir(funcion, repeticiones):
+    """Mediana en milisegundos y último resultado"""
+    tiempos = []
+    resultado = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tiempos), resultado
+
+
+def comparar_parseo(fixtures, repeticiones=REPETICIONES_POR_DEFECTO):
+    """
+    Mide parseo + extracción por página con el método original y el nuevo.
+
+    Returns:
+        lista de dicts (tipo, fichero, kb, ms_original, ms_rapido, ms_respaldo,
+        aceleracion, identico)
+    """
+    scraper = BeSoccerScraper()
+    filas = []
+
+    for tipo, (parsear_rapido, extraer) in PAGINAS.items():
+        for nombre, contenido in fixtures.get(tipo, []):
+            # Los extractores imprimen trazas por jugador: se silencian en el benchmark
+            with contextlib.redirect_stdout(io.StringIO()):
+                ms_original, original = _medir(
+                    lambda: extraer(scraper, BeautifulSoup(contenido, 'html.parser')), repeticiones)
+                ms_rapido, rapido = _medir(
+                    lambda: extraer(scraper, parsear_rapido(contenido)), repeticiones)
+                ms_respaldo, respaldo = _medir(
+                    lambda: extraer(scraper, parsear_rapido(contenido, 'html.parser')), repeticiones)
+
+            filas.append({
+                'tipo': tipo,
+                'fichero': nombre,
+                'kb': len(contenido) / 1024,
+                'ms_original': ms_original,
+                'ms_rapido': ms_rapido,
+                'ms_respaldo': ms_respaldo,
+                'aceleracion': ms_original / ms_rapido if ms_rapido else float('inf'),
+                'identico': original == rapido == respaldo,
+            })
+
+    return filas
+
+
+def imprimir_comparacion(filas):
+    print(f"⏱️ Parseo + extracción (mediana), parser rápido: {PARSER_HTML}")
+    print(f"{'fichero':<32} {'KB':>6} {'original':>10} {'rápido':>10} {'respaldo':>10} {'x':>6}  salida")
+    for f in filas:
+        estado = "✅ idéntica" if f['identico'] else "❌ DISTINTA"
+        print(f"{f['fichero']:<32} {f['kb']:6.0f} {f['ms_original']:8.1f}ms {f['ms_rapido']:8.1f}ms "
+              f"{f['ms_respaldo']:8.1f}ms {f['aceleracion']:5.1f}x  {estado}")
+
+
+def _pico_memoria(funcion):
+    """Pico de memoria asignada (KB) durante la llamada"""
+    tracemalloc.start()
+    try:
+        funcion()
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return pico / 1024
+
+
+def medir_memoria(fixtures):
+    """Pico de memoria del parseo + extracción por página, original frente a rápido"""
+    scraper = BeSoccerScraper()
+    filas = []
+    for tipo, (parsear_rapido, extraer) in PAGINAS.items():
+        for nombre, contenido in fixtures.get(tipo, []):
+            with contextlib.redirect_stdout(io.StringIO()):
+                pico_original = _pico_memoria(lambda: extraer(scraper, BeautifulSoup(contenido, 'html.parser')))
+                pico_rapido = _pico_memoria(lambda: extraer(scraper, parsear_rapido(contenido)))
+            filas.append({'tipo': tipo, 'fichero': nombre,
+                          'kb_original': pico_original, 'kb_rapido': pico_rapido})
+    return filas
+
+
+def imprimir_memoria(filas):
+    print("\n💾 Pico de memoria (tracemalloc)")
+    print(f"{'fichero':<32} {'original':>12} {'rápido':>12}")
+    for f in filas:
+        print(f"{f['fichero']:<32} {f['kb_original']:10.0f}KB {f['kb_rapido']:10.0f}KB")
+
+
+def medir_jornada(directorio=DIRECTORIO_FIXTURES, fecha=FECHA_FIXTURES, incluir_perfiles=True):
+    """
+    Ingesta completa de una jornada reproduciendo fixtures, en un directorio
+    temporal (caché HTTP y jugadores.db vacías) para no tocar los datos reales.
+
+    Returns:
+        dict con tiempos por fase (s) y contadores
+    """
+    from models.jugador_model import JugadorModel
+    from utils.db_helpers import procesar_alineaciones_completas
+
+    directorio = os.path.abspath(directorio)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta_jugadores = os.path.join(tmp, 'jugadores.db')
+        try:
+            configurar_ruta_cache(os.path.join(tmp, 'besoccer_cache.db'))
+            scraper, scraper_livescore = activar_fixtures(directorio, MODO_REPRODUCIR)
+            JugadorModel(ruta_jugadores).init_database()
+
+            with contextlib.redirect_stdout(io.StringIO()):
+                inicio = time.perf_counter()
+                partidos = scraper_livescore.buscar_partidos_en_fecha(fecha)
+                t_livescore = time.perf_counter()
+
+                resumen = scraper.precargar_jornada(fecha, partidos, incluir_perfiles=incluir_perfiles)
+                t_descargas = time.perf_counter()
+
+                jugadores = 0
+                for p in partidos:
+                    alineaciones = scraper.obtener_alineaciones_partido(
+                        p['match_id'], p['equipo_local'], p['equipo_visitante'], fecha)
+                    if not alineaciones.get('encontrado'):
+                        continue
+                    partido_data = {
+                        'id': f"livescore_{p['match_id']}",
+                        'fecha': fecha,
+                        'equipo_local': p['equipo_local'],
+                        'equipo_visitante': p['equipo_visitante'],
+                        'escudo_local': p.get('escudo_local', ''),
+                        'escudo_visitante': p.get('escudo_visitante', ''),
+                        'besoccer_id': p['match_id'],
+                    }
+                    jugadores += procesar_alineaciones_completas(
+                        partido_data, alineaciones['alineacion_local'],
+                        alineaciones['alineacion_visitante'], 'benchmark', db_path=ruta_jugadores)
+                t_ingesta = time.perf_counter()
+        finally:
+            cerrar_conexiones_hilo()
+            configurar_ruta_cache(None)
+
+    return {
+        **resumen,
+        'jugadores': jugadores,
+        's_livescore': t_livescore - inicio,
+        's_descargas': t_descargas - t_livescore,
+        's_ingesta': t_ingesta - t_descargas,
+        's_total': t_ingesta - inicio,
+    }
+
+
+def imprimir_jornada(r, fecha):
+    print(f"\n⚽ Jornada {fecha} reproducida desde fixtures")
+    print(f"   {r['partidos']} partidos, {r['alineaciones']} alineaciones, "
+          f"{r['perfiles']} perfiles, {r['jugadores']} jugadores volcados")
+    print(f"   livescore {r['s_livescore']:.2f}s | alineaciones y perfiles {r['s_descargas']:.2f}s | "
+          f"ingesta {r['s_ingesta']:.2f}s | total {r['s_total']:.2f}s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark del scraper de BeSoccer sobre fixtures")
+    parser.add_argument('--fixtures', default=DIRECTORIO_FIXTURES)
+    parser.add_argument('--repeticiones', type=int, default=REPETICIONES_POR_DEFECTO)
+    parser.add_argument('--fecha', default=FECHA_FIXTURES, help="fecha del livescore grabado")
+    parser.add_argument('--sin-jornada', action='store_true', help="omitir la ingesta completa")
+    args = parser.parse_args(argv)
+
+    fixtures = cargar_fixtures(args.fixtures)
+    filas = comparar_parseo(fixtures, args.repeticiones)
+    imprimir_comparacion(filas)
+    imprimir_memoria(medir_memoria(fixtures))
+
+    if not args.sin_jornada:
+        imprimir_jornada(medir_jornada(args.fixtures, args.fecha), args.fecha)
+
+    return 0 if all(f['identico'] for f in filas) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
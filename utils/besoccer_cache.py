@@ -0,0 +1,368 @@
+# utils/besoccer_cache.py
+"""
+Caché HTTP en disco para el scraper de BeSoccer.
+
+Guarda el HTML descargado por URL en data/besoccer_cache.db (comprimido
+con zlib) con una caducidad por tipo de recurso, de modo que sobrevive a
+los reruns de Streamlit y a los reinicios del proceso:
+- livescore: páginas de partidos del día (cambian durante la jornada)
+- perfil: perfiles de jugadores (cambian poco)
+- alineaciones: alineaciones de partidos no terminados
+- alineaciones_finalizado: alineaciones de partidos terminados (permanentes)
+
+Junto al HTML se guardan los validadores de la respuesta (ETag,
+Last-Modified) y la huella del fragmento que usa el scraper, para que al
+caducar una entrada se pueda revalidar con una petición condicional y
+detectar si la página ha cambiado.
+
+En la misma base de datos se guarda el índice de partidos (match_id -> URL
+completa, equipos, fecha y escudos) que se rellena al leer el livescore.
+"""
+
+import os
+import time
+import zlib
+import sqlite3
+import logging
+import threading
+
+from common.database import conectar, asegurar_columna, aplicar_migraciones
+
+logger = logging.getLogger(__name__)
+
+RUTA_CACHE_POR_DEFECTO = "data/besoccer_cache.db"
+
+# Caducidad en segundos por tipo de recurso (None = no caduca)
+TTL_POR_TIPO = {
+    'livescore': 5 * 60,
+    'livescore_pasado': 24 * 3600,
+    'perfil': 7 * 24 * 3600,
+    'alineaciones': 30 * 60,
+    'alineaciones_finalizado': None,
+}
+TTL_POR_DEFECTO = 30 * 60
+
+# Las entradas caducadas se conservan un tiempo para revalidarlas
+RETENCION_CADUCADAS = 24 * 3600
+
+
+def _migracion_validadores(conn):
+    asegurar_columna(conn, 'respuestas', 'etag', 'TEXT')
+    asegurar_columna(conn, 'respuestas', 'last_modified', 'TEXT')
+    asegurar_columna(conn, 'respuestas', 'huella', 'TEXT')
+
+
+def _migracion_resultados_indice(conn):
+    asegurar_columna(conn, 'partidos_indice', 'resultado_local', 'INTEGER')
+    asegurar_columna(conn, 'partidos_indice', 'resultado_visitante', 'INTEGER')
+
+
+MIGRACIONES_CACHE = [
+    (1, "validadores HTTP y huella del fragmento", _migracion_validadores),
+    (2, "resultados en partidos_indice", _migracion_resultados_indice),
+]
+
+
+def inicializar_base_datos(db_path):
+    """
+    Crea las tablas de besoccer_cache.db (respuestas y partidos_indice) y
+    aplica las migraciones pendientes. La usan la caché HTTP y el índice de
+    partidos, que comparten fichero y versión de esquema.
+    """
+    directorio = os.path.dirname(db_path)
+    if directorio:
+        os.makedirs(directorio, exist_ok=True)
+
+    conn = conectar(db_path)
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS respuestas (
+            url TEXT PRIMARY KEY,
+            tipo TEXT,
+            contenido BLOB NOT NULL,
+            guardado REAL NOT NULL,
+            expira REAL
+        )
+    ''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_respuestas_expira ON respuestas (expira)")
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS partidos_indice (
+            match_id TEXT PRIMARY KEY,
+            url_completa TEXT NOT NULL,
+            fecha TEXT,
+            hora TEXT,
+            estado TEXT,
+            equipo_local TEXT,
+            equipo_visitante TEXT,
+            escudo_local TEXT,
+            escudo_visitante TEXT,
+            actualizado REAL NOT NULL
+        )
+    ''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_partidos_indice_fecha ON partidos_indice (fecha)")
+    conn.commit()
+    aplicar_migraciones(conn, MIGRACIONES_CACHE, 'besoccer_cache.db')
+    conn.close()
+
+
+class CacheHTTP:
+    """Respuestas HTTP cacheadas por URL en SQLite"""
+
+    def __init__(self, db_path=RUTA_CACHE_POR_DEFECTO):
+        self.db_path = db_path
+        self.aciertos = 0
+        self.fallos = 0
+        self._lock = threading.Lock()
+        self.init_database()
+
+    def init_database(self):
+        inicializar_base_datos(self.db_path)
+        self.purgar_expirados()
+
+    def obtener(self, url):
+        """HTML cacheado de la URL (bytes) o None si no está o ha caducado"""
+        try:
+            conn = conectar(self.db_path)
+            fila = conn.execute(
+                "SELECT contenido, expira FROM respuestas WHERE url = ?", (url,)
+            ).fetchone()
+            conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Error leyendo caché HTTP: {e}")
+            return None
+
+        if fila is None or (fila[1] is not None and fila[1] < time.time()):
+            with self._lock:
+                self.fallos += 1
+            return None
+
+        with self._lock:
+            self.aciertos += 1
+        return zlib.decompress(fila[0])
+
+    def obtener_entrada(self, url):
+        """
+        Entrada cacheada de la URL aunque haya caducado (o None): dict con
+        contenido, tipo, expira, vigente, etag, last_modified y huella
+        """
+        try:
+            conn = conectar(self.db_path)
+            fila = conn.execute('''
+                SELECT contenido, tipo, expira, etag, last_modified, huella
+                FROM respuestas WHERE url = ?
+            ''', (url,)).fetchone()
+            conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Error leyendo caché HTTP: {e}")
+            return None
+
+        if fila is None:
+            return None
+        contenido, tipo, expira, etag, last_modified, huella = fila
+        return {
+            'contenido': zlib.decompress(contenido),
+            'tipo': tipo,
+            'expira': expira,
+            'vigente': expira is None or expira >= time.time(),
+            'etag': etag,
+            'last_modified': last_modified,
+            'huella': huella,
+        }
+
+    def vigente(self, url):
+        """True si la URL está cacheada y sin caducar (sin leer el contenido)"""
+        try:
+            conn = conectar(self.db_path)
+            fila = conn.execute("SELECT expira FROM respuestas WHERE url = ?", (url,)).fetchone()
+            conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Error leyendo caché HTTP: {e}")
+            return False
+        return fila is not None and (fila[0] is None or fila[0] >= time.time())
+
+    def registrar_acierto(self, acierto=True):
+        with self._lock:
+            if acierto:
+                self.aciertos += 1
+            else:
+                self.fallos += 1
+
+    def _expiracion(self, tipo, ttl=None):
+        if ttl is None:
+            ttl = TTL_POR_TIPO.get(tipo, TTL_POR_DEFECTO)
+        return None if ttl is None else time.time() + ttl
+
+    def guardar(self, url, contenido, tipo, ttl=None, etag=None, last_modified=None, huella=None):
+        """Guarda el HTML de una URL; `ttl` por defecto según el tipo"""
+        try:
+            conn = conectar(self.db_path)
+            conn.execute('''
+                INSERT OR REPLACE INTO respuestas (
+                    url, tipo, contenido, guardado, expira, etag, last_modified, huella
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (url, tipo, zlib.compress(contenido), time.time(), self._expiracion(tipo, ttl),
+                  etag, last_modified, huella))
+            conn.commit()
+            conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Error guardando en caché HTTP: {e}")
+
+    def renovar(self, url, tipo, ttl=None):
+        """Alarga la caducidad de una URL revalidada sin cambios (304 o misma huella)"""
+        try:
+            conn = conectar(self.db_path)
+            conn.execute("UPDATE respuestas SET expira = ?, tipo = ? WHERE url = ?",
+                         (self._expiracion(tipo, ttl), tipo, url))
+            conn.commit()
+            conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Error actualizando caché HTTP: {e}")
+
+    def marcar_permanente(self, url, tipo):
+        """Quita la caducidad de una URL ya cacheada (p. ej. partido terminado)"""
+        try:
+            conn = conectar(self.db_path)
+            conn.execute("UPDATE respuestas SET expira = NULL, tipo = ? WHERE url = ?", (tipo, url))
+            conn.commit()
+            conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Error actualizando caché HTTP: {e}")
+
+    def purgar_expirados(self):
+        """Borra las respuestas caducadas hace más de RETENCION_CADUCADAS"""
+        try:
+            conn = conectar(self.db_path)
+            borradas = conn.execute(
+                "DELETE FROM respuestas WHERE expira IS NOT NULL AND expira < ?",
+                (time.time() - RETENCION_CADUCADAS,)
+            ).rowcount
+            conn.commit()
+            conn.close()
+            if borradas:
+                logger.info(f"🗑️ Caché HTTP: {borradas} respuestas caducadas eliminadas")
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Error purgando caché HTTP: {e}")
+
+    def limpiar(self):
+        """Vacía la caché"""
+        conn = conectar(self.db_path)
+        conn.execute("DELETE FROM respuestas")
+        conn.commit()
+        conn.close()
+
+    def estadisticas(self):
+        conn = conectar(self.db_path)
+        por_tipo = dict(conn.execute("SELECT tipo, COUNT(*) FROM respuestas GROUP BY tipo").fetchall())
+        conn.close()
+        return {'aciertos': self.aciertos, 'fallos': self.fallos, 'por_tipo': por_tipo}
+
+
+_cache_http = None
+_cache_lock = threading.Lock()
+
+
+def obtener_cache_http(db_path=RUTA_CACHE_POR_DEFECTO):
+    """Caché HTTP compartida por todo el proceso"""
+    global _cache_http
+    with _cache_lock:
+        if _cache_http is None:
+            _cache_http = CacheHTTP(db_path)
+        return _cache_http
+
+
+# ==========================================
+# ÍNDICE DE PARTIDOS DEL LIVESCORE
+# ==========================================
+
+class IndicePartidos:
+    """match_id -> URL completa y datos del partido, persistente en disco"""
+
+    def __init__(self, db_path=RUTA_CACHE_POR_DEFECTO):
+        self.db_path = db_path
+        self.init_database()
+
+    def init_database(self):
+        inicializar_base_datos(self.db_path)
+
+    def registrar(self, partidos, fecha_str=None):
+        """
+        Guarda los partidos extraídos de una página de livescore (dicts con
+        match_id y url_completa). Devuelve cuántos se han registrado.
+        """
+        ahora = time.time()
+        filas = [
+            (p['match_id'], p['url_completa'], p.get('fecha', fecha_str), p.get('hora'), p.get('estado'),
+             p.get('equipo_local'), p.get('equipo_visitante'),
+             p.get('escudo_local'), p.get('escudo_visitante'),
+             p.get('resultado_local'), p.get('resultado_visitante'), ahora)
+            for p in partidos if p.get('match_id') and p.get('url_completa')
+        ]
+        if not filas:
+            return 0
+
+        try:
+            conn = conectar(self.db_path)
+            conn.executemany('''
+                INSERT OR REPLACE INTO partidos_indice (
+                    match_id, url_completa, fecha, hora, estado, equipo_local,
+                    equipo_visitante, escudo_local, escudo_visitante,
+                    resultado_local, resultado_visitante, actualizado
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', filas)
+            conn.commit()
+            conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Error guardando el índice de partidos: {e}")
+            return 0
+        return len(filas)
+
+    def obtener(self, match_id):
+        """Datos indexados de un partido (dict) o None"""
+        try:
+            conn = conectar(self.db_path)
+            conn.row_factory = sqlite3.Row
+            fila = conn.execute(
+                "SELECT * FROM partidos_indice WHERE match_id = ?", (str(match_id),)
+            ).fetchone()
+            conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Error leyendo el índice de partidos: {e}")
+            return None
+        return dict(fila) if fila else None
+
+    def url_completa(self, match_id):
+        partido = self.obtener(match_id)
+        return partido['url_completa'] if partido else None
+
+    def por_fecha(self, fecha_str):
+        """Partidos indexados de una fecha"""
+        conn = conectar(self.db_path)
+        conn.row_factory = sqlite3.Row
+        filas = conn.execute(
+            "SELECT * FROM partidos_indice WHERE fecha = ? ORDER BY hora", (fecha_str,)
+        ).fetchall()
+        conn.close()
+        return [dict(f) for f in filas]
+
+
+_indice_partidos = None
+
+
+def obtener_indice_partidos(db_path=RUTA_CACHE_POR_DEFECTO):
+    """Índice de partidos compartido por todo el proceso"""
+    global _indice_partidos
+    with _cache_lock:
+        if _indice_partidos is None:
+            _indice_partidos = IndicePartidos(db_path)
+        return _indice_partidos
+
+
+def configurar_ruta_cache(db_path):
+    """
+    Cambia la base de datos de la caché HTTP y del índice de partidos del
+    proceso (p. ej. para reproducir fixtures sin tocar la caché real). Con
+    None se vuelve a la ruta por defecto, que se abre al usarla.
+    """
+    global _cache_http, _indice_partidos
+    with _cache_lock:
+        _cache_http = CacheHTTP(db_path) if db_path else None
+        _indice_partidos = IndicePartidos(db_path) if db_path else None
@@ -0,0 +1,193 @@
+# utils/besoccer_fixtures.py
+"""
+Modo grabación / reproducción del scraper de BeSoccer.
+
+`TransporteFixtures` es un adaptador de requests que se monta en la sesión
+del scraper:
+- grabar: hace la petición real y guarda el HTML en el directorio de
+  fixtures (livescore_<fecha>.html, alineaciones_<match_id>.html,
+  perfil_<slug>.html), anotándolo en indice.json
+- reproducir: sirve las respuestas desde los fixtures sin tocar la red;
+  una URL sin fixture se comporta como un error de conexión
+
+indice.json tiene dos secciones: "urls" (URL exacta -> fichero) y
+"patrones" (lista de [patrón fnmatch, fichero]) para reutilizar una misma
+página en muchas URLs, p. ej. los perfiles de una jornada entera.
+
+Se activa con `activar_fixtures(directorio, modo)` o con la variable de
+entorno BESOCCER_FIXTURES="reproducir:<directorio>" / "grabar:<directorio>".
+"""
+
+import os
+import re
+import json
+import logging
+import threading
+from fnmatch import fnmatch
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+logger = logging.getLogger(__name__)
+
+MODO_GRABAR = 'grabar'
+MODO_REPRODUCIR = 'reproducir'
+VARIABLE_ENTORNO = 'BESOCCER_FIXTURES'
+FICHERO_INDICE = 'indice.json'
+
+
+def nombre_fixture(url):
+    """Nombre de fichero para la página de una URL según su tipo"""
+    ruta = urlparse(url).path.strip('/')
+    partes = ruta.split('/')
+
+    if partes and partes[0] == 'livescore':
+        return f"livescore_{partes[1] if len(partes) > 1 else 'hoy'}.html"
+    if partes and partes[-1] == 'alineaciones':
+        match_id = next((p for p in partes if p.isdigit() and len(p) >= 8), None)
+        if match_id:
+            return f"alineaciones_{match_id}.html"
+    if partes and partes[0] == 'jugador' and len(partes) > 1:
+        return f"perfil_{partes[1]}.html"
+
+    return 'pagina_' + re.sub(r'[^a-zA-Z0-9_-]+', '_', ruta or 'inicio') + '.html'
+
+
+class TransporteFixtures(HTTPAdapter):
+    """Adaptador de requests que graba o reproduce páginas desde disco"""
+
+    def __init__(self, directorio, modo=MODO_REPRODUCIR, **kwargs):
+        super().__init__(**kwargs)
+        if modo not in (MODO_GRABAR, MODO_REPRODUCIR):
+            raise ValueError(f"Modo de fixtures no soportado: {modo}")
+        self.directorio = directorio
+        self.modo = modo
+        self._lock = threading.Lock()
+        self._indice = self._cargar_indice()
+
+    # ------------------------------------------------------------------
+    # Índice
+    # ------------------------------------------------------------------
+
+    def _ruta_indice(self):
+        return os.path.join(self.directorio, FICHERO_INDICE)
+
+    def _cargar_indice(self):
+        try:
+            with open(self._ruta_indice(), 'r', encoding='utf-8') as f:
+                indice = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            indice = {}
+        indice.setdefault('urls', {})
+        indice.setdefault('patrones', [])
+        return indice
+
+    def _guardar_indice(self):
+        os.makedirs(self.directorio, exist_ok=True)
+        with open(self._ruta_indice(), 'w', encoding='utf-8') as f:
+            json.dump(self._indice, f, ensure_ascii=False, indent=2, sort_keys=True)
+
+    def fichero_para(self, url):
+        """Fichero que responde a una URL (o None)"""
+        fichero = self._indice['urls'].get(url)
+        if fichero:
+            return fichero
+        for patron, fichero in self._indice['patrones']:
+            if fnmatch(url, patron):
+                return fichero
+        return None
+
+    # ------------------------------------------------------------------
+    # Transporte
+    # ------------------------------------------------------------------
+
+    def send(self, request, **kwargs):
+        if self.modo == MODO_GRABAR:
+            respuesta = super().send(request, **kwargs)
+            if respuesta.status_code == 200:
+                self._grabar(request.url, respuesta.content)
+            return respuesta
+        return self._reproducir(request)
+
+    def _grabar(self, url, contenido):
+        fichero = nombre_fixture(url)
+        with self._lock:
+            os.makedirs(self.directorio, exist_ok=True)
+            with open(os.path.join(self.directorio, fichero), 'wb') as f:
+                f.write(contenido)
+            self._indice['urls'][url] = fichero
+            self._guardar_indice()
+        logger.info(f"💾 Fixture grabado: {fichero}")
+
+    def _reproducir(self, request):
+        fichero = self.fichero_para(request.url)
+        if not fichero:
+            raise requests.exceptions.ConnectionError(
+                f"Sin fixture para {request.url}", request=request)
+
+        with open(os.path.join(self.directorio, fichero), 'rb') as f:
+            contenido = f.read()
+
+        respuesta = requests.Response()
+        respuesta.status_code = 200
+        respuesta._content = contenido
+        respuesta.headers = CaseInsensitiveDict({'Content-Type': 'text/html; charset=utf-8'})
+        respuesta.encoding = 'utf-8'
+        respuesta.url = request.url
+        respuesta.request = request
+        respuesta.reason = 'OK'
+        return respuesta
+
+
+def montar_transporte(session, transporte):
+    """Monta un TransporteFixtures ya creado en una sesión de requests"""
+    session.mount('https://', transporte)
+    session.mount('http://', transporte)
+    session.modo_fixtures = transporte.modo
+    return transporte
+
+
+def montar_fixtures(session, directorio, modo=MODO_REPRODUCIR):
+    """Monta el transporte de fixtures en una sesión de requests"""
+    return montar_transporte(session, TransporteFixtures(directorio, modo))
+
+
+_transporte_entorno = None
+_transporte_entorno_lock = threading.Lock()
+
+
+def transporte_desde_entorno():
+    """
+    Transporte de BESOCCER_FIXTURES="<modo>:<directorio>" o None si no está
+    definida. Es uno por proceso: todas las sesiones que lo montan graban
+    en el mismo índice.
+    """
+    global _transporte_entorno
+    valor = os.environ.get(VARIABLE_ENTORNO)
+    if not valor:
+        return None
+    with _transporte_entorno_lock:
+        if _transporte_entorno is None:
+            modo, _, directorio = valor.partition(':')
+            logger.info(f"🎞️ Scraper BeSoccer en modo {modo} con fixtures de {directorio}")
+            _transporte_entorno = TransporteFixtures(directorio, modo)
+        return _transporte_entorno
+
+
+def activar_fixtures(directorio, modo=MODO_REPRODUCIR):
+    """
+    Pone los scrapers de BeSoccer del proceso en modo grabación o
+    reproducción y vacía sus cachés en memoria.
+    """
+    from utils.besoccer_scraper import BeSoccerScraper, BeSoccerAlineacionesScraper
+
+    scraper = BeSoccerScraper()
+    scraper_livescore = BeSoccerAlineacionesScraper()
+    transporte = TransporteFixtures(directorio, modo)
+    scraper.usar_transporte(transporte)
+    scraper_livescore.usar_transporte(transporte)
+    scraper.limpiar_cache()
+    scraper_livescore._limpiar_caches_memoria()
+    return scraper, scraper_livescore
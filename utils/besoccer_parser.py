@@ -0,0 +1,119 @@
+# utils/besoccer_parser.py
+"""
+Capa de parseo HTML del scraper de BeSoccer.
+
+Las páginas de BeSoccer pesan cientos de KB (cabecera, menús, noticias,
+scripts) y de cada una solo se usa una parte: `#tableMatches` en el
+livescore y los paneles `panel-lineup` / `panel-bench` en las alineaciones.
+
+Con lxml instalado la página se parsea en C, se localiza esa parte con
+XPath y solo ese fragmento se convierte en BeautifulSoup para los
+extractores. Sin lxml se usa html.parser con un SoupStrainer equivalente.
+En ambos casos los extractores reciben el mismo subárbol y devuelven lo mismo
+que con la página completa.
+
+La huella (hash del fragmento) sirve para saber si una página ha cambiado
+en lo que importa aunque el servidor no mande ETag ni Last-Modified.
+"""
+
+import re
+import hashlib
+import logging
+
+from bs4 import BeautifulSoup, SoupStrainer
+from bs4.dammit import UnicodeDammit
+
+try:
+    import lxml.html
+    from lxml.etree import ParserError
+    PARSER_HTML = 'lxml'
+except ImportError:
+    lxml = None
+    PARSER_HTML = 'html.parser'
+
+logger = logging.getLogger(__name__)
+
+
+def _xpath_clase(clase):
+    return f'contains(concat(" ", normalize-space(@class), " "), " {clase} ")'
+
+
+# Partes que usan los extractores: (XPath para lxml, SoupStrainer de respaldo).
+# Durante el parseo el SoupStrainer compara la clase como cadena completa,
+# de ahí la expresión regular.
+FILTRO_LIVESCORE = (
+    '//div[@id="tableMatches"]',
+    SoupStrainer('div', id='tableMatches'),
+)
+FILTRO_ALINEACIONES = (
+    f'//div[{_xpath_clase("panel-lineup")} or {_xpath_clase("panel-bench")}]',
+    SoupStrainer('div', class_=re.compile(r'(^|\s)panel-(lineup|bench)(\s|$)')),
+)
+
+
+def _a_texto(contenido):
+    if isinstance(contenido, str):
+        return contenido
+    try:
+        return contenido.decode('utf-8')
+    except UnicodeDecodeError:
+        return UnicodeDammit(contenido, is_html=True).unicode_markup
+
+
+def _fragmento_lxml(contenido, xpath):
+    """HTML de los elementos que cumplen el XPath (sin repetir los anidados)"""
+    documento = lxml.html.document_fromstring(_a_texto(contenido))
+    elementos = documento.xpath(xpath)
+    seleccionados = set(elementos)
+    fragmentos = [
+        lxml.html.tostring(e, encoding='unicode', with_tail=False)
+        for e in elementos
+        if not any(ancestro in seleccionados for ancestro in e.iterancestors())
+    ]
+    return ''.join(fragmentos)
+
+
+def crear_soup(contenido, filtro=None, parser=None):
+    """
+    BeautifulSoup de una página limitado a la parte indicada por el filtro
+    (FILTRO_LIVESCORE, FILTRO_ALINEACIONES) o completo si no se pasa filtro.
+    Los `find` sobre el resultado funcionan igual que sobre la página
+    completa para los elementos de esa parte.
+    """
+    parser = parser or PARSER_HTML
+    if filtro is None:
+        return BeautifulSoup(contenido, parser)
+
+    xpath, strainer = filtro
+    if parser == 'lxml' and lxml is not None:
+        try:
+            return BeautifulSoup(_fragmento_lxml(contenido, xpath), 'lxml')
+        except (ParserError, ValueError) as e:
+            logger.debug(f"Parseo parcial con lxml no disponible, se usa SoupStrainer: {e}")
+
+    return BeautifulSoup(contenido, parser, parse_only=strainer)
+
+
+def soup_livescore(contenido, parser=None):
+    """Solo el bloque #tableMatches de una página de livescore"""
+    return crear_soup(contenido, FILTRO_LIVESCORE, parser)
+
+
+def soup_alineaciones(contenido, parser=None):
+    """Solo los paneles de titulares y suplentes de una página de alineaciones"""
+    return crear_soup(contenido, FILTRO_ALINEACIONES, parser)
+
+
+def huella_html(contenido, filtro=None):
+    """
+    Hash SHA-1 de la parte de la página indicada por el filtro (o de la
+    página completa). Sin lxml se usa la página completa.
+    """
+    if filtro is not None and lxml is not None:
+        try:
+            contenido = _fragmento_lxml(contenido, filtro[0])
+        except (ParserError, ValueError) as e:
+            logger.debug(f"Huella sobre la página completa: {e}")
+    if isinstance(contenido, str):
+        contenido = contenido.encode('utf-8')
+    return hashlib.sha1(contenido).hexdigest()
@@ -12,25 +12,288 @@ import json
 import time
 import os
 import re
+import threading
+from collections import namedtuple, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
 
-class BeSoccerScraper:
-    """Scraper optimizado con URLs correctas"""
+from requests.adapters import HTTPAdapter
+
+from utils.besoccer_cache import obtener_cache_http, obtener_indice_partidos
+from utils.besoccer_parser import (
+    FILTRO_LIVESCORE, FILTRO_ALINEACIONES, huella_html, soup_livescore, soup_alineaciones
+)
+from utils.besoccer_fixtures import MODO_REPRODUCIR, montar_transporte, transporte_desde_entorno
+
+# Descargas concurrentes (precarga de jornada y búsqueda en fechas cercanas)
+MAX_DESCARGAS_CONCURRENTES = 8
+INTERVALO_MINIMO_POR_HOST = 0.1  # segundos entre peticiones al mismo host
+# Entradas máximas de las cachés en memoria de cada scraper (LRU)
+MAX_ENTRADAS_CACHE = 1000
+MAX_PAGINAS_PROCESADAS = 2000
+MAX_URLS_PARTIDOS = 5000
+
+
+class LimitadorPorHost:
+    """Espacia las peticiones a un mismo host aunque se hagan desde varios hilos"""
+    
+    def __init__(self, intervalo_minimo=INTERVALO_MINIMO_POR_HOST):
+        self.intervalo_minimo = intervalo_minimo
+        self._siguiente = {}
+        self._lock = threading.Lock()
+    
+    def esperar(self, url):
+        host = urlparse(url).netloc
+        with self._lock:
+            ahora = time.monotonic()
+            turno = max(ahora, self._siguiente.get(host, 0.0))
+            self._siguiente[host] = turno + self.intervalo_minimo
+        if turno > ahora:
+            time.sleep(turno - ahora)
+
+
+_limitador = LimitadorPorHost()
+
+
+def _crear_sesion(transporte=None):
+    """
+    Sesión HTTP con cabeceras de navegador y pool para descargas concurrentes.
+    `transporte` (TransporteFixtures) sirve las páginas grabadas en lugar de la web.
+    """
+    session = requests.Session()
+    session.headers.update({
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+        'Accept-Language': 'es-ES,es;q=0.5',
+        'Accept-Encoding': 'gzip, deflate',
+        'Connection': 'keep-alive',
+    })
+    adaptador = HTTPAdapter(pool_connections=4, pool_maxsize=MAX_DESCARGAS_CONCURRENTES)
+    session.mount('https://', adaptador)
+    session.mount('http://', adaptador)
+    
+    # Fixtures grabados en lugar de la web, para pruebas y benchmarks
+    if transporte is not None:
+        montar_transporte(session, transporte)
+    return session
+
+
+def _tipo_livescore(fecha_str):
+    """Tipo de caché de una página de livescore (las de días pasados ya no cambian)"""
+    try:
+        if datetime.strptime(fecha_str, '%Y-%m-%d').date() < datetime.now().date():
+            return 'livescore_pasado'
+    except (TypeError, ValueError):
+        pass
+    return 'livescore'
+
+
+# Resultado de una descarga: `huella` identifica el fragmento útil de la página
+# y `validadores` son el ETag / Last-Modified de la respuesta
+Descarga = namedtuple('Descarga', ['contenido', 'desde_cache', 'huella', 'validadores'])
+
+
+def _validadores(origen):
+    return {'etag': origen.get('etag'), 'last_modified': origen.get('last_modified')}
+
+
+def _descargar_con_cache(session, url, tipo, timeout=10, cachear=True, filtro=None):
+    """
+    HTML de una URL pasando por la caché HTTP en disco.
+    
+    Si la entrada cacheada ha caducado se revalida con una petición
+    condicional (If-None-Match / If-Modified-Since): un 304 reutiliza el
+    HTML guardado. Si el servidor no da validadores, la huella del
+    fragmento `filtro` (FILTRO_LIVESCORE, FILTRO_ALINEACIONES) permite
+    saber si la página ha cambiado.
+    Lanza requests.exceptions.RequestException si la descarga falla.
+    
+    Returns:
+        Descarga(contenido, desde_cache, huella, validadores)
+    """
+    cache_http = obtener_cache_http()
+    entrada = cache_http.obtener_entrada(url)
+    if entrada and entrada['vigente']:
+        cache_http.registrar_acierto()
+        huella = entrada['huella'] or huella_html(entrada['contenido'], filtro)
+        return Descarga(entrada['contenido'], True, huella, _validadores(entrada))
+    cache_http.registrar_acierto(False)
+    
+    cabeceras = {}
+    if entrada and entrada['etag']:
+        cabeceras['If-None-Match'] = entrada['etag']
+    if entrada and entrada['last_modified']:
+        cabeceras['If-Modified-Since'] = entrada['last_modified']
+    
+    if getattr(session, 'modo_fixtures', None) != MODO_REPRODUCIR:
+        _limitador.esperar(url)
+    response = session.get(url, timeout=timeout, headers=cabeceras)
+    
+    if response.status_code == 304 and entrada:
+        print(f"♻️ Sin cambios (304): {url}")
+        cache_http.renovar(url, tipo)
+        huella = entrada['huella'] or huella_html(entrada['contenido'], filtro)
+        return Descarga(entrada['contenido'], True, huella, _validadores(entrada))
+    
+    response.raise_for_status()
+    validadores = {
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified'),
+    }
+    huella = huella_html(response.content, filtro)
+    if cachear:
+        cache_http.guardar(url, response.content, tipo, huella=huella, **validadores)
+    return Descarga(response.content, False, huella, validadores)
+
+
+class SesionPorHiloMixin:
+    """
+    Una requests.Session por hilo. Los scrapers son únicos por proceso y
+    descargan desde los hilos de la precarga, y una Session no es segura
+    entre hilos. Todas las sesiones comparten el transporte de fixtures.
+    """
+
+    def _iniciar_sesiones(self):
+        self._sesiones = threading.local()
+        self._generacion_sesiones = 0
+        self._transporte = transporte_desde_entorno()
+
+    @property
+    def session(self):
+        """Sesión HTTP del hilo actual (se crea la primera vez)"""
+        local = self._sesiones
+        if getattr(local, 'generacion', None) != self._generacion_sesiones:
+            local.session = _crear_sesion(self._transporte)
+            local.generacion = self._generacion_sesiones
+        return local.session
+
+    def usar_transporte(self, transporte):
+        """Monta un transporte de fixtures en las sesiones de todos los hilos"""
+        self._transporte = transporte
+        self._generacion_sesiones += 1
+
+
+class CacheMemoriaMixin:
+    """
+    Cachés en memoria de los scrapers, acotadas con LRU para que un proceso
+    de larga duración (con la precarga periódica) no crezca sin límite:
+    - `cache`: resultados con caducidad `cache_timeout`
+    - `paginas_procesadas`: URL -> (huella, resultado extraído), para no
+      volver a parsear una página sin cambios
+    - `cache_urls_partidos`: match_id -> URL completa del partido
+    - `partidos_finalizados`: match_ids vistos como terminados (sus
+      alineaciones ya no cambian)
+    """
+
+    def _iniciar_caches_memoria(self, cache_timeout):
+        self.cache = OrderedDict()
+        self.cache_timeout = cache_timeout
+        self.paginas_procesadas = OrderedDict()
+        self.cache_urls_partidos = OrderedDict()
+        self.partidos_finalizados = OrderedDict()
+        self._cache_memoria_lock = threading.Lock()
+
+    def _limpiar_caches_memoria(self):
+        with self._cache_memoria_lock:
+            self.cache.clear()
+            self.paginas_procesadas.clear()
+            self.cache_urls_partidos.clear()
+            self.partidos_finalizados.clear()
+
+    @staticmethod
+    def _acotar(diccionario, maximo):
+        while len(diccionario) > maximo:
+            diccionario.popitem(last=False)
+
+    def _leer_cache(self, cache_key):
+        """Datos guardados para la clave o None si no están o han caducado"""
+        with self._cache_memoria_lock:
+            entrada = self.cache.get(cache_key)
+            if entrada is None:
+                return None
+            if time.time() - entrada['timestamp'] > self.cache_timeout:
+                del self.cache[cache_key]
+                return None
+            self.cache.move_to_end(cache_key)
+            return entrada['data']
+
+    def _guardar_cache(self, cache_key, data):
+        """Guarda en cache"""
+        with self._cache_memoria_lock:
+            self.cache[cache_key] = {
+                'data': data,
+                'timestamp': time.time()
+            }
+            self.cache.move_to_end(cache_key)
+            self._acotar(self.cache, MAX_ENTRADAS_CACHE)
+
+    def _olvidar_cache(self, cache_key):
+        with self._cache_memoria_lock:
+            self.cache.pop(cache_key, None)
+
+    def _resultado_sin_cambios(self, url, huella):
+        """Lo extraído la última vez de la URL si su huella no ha cambiado (o None)"""
+        with self._cache_memoria_lock:
+            previo = self.paginas_procesadas.get(url)
+            if previo and huella and previo[0] == huella:
+                self.paginas_procesadas.move_to_end(url)
+                return previo[1]
+        return None
+
+    def _recordar_resultado(self, url, huella, resultado):
+        with self._cache_memoria_lock:
+            self.paginas_procesadas[url] = (huella, resultado)
+            self.paginas_procesadas.move_to_end(url)
+            self._acotar(self.paginas_procesadas, MAX_PAGINAS_PROCESADAS)
+
+    def _url_partido_en_cache(self, match_id):
+        """URL completa recordada para el partido o None"""
+        with self._cache_memoria_lock:
+            url = self.cache_urls_partidos.get(match_id)
+            if url is not None:
+                self.cache_urls_partidos.move_to_end(match_id)
+            return url
+
+    def _recordar_partido(self, match_id, url_completa=None, finalizado=False):
+        """Guarda la URL completa de un partido y si ya ha terminado"""
+        with self._cache_memoria_lock:
+            if url_completa:
+                self.cache_urls_partidos[match_id] = url_completa
+                self.cache_urls_partidos.move_to_end(match_id)
+                self._acotar(self.cache_urls_partidos, MAX_URLS_PARTIDOS)
+            if finalizado:
+                self.partidos_finalizados[match_id] = None
+                self.partidos_finalizados.move_to_end(match_id)
+                self._acotar(self.partidos_finalizados, MAX_URLS_PARTIDOS)
+
+    def _visto_finalizado(self, match_id):
+        with self._cache_memoria_lock:
+            return match_id in self.partidos_finalizados
+
+
+class BeSoccerScraper(SesionPorHiloMixin, CacheMemoriaMixin):
+    """Scraper optimizado con URLs correctas (instancia única por proceso)"""
+    _instance = None
+    _initialized = False
+    _lock = threading.Lock()
+    
+    def __new__(cls, *args, **kwargs):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = super().__new__(cls)
+        return cls._instance
+    
     def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-            'Accept-Language': 'es-ES,es;q=0.5',
-            'Accept-Encoding': 'gzip, deflate',
-            'Connection': 'keep-alive',
-        })
+        if BeSoccerScraper._initialized:
+            return
+        
+        self._iniciar_sesiones()
         
-        # Cache optimizado
-        self.cache = {}
-        self.cache_timeout = 1800  # 30 minutos
+        # Cache optimizado (30 minutos), páginas ya parseadas y URLs
+        # completas de partidos (lo más importante)
+        self._iniciar_caches_memoria(cache_timeout=1800)
         
-        # Cache para URLs completas de partidos (lo más importante)
-        self.cache_urls_partidos = {}
+        BeSoccerScraper._initialized = True
 
     def obtener_alineaciones_partido(self, match_id_o_url, equipo_local="", equipo_visitante="", fecha_partido=None):
         """
@@ -50,9 +313,10 @@ class BeSoccerScraper:
             
             # Verificar cache de alineaciones
             cache_key = f"alineaciones_{match_id}"
-            if self._verificar_cache(cache_key):
+            en_cache = self._leer_cache(cache_key)
+            if en_cache is not None:
                 print(f"✅ Usando alineaciones del cache")
-                return self.cache[cache_key]['data']
+                return en_cache
             
             # IMPORTANTE: Necesitamos la URL completa con los slugs de equipos
             if not url_partido_oficial or '/partido/' not in url_partido_oficial:
@@ -75,18 +339,31 @@ class BeSoccerScraper:
             url_alineaciones = self._construir_url_alineaciones(url_partido_oficial)
             print(f"📍 URL alineaciones: {url_alineaciones}")
             
-            # Obtener alineaciones
+            # Obtener alineaciones (en disco solo se guardan si ya están publicadas)
             try:
-                response = self.session.get(url_alineaciones, timeout=10)
-                response.raise_for_status()
+                descarga = _descargar_con_cache(
+                    self.session, url_alineaciones, 'alineaciones', timeout=10,
+                    cachear=False, filtro=FILTRO_ALINEACIONES)
                 
-                soup = BeautifulSoup(response.content, 'html.parser')
-                
-                # Extraer con el método que funciona
-                alineaciones_info = self._extraer_con_metodo_panel(soup)
+                alineaciones_info = self._resultado_sin_cambios(url_alineaciones, descarga.huella)
+                if alineaciones_info is not None:
+                    print("♻️ Alineaciones sin cambios desde la última consulta")
+                else:
+                    soup = soup_alineaciones(descarga.contenido)
+                    
+                    # Extraer con el método que funciona
+                    alineaciones_info = self._extraer_con_metodo_panel(soup)
+                    self._recordar_resultado(url_alineaciones, descarga.huella, alineaciones_info)
                 
                 if alineaciones_info['encontrado']:
                     self._guardar_cache(cache_key, alineaciones_info)
+                    cache_http = obtener_cache_http()
+                    tipo = 'alineaciones_finalizado' if self._partido_finalizado(match_id, fecha_partido) else 'alineaciones'
+                    if not descarga.desde_cache:
+                        cache_http.guardar(url_alineaciones, descarga.contenido, tipo,
+                                           huella=descarga.huella, **descarga.validadores)
+                    elif tipo == 'alineaciones_finalizado':
+                        cache_http.marcar_permanente(url_alineaciones, tipo)
                 
                 return alineaciones_info
                 
@@ -116,9 +393,18 @@ class BeSoccerScraper:
         CORREGIDO: Usa la fecha del partido si se proporciona
         """
         # Primero verificar si la tenemos en cache
-        if match_id in self.cache_urls_partidos:
+        url_en_cache = self._url_partido_en_cache(match_id)
+        if url_en_cache:
             print(f"✅ URL completa encontrada en cache")
-            return self.cache_urls_partidos[match_id]
+            return url_en_cache
+        
+        # Después en el índice de partidos (se rellena con cada livescore leído)
+        partido_indexado = obtener_indice_partidos().obtener(match_id)
+        if partido_indexado:
+            print(f"✅ URL completa encontrada en el índice de partidos")
+            self._recordar_partido(match_id, partido_indexado['url_completa'],
+                                   partido_indexado.get('estado') == 'finalizado')
+            return partido_indexado['url_completa']
         
         # IMPORTANTE: Si tenemos fecha_partido, buscar SOLO en esa fecha
         if fecha_partido:
@@ -127,70 +413,76 @@ class BeSoccerScraper:
             
             try:
                 print(f"  🔍 Buscando en: {url}")
-                response = self.session.get(url, timeout=8)
+                descarga = _descargar_con_cache(self.session, url, _tipo_livescore(fecha_partido),
+                                                timeout=8, filtro=FILTRO_LIVESCORE)
                 
-                if response.status_code == 200:
-                    soup = BeautifulSoup(response.content, 'html.parser')
+                url_completa = self._buscar_href_partido(descarga.contenido, match_id, fecha_partido)
+                if url_completa:
+                    print(f"  ✅ Encontrado: {url_completa}")
                     
-                    # Buscar en tableMatches
-                    table_matches = soup.find('div', id='tableMatches')
-                    if table_matches:
-                        match_links = table_matches.find_all('a', class_='match-link')
-                        
-                        for link in match_links:
-                            href = link.get('href', '')
-                            if match_id in href:
-                                url_completa = f"https://es.besoccer.com{href}" if href.startswith('/') else href
-                                print(f"  ✅ Encontrado: {url_completa}")
-                                
-                                # Guardar en cache
-                                self.cache_urls_partidos[match_id] = url_completa
-                                
-                                return url_completa
+                    # Guardar en cache
+                    self._recordar_partido(match_id, url_completa)
+                    
+                    return url_completa
                 
             except Exception as e:
                 print(f"  ⚠️ Error: {e}")
         
         # Si no se proporcionó fecha o no se encontró, buscar en fechas cercanas
+        # (las tres páginas se descargan a la vez y se revisan en orden)
         print("🔍 Buscando en fechas cercanas como fallback...")
         fechas = [
             datetime.now() - timedelta(days=1),
             datetime.now(),
             datetime.now() + timedelta(days=1)
         ]
+        fechas = [fecha.strftime('%Y-%m-%d') for fecha in fechas]
+        urls = [f"https://es.besoccer.com/livescore/{fecha_str}" for fecha_str in fechas]
         
-        for fecha in fechas:
-            fecha_str = fecha.strftime('%Y-%m-%d')
-            url = f"https://es.besoccer.com/livescore/{fecha_str}"
+        def descargar(fecha_str, url):
+            print(f"  🔍 Buscando en: {url}")
+            return _descargar_con_cache(self.session, url, _tipo_livescore(fecha_str),
+                                        timeout=8, filtro=FILTRO_LIVESCORE).contenido
+        
+        with ThreadPoolExecutor(max_workers=len(urls)) as executor:
+            futuros = [executor.submit(descargar, fecha_str, url) for fecha_str, url in zip(fechas, urls)]
             
-            try:
-                print(f"  🔍 Buscando en: {url}")
-                response = self.session.get(url, timeout=8)
-                
-                if response.status_code == 200:
-                    soup = BeautifulSoup(response.content, 'html.parser')
-                    
-                    # Buscar en tableMatches
-                    table_matches = soup.find('div', id='tableMatches')
-                    if table_matches:
-                        match_links = table_matches.find_all('a', class_='match-link')
+            for futuro, fecha_str, url in zip(futuros, fechas, urls):
+                try:
+                    url_completa = self._buscar_href_partido(futuro.result(), match_id, fecha_str)
+                    if url_completa:
+                        print(f"  ✅ Encontrado: {url_completa}")
                         
-                        for link in match_links:
-                            href = link.get('href', '')
-                            if match_id in href:
-                                url_completa = f"https://es.besoccer.com{href}" if href.startswith('/') else href
-                                print(f"  ✅ Encontrado: {url_completa}")
-                                
-                                # Guardar en cache
-                                self.cache_urls_partidos[match_id] = url_completa
-                                
-                                return url_completa
-                
-                time.sleep(0.2)
-                
-            except Exception as e:
-                print(f"  ⚠️ Error en {url}: {e}")
-                continue
+                        # Guardar en cache
+                        self._recordar_partido(match_id, url_completa)
+                        
+                        return url_completa
+                    
+                except Exception as e:
+                    print(f"  ⚠️ Error en {url}: {e}")
+                    continue
+        
+        return None
+    
+    def _buscar_href_partido(self, contenido, match_id, fecha_str=None):
+        """URL completa del partido dentro de una página de livescore (o None)"""
+        if not contenido:
+            return None
+        
+        soup = soup_livescore(contenido)
+        
+        # Buscar en tableMatches
+        table_matches = soup.find('div', id='tableMatches')
+        if table_matches:
+            # De paso se indexan todos los partidos de la página
+            partidos = [self._extraer_partido_con_url_completa(link)
+                        for link in table_matches.find_all('a', class_='match-link match-home')]
+            obtener_indice_partidos().registrar([p for p in partidos if p], fecha_str)
+            
+            for link in table_matches.find_all('a', class_='match-link'):
+                href = link.get('href', '')
+                if match_id in href:
+                    return f"https://es.besoccer.com{href}" if href.startswith('/') else href
         
         return None
 
@@ -203,19 +495,27 @@ class BeSoccerScraper:
             
             # Verificar cache
             cache_key = f"partidos_{fecha_str}"
-            if self._verificar_cache(cache_key):
+            en_cache = self._leer_cache(cache_key)
+            if en_cache is not None:
                 print("✅ Usando partidos del cache")
-                return self.cache[cache_key]['data']
+                return en_cache
             
             # URL DIRECTA - sin búsquedas duplicadas
             url = f"https://es.besoccer.com/livescore/{fecha_str}"
             print(f"📍 URL directa: {url}")
             
             try:
-                response = self.session.get(url, timeout=10)
-                response.raise_for_status()
+                descarga = _descargar_con_cache(self.session, url, _tipo_livescore(fecha_str),
+                                                timeout=10, filtro=FILTRO_LIVESCORE)
                 
-                soup = BeautifulSoup(response.content, 'html.parser')
+                partidos_formateados = self._resultado_sin_cambios(url, descarga.huella)
+                if partidos_formateados is not None:
+                    print(f"♻️ Livescore sin cambios: {len(partidos_formateados)} partidos")
+                    if partidos_formateados:
+                        self._guardar_cache(cache_key, partidos_formateados)
+                    return partidos_formateados
+                
+                soup = soup_livescore(descarga.contenido)
                 partidos = []
                 
                 # Buscar en tableMatches
@@ -253,14 +553,19 @@ class BeSoccerScraper:
                     }
                     
                     # Guardar URL completa en cache
-                    if p.get('url_completa') and p['match_id']:
-                        self.cache_urls_partidos[p['match_id']] = p['url_completa']
+                    if p['match_id']:
+                        self._recordar_partido(p['match_id'], p.get('url_completa'),
+                                               p.get('estado') == 'finalizado')
                     
                     partidos_formateados.append(partido_formateado)
                 
                 if partidos_formateados:
                     self._guardar_cache(cache_key, partidos_formateados)
                 
+                # Índice persistente match_id -> URL completa
+                obtener_indice_partidos().registrar(partidos, fecha_str)
+                self._recordar_resultado(url, descarga.huella, partidos_formateados)
+                
                 print(f"✅ {len(partidos_formateados)} partidos encontrados")
                 return partidos_formateados
                 
@@ -669,21 +974,6 @@ class BeSoccerScraper:
         url_limpia = url_oficial.split('#')[0].split('?')[0]
         return f"{url_limpia}/alineaciones" if not url_limpia.endswith('/') else f"{url_limpia}alineaciones"
     
-    def _verificar_cache(self, cache_key):
-        """Verifica cache"""
-        if cache_key not in self.cache:
-            return False
-        if time.time() - self.cache[cache_key]['timestamp'] > self.cache_timeout:
-            del self.cache[cache_key]
-            return False
-        return True
-    
-    def _guardar_cache(self, cache_key, data):
-        """Guarda en cache"""
-        self.cache[cache_key] = {
-            'data': data,
-            'timestamp': time.time()
-        }
     
     def _extraer_match_id_de_url(self, url):
         """MÉTODO AÑADIDO: Extrae el match_id de una URL completa"""
@@ -697,10 +987,77 @@ class BeSoccerScraper:
         except:
             return None
     
-    def limpiar_cache(self):
-        """Limpia cache"""
-        self.cache = {}
-        self.cache_urls_partidos = {}
+    def _partido_finalizado(self, match_id, fecha_partido=None):
+        """True si el partido ya se jugó (visto como terminado o de una fecha pasada)"""
+        if self._visto_finalizado(match_id):
+            return True
+        if not fecha_partido:
+            partido_indexado = obtener_indice_partidos().obtener(match_id)
+            if partido_indexado and partido_indexado.get('estado') == 'finalizado':
+                return True
+            fecha_partido = partido_indexado.get('fecha') if partido_indexado else None
+        return bool(fecha_partido) and _tipo_livescore(fecha_partido) == 'livescore_pasado'
+    
+    def precargar_jornada(self, fecha_str, partidos=None, incluir_perfiles=True,
+                          max_workers=MAX_DESCARGAS_CONCURRENTES):
+        """
+        Descarga en paralelo las alineaciones de todos los partidos de una
+        fecha y, opcionalmente, los perfiles de todos los jugadores, para que
+        después se sirvan desde la caché.
+        
+        Args:
+            fecha_str: fecha 'YYYY-MM-DD'
+            partidos: resultado de buscar_partidos_en_fecha (se busca si es None)
+            incluir_perfiles: descargar también los perfiles de los jugadores
+            max_workers: descargas simultáneas (el ritmo por host lo marca el limitador)
+        
+        Returns:
+            dict con el número de partidos, alineaciones y perfiles obtenidos
+        """
+        inicio = time.time()
+        if partidos is None:
+            partidos = BeSoccerAlineacionesScraper().buscar_partidos_en_fecha(fecha_str)
+        
+        # Las URLs ya vienen en el livescore: no hace falta buscarlas otra vez
+        for p in partidos:
+            if p.get('match_id'):
+                self._recordar_partido(p['match_id'], p.get('url_completa'),
+                                       p.get('estado') == 'finalizado')
+        
+        def alineaciones(p):
+            return self.obtener_alineaciones_partido(
+                p['match_id'], p.get('equipo_local', ''), p.get('equipo_visitante', ''), fecha_str)
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            resultados = list(executor.map(alineaciones, [p for p in partidos if p.get('match_id')]))
+            
+            urls_perfiles = []
+            if incluir_perfiles:
+                vistas = set()
+                for resultado in resultados:
+                    if not resultado.get('encontrado'):
+                        continue
+                    for jugador in resultado['alineacion_local'] + resultado['alineacion_visitante']:
+                        url = jugador.get('url_besoccer')
+                        if url and url not in vistas:
+                            vistas.add(url)
+                            urls_perfiles.append(url)
+            
+            perfiles = list(executor.map(self.obtener_datos_perfil_jugador, urls_perfiles))
+        
+        resumen = {
+            'partidos': len(partidos),
+            'alineaciones': sum(1 for r in resultados if r.get('encontrado')),
+            'perfiles': sum(1 for p in perfiles if p)
+        }
+        print(f"⚡ Jornada {fecha_str} precargada en {time.time() - inicio:.1f}s: {resumen}")
+        return resumen
+    
+    def limpiar_cache(self, incluir_disco=False):
+        """Limpia cache (la caché HTTP en disco solo si se pide)"""
+        self._limpiar_caches_memoria()
+        if incluir_disco:
+            obtener_cache_http().limpiar()
         print("🗑️ Cache limpiado")
 
     def obtener_datos_perfil_jugador(self, url_perfil):
@@ -718,146 +1075,18 @@ class BeSoccerScraper:
             
             # Verificar cache
             cache_key = f"perfil_{url_perfil}"
-            if self._verificar_cache(cache_key):
+            en_cache = self._leer_cache(cache_key)
+            if en_cache is not None:
                 print(f"✅ Usando perfil del cache")
-                return self.cache[cache_key]['data']
-            
-            response = self.session.get(url_perfil, timeout=10)
-            response.raise_for_status()
+                return en_cache
             
-            soup = BeautifulSoup(response.content, 'html.parser')
+            descarga = _descargar_con_cache(self.session, url_perfil, 'perfil', timeout=10)
             
-            datos_jugador = {
-                'nombre_completo': None,
-                'edad': None,
-                'altura': None,
-                'peso': None,
-                'nacionalidad': None,
-                'valor_mercado': None,
-                'elo': None,
-                'dorsal': None,
-                'posicion_principal': None,
-                'posicion_secundaria': None,
-                'equipo_actual': None,
-                'escudo_equipo': None,
-                'liga_actual': None,
-                'pais_nacimiento': None,
-                'pie_preferido': None,
-                'fuente': 'BeSoccer'
-            }
-            
-            # Buscar en el panel principal con clase "panel"
-            panel_principal = soup.find('div', class_='panel')
-            if panel_principal:
-                panel_head = panel_principal.find('div', class_='panel-head')
-                if panel_head:
-                    # Nombre mostrado (apodo)
-                    panel_title = panel_head.find('h2', class_='panel-title')
-                    if panel_title:
-                        datos_jugador['nombre_mostrado'] = panel_title.get_text(strip=True)
-                        print(f"   - nombre_mostrado: {datos_jugador['nombre_mostrado']}")
-                    
-                    # Nombre completo real
-                    panel_subtitle = panel_head.find('div', class_='panel-subtitle')
-                    if panel_subtitle:
-                        nombre_completo = panel_subtitle.get_text(strip=True)
-                        if nombre_completo:
-                            datos_jugador['nombre_completo'] = nombre_completo
-                            print(f"   - nombre_completo: {datos_jugador['nombre_completo']}")
-
-            # 1. Buscar panel con estadísticas (edad, altura, peso, valor, ELO)
-            stat_list = soup.find('div', class_='panel-body stat-list jc-sa ph5')
-            if stat_list:
-                stats = stat_list.find_all('div', class_='stat')
-                
-                for stat in stats:
-                    big_row = stat.find('div', class_='big-row')
-                    small_rows = stat.find_all('div', class_='small-row')
-                    
-                    if big_row and small_rows:
-                        valor = big_row.get_text().strip()
-                        for small_row in small_rows:
-                            texto = small_row.get_text().strip().lower()
-                            
-                            if 'años' in texto:
-                                datos_jugador['edad'] = int(valor) if valor.isdigit() else valor
-                            elif 'kgs' in texto:
-                                datos_jugador['peso'] = int(valor) if valor.isdigit() else valor
-                            elif 'cms' in texto:
-                                datos_jugador['altura'] = int(valor) if valor.isdigit() else valor
-                            elif 'm.€' in texto or 'k€' in texto:
-                                datos_jugador['valor_mercado'] = valor + (' M€' if 'm.€' in texto else ' K€')
-                            elif 'elo' in texto:
-                                round_row = stat.find('div', class_='round-row')
-                                if round_row:
-                                    span = round_row.find('span')
-                                    if span and span.get_text().strip().isdigit():
-                                        datos_jugador['elo'] = int(span.get_text().strip())
-
-                    # Nacionalidad (bandera principal)
-                    img_flag = stat.find('img', attrs={'alt': True})
-                    if img_flag and not datos_jugador['nacionalidad']:
-                        datos_jugador['nacionalidad'] = img_flag.get('alt', '')
-                    
-                    # Dorsal
-                    dorsal_div = stat.find('div', class_='round-row mb5 black')
-                    if dorsal_div:
-                        span = dorsal_div.find('span')
-                        if span and span.get_text().strip().isdigit():
-                            datos_jugador['dorsal'] = int(span.get_text().strip())
-            
-            # 2. Buscar posiciones específicas del jugador
-            panel_positions = soup.find('div', class_='panel role-positions')
-            if panel_positions:
-                role_box = panel_positions.find('div', class_='role-box')
-                if role_box:
-                    # Posición principal
-                    main_role = role_box.find('div', class_='main-role')
-                    if main_role:
-                        spans = main_role.find_all('span')
-                        if len(spans) >= 2:
-                            datos_jugador['posicion_principal'] = spans[0].get_text().strip()
-                    # Posiciones secundarias (tomar la primera si existe)
-                    position_list = role_box.find('ul', class_='position-list')
-                    if position_list:
-                        first_li = position_list.find('li')
-                        if first_li:
-                            spans = first_li.find_all('span')
-                            if len(spans) >= 1:
-                                datos_jugador['posicion_secundaria'] = spans[0].get_text().strip()
-            
-            # 3. Buscar datos de carrera (equipo actual, liga)
-            carrera_head = soup.find('div', class_='table-head', string=lambda s: s and "Datos de su Carrera" in s)
-            if carrera_head:
-                carrera_body = carrera_head.find_next('div', class_='table-body')
-                if carrera_body:
-                    # Equipo actual
-                    equipo_row = carrera_body.find('a', attrs={'data-cy': 'currentTeam'})
-                    if equipo_row:
-                        datos_jugador['equipo_actual'] = equipo_row.get_text(strip=True)
-                        img_tag = equipo_row.find('img')
-                        if img_tag:
-                            datos_jugador['escudo_equipo'] = img_tag.get('src', '')
-
-                    # Competición actual
-                    liga_row = carrera_body.find('a', attrs={'data-cy': 'currentCompetition'})
-                    if liga_row:
-                        datos_jugador['liga_actual'] = liga_row.get_text(strip=True)
-
-            # 4. Datos personales (país nacimiento, pie preferido)
-            personal_head = soup.find('div', class_='table-head', string=lambda s: s and "Datos personales" in s)
-            if personal_head:
-                personal_body = personal_head.find_next('div', class_='table-body')
-                if personal_body:
-                    # País nacimiento
-                    nacimiento_row = personal_body.find('a', attrs={'data-cy': 'birthplace'})
-                    if nacimiento_row:
-                        datos_jugador['pais_nacimiento'] = nacimiento_row.get_text(strip=True)
-                    
-                    # Pie preferido
-                    pie_row = personal_body.find('div', string=lambda s: s and "Pie preferido" in s)
-                    if pie_row and pie_row.find_next('div'):
-                        datos_jugador['pie_preferido'] = pie_row.find_next('div').get_text(strip=True)
+            datos_jugador = self._resultado_sin_cambios(url_perfil, descarga.huella)
+            if datos_jugador is None:
+                soup = BeautifulSoup(descarga.contenido, 'html.parser')
+                datos_jugador = self._extraer_datos_perfil(soup)
+                self._recordar_resultado(url_perfil, descarga.huella, datos_jugador)
 
             # Guardar en cache
             self._guardar_cache(cache_key, datos_jugador)
@@ -878,25 +1107,167 @@ class BeSoccerScraper:
             traceback.print_exc()
             return None
 
+    def _extraer_datos_perfil(self, soup):
+        """Datos del jugador a partir del HTML de su perfil"""
+        datos_jugador = {
+            'nombre_completo': None,
+            'edad': None,
+            'altura': None,
+            'peso': None,
+            'nacionalidad': None,
+            'valor_mercado': None,
+            'elo': None,
+            'dorsal': None,
+            'posicion_principal': None,
+            'posicion_secundaria': None,
+            'equipo_actual': None,
+            'escudo_equipo': None,
+            'liga_actual': None,
+            'pais_nacimiento': None,
+            'pie_preferido': None,
+            'fuente': 'BeSoccer'
+        }
+        
+        # Buscar en el panel principal con clase "panel"
+        panel_principal = soup.find('div', class_='panel')
+        if panel_principal:
+            panel_head = panel_principal.find('div', class_='panel-head')
+            if panel_head:
+                # Nombre mostrado (apodo)
+                panel_title = panel_head.find('h2', class_='panel-title')
+                if panel_title:
+                    datos_jugador['nombre_mostrado'] = panel_title.get_text(strip=True)
+                    print(f"   - nombre_mostrado: {datos_jugador['nombre_mostrado']}")
+                
+                # Nombre completo real
+                panel_subtitle = panel_head.find('div', class_='panel-subtitle')
+                if panel_subtitle:
+                    nombre_completo = panel_subtitle.get_text(strip=True)
+                    if nombre_completo:
+                        datos_jugador['nombre_completo'] = nombre_completo
+                        print(f"   - nombre_completo: {datos_jugador['nombre_completo']}")
+
+        # 1. Buscar panel con estadísticas (edad, altura, peso, valor, ELO)
+        stat_list = soup.find('div', class_='panel-body stat-list jc-sa ph5')
+        if stat_list:
+            stats = stat_list.find_all('div', class_='stat')
+            
+            for stat in stats:
+                big_row = stat.find('div', class_='big-row')
+                small_rows = stat.find_all('div', class_='small-row')
+                
+                if big_row and small_rows:
+                    valor = big_row.get_text().strip()
+                    for small_row in small_rows:
+                        texto = small_row.get_text().strip().lower()
+                        
+                        if 'años' in texto:
+                            datos_jugador['edad'] = int(valor) if valor.isdigit() else valor
+                        elif 'kgs' in texto:
+                            datos_jugador['peso'] = int(valor) if valor.isdigit() else valor
+                        elif 'cms' in texto:
+                            datos_jugador['altura'] = int(valor) if valor.isdigit() else valor
+                        elif 'm.€' in texto or 'k€' in texto:
+                            datos_jugador['valor_mercado'] = valor + (' M€' if 'm.€' in texto else ' K€')
+                        elif 'elo' in texto:
+                            round_row = stat.find('div', class_='round-row')
+                            if round_row:
+                                span = round_row.find('span')
+                                if span and span.get_text().strip().isdigit():
+                                    datos_jugador['elo'] = int(span.get_text().strip())
+
+                # Nacionalidad (bandera principal)
+                img_flag = stat.find('img', attrs={'alt': True})
+                if img_flag and not datos_jugador['nacionalidad']:
+                    datos_jugador['nacionalidad'] = img_flag.get('alt', '')
+                
+                # Dorsal
+                dorsal_div = stat.find('div', class_='round-row mb5 black')
+                if dorsal_div:
+                    span = dorsal_div.find('span')
+                    if span and span.get_text().strip().isdigit():
+                        datos_jugador['dorsal'] = int(span.get_text().strip())
+        
+        # 2. Buscar posiciones específicas del jugador
+        panel_positions = soup.find('div', class_='panel role-positions')
+        if panel_positions:
+            role_box = panel_positions.find('div', class_='role-box')
+            if role_box:
+                # Posición principal
+                main_role = role_box.find('div', class_='main-role')
+                if main_role:
+                    spans = main_role.find_all('span')
+                    if len(spans) >= 2:
+                        datos_jugador['posicion_principal'] = spans[0].get_text().strip()
+                # Posiciones secundarias (tomar la primera si existe)
+                position_list = role_box.find('ul', class_='position-list')
+                if position_list:
+                    first_li = position_list.find('li')
+                    if first_li:
+                        spans = first_li.find_all('span')
+                        if len(spans) >= 1:
+                            datos_jugador['posicion_secundaria'] = spans[0].get_text().strip()
+        
+        # 3. Buscar datos de carrera (equipo actual, liga)
+        carrera_head = soup.find('div', class_='table-head', string=lambda s: s and "Datos de su Carrera" in s)
+        if carrera_head:
+            carrera_body = carrera_head.find_next('div', class_='table-body')
+            if carrera_body:
+                # Equipo actual
+                equipo_row = carrera_body.find('a', attrs={'data-cy': 'currentTeam'})
+                if equipo_row:
+                    datos_jugador['equipo_actual'] = equipo_row.get_text(strip=True)
+                    img_tag = equipo_row.find('img')
+                    if img_tag:
+                        datos_jugador['escudo_equipo'] = img_tag.get('src', '')
+
+                # Competición actual
+                liga_row = carrera_body.find('a', attrs={'data-cy': 'currentCompetition'})
+                if liga_row:
+                    datos_jugador['liga_actual'] = liga_row.get_text(strip=True)
+
+        # 4. Datos personales (país nacimiento, pie preferido)
+        personal_head = soup.find('div', class_='table-head', string=lambda s: s and "Datos personales" in s)
+        if personal_head:
+            personal_body = personal_head.find_next('div', class_='table-body')
+            if personal_body:
+                # País nacimiento
+                nacimiento_row = personal_body.find('a', attrs={'data-cy': 'birthplace'})
+                if nacimiento_row:
+                    datos_jugador['pais_nacimiento'] = nacimiento_row.get_text(strip=True)
+                
+                # Pie preferido
+                pie_row = personal_body.find('div', string=lambda s: s and "Pie preferido" in s)
+                if pie_row and pie_row.find_next('div'):
+                    datos_jugador['pie_preferido'] = pie_row.find_next('div').get_text(strip=True)
+        
+        return datos_jugador
+
 # ==========================================
 # CLASE AUXILIAR PARA LIVESCORE - SIMPLIFICADA
 # ==========================================
 
-class BeSoccerAlineacionesScraper:
-    """Scraper para búsqueda en livescore - SIMPLIFICADO"""
+class BeSoccerAlineacionesScraper(SesionPorHiloMixin, CacheMemoriaMixin):
+    """Scraper para búsqueda en livescore - SIMPLIFICADO (instancia única por proceso)"""
+    _instance = None
+    _initialized = False
+    _lock = threading.Lock()
+    
+    def __new__(cls, *args, **kwargs):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = super().__new__(cls)
+        return cls._instance
     
     def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-            'Accept-Language': 'es-ES,es;q=0.5',
-            'Accept-Encoding': 'gzip, deflate',
-            'Connection': 'keep-alive',
-        })
+        if BeSoccerAlineacionesScraper._initialized:
+            return
+        
+        self._iniciar_sesiones()
+        
+        self._iniciar_caches_memoria(cache_timeout=900)
         
-        self.cache = {}
-        self.cache_timeout = 900
+        BeSoccerAlineacionesScraper._initialized = True
 
     def buscar_partidos_en_fecha(self, fecha_str):
         """SIMPLIFICADO: Solo busca en la URL directa"""
@@ -905,19 +1276,27 @@ class BeSoccerAlineacionesScraper:
             
             # Verificar cache
             cache_key = f"livescore_{fecha_str}"
-            if self._verificar_cache(cache_key):
+            en_cache = self._leer_cache(cache_key)
+            if en_cache is not None:
                 print(f"✅ Usando datos del cache")
-                return self.cache[cache_key]['data']
+                return en_cache
             
             # URL DIRECTA - sin duplicación
             url = f"https://es.besoccer.com/livescore/{fecha_str}"
             print(f"📍 URL: {url}")
             
             try:
-                response = self.session.get(url, timeout=10)
-                response.raise_for_status()
+                descarga = _descargar_con_cache(self.session, url, _tipo_livescore(fecha_str),
+                                                timeout=10, filtro=FILTRO_LIVESCORE)
                 
-                soup = BeautifulSoup(response.content, 'html.parser')
+                partidos = self._resultado_sin_cambios(url, descarga.huella)
+                if partidos is not None:
+                    print(f"♻️ Livescore sin cambios: {len(partidos)} partidos")
+                    if partidos:
+                        self._guardar_cache(cache_key, partidos)
+                    return partidos
+                
+                soup = soup_livescore(descarga.contenido)
                 partidos = []
                 
                 # Buscar en tableMatches
@@ -933,6 +1312,10 @@ class BeSoccerAlineacionesScraper:
                 if partidos:
                     self._guardar_cache(cache_key, partidos)
                 
+                # Índice persistente match_id -> URL completa
+                obtener_indice_partidos().registrar(partidos, fecha_str)
+                self._recordar_resultado(url, descarga.huella, partidos)
+                
                 print(f"✅ {len(partidos)} partidos encontrados")
                 return partidos
                 
@@ -1022,27 +1405,38 @@ class BeSoccerAlineacionesScraper:
         except Exception as e:
             return None
 
-    def _verificar_cache(self, cache_key):
-        """Verifica cache"""
-        if cache_key not in self.cache:
-            return False
-        if time.time() - self.cache[cache_key]['timestamp'] > self.cache_timeout:
-            del self.cache[cache_key]
-            return False
-        return True
-
-    def _guardar_cache(self, cache_key, data):
-        """Guarda en cache"""
-        self.cache[cache_key] = {
-            'data': data,
-            'timestamp': time.time()
-        }
-
 
 # ==========================================
 # FUNCIONES HELPER
 # ==========================================
 
+_jornadas_en_precarga = set()
+_jornadas_lock = threading.Lock()
+
+
+def precargar_jornada_en_segundo_plano(fecha_str, partidos=None, incluir_perfiles=True):
+    """
+    Lanza precargar_jornada en un hilo aparte (una sola vez por fecha a la
+    vez) para no bloquear la página mientras se llenan las cachés.
+    """
+    with _jornadas_lock:
+        if fecha_str in _jornadas_en_precarga:
+            return False
+        _jornadas_en_precarga.add(fecha_str)
+    
+    def precargar():
+        try:
+            BeSoccerScraper().precargar_jornada(fecha_str, partidos, incluir_perfiles)
+        except Exception as e:
+            print(f"❌ Error precargando jornada {fecha_str}: {e}")
+        finally:
+            with _jornadas_lock:
+                _jornadas_en_precarga.discard(fecha_str)
+    
+    threading.Thread(target=precargar, name=f"precarga-{fecha_str}", daemon=True).start()
+    return True
+
+
 def obtener_partidos_besoccer(fecha_str):
     """Helper para obtener partidos"""
     try:
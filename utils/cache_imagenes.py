@@ -0,0 +1,328 @@
+# utils/cache_imagenes.py
+"""
+Almacén local de fotos de jugadores y escudos (cdn.resfu.com y rutas locales).
+
+Cada imagen se descarga una sola vez y se guarda en data/cache_imagenes.db
+junto con sus variantes ya redimensionadas, identificadas por URL, tamaño y
+modo de recorte. Los PDFs reciben los bytes en memoria (BytesIO), de modo
+que no dependen de la latencia del CDN ni dejan ficheros en /tmp.
+
+- `imagen_bytes` / `imagen_buffer`: variante pedida, descargando si falta
+- `imagen_para_pagina`: para tarjetas de Streamlit; si la imagen aún no está
+  en caché devuelve la URL original y la descarga en segundo plano, así la
+  página nunca espera al CDN
+
+Las descargas fallidas se recuerdan durante REINTENTO_FALLIDAS segundos para
+no repetir el timeout en cada informe. Al superar max_bytes se eliminan las
+imágenes usadas hace más tiempo (LRU).
+"""
+
+import io
+import os
+import time
+import base64
+import sqlite3
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from PIL import Image as PILImage
+
+from common.database import conectar
+
+logger = logging.getLogger(__name__)
+
+RUTA_CACHE_IMAGENES = "data/cache_imagenes.db"
+MAX_BYTES_POR_DEFECTO = 128 * 1024 * 1024
+TIMEOUT_DESCARGA = 10
+REINTENTO_FALLIDAS = 3600  # segundos antes de volver a intentar una URL que falló
+REFRESCO_ULTIMO_USO = 600  # un acierto solo reescribe ultimo_uso si es más antiguo
+
+MODO_CUADRADO = 'cuadrado'  # recorte centrado al lado menor y redimensionado exacto
+MODO_AJUSTAR = 'ajustar'    # mantiene la proporción dentro del tamaño (thumbnail)
+VARIANTE_ORIGINAL = 'original'
+
+_CABECERAS = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
+
+
+def nombre_variante(tamano=None, modo=MODO_CUADRADO, formato='JPEG', calidad=95):
+    """Clave de una variante, p. ej. 'cuadrado_300x300_JPEG_95'"""
+    medida = f"{tamano[0]}x{tamano[1]}" if tamano else 'libre'
+    return f"{modo}_{medida}_{formato.upper()}_{calidad}"
+
+
+def _a_rgb(img):
+    """Aplana la transparencia sobre fondo blanco"""
+    if img.mode in ('RGBA', 'LA', 'P'):
+        img = img.convert('RGBA')
+        fondo = PILImage.new('RGB', img.size, (255, 255, 255))
+        fondo.paste(img, mask=img.split()[-1])
+        return fondo
+    return img.convert('RGB') if img.mode != 'RGB' else img
+
+
+def procesar_imagen(contenido, tamano=None, modo=MODO_CUADRADO, formato='JPEG', calidad=95):
+    """Bytes de la imagen recortada/redimensionada en el formato indicado"""
+    img = PILImage.open(io.BytesIO(contenido))
+    img.load()
+
+    if modo == MODO_CUADRADO:
+        ancho, alto = img.size
+        if ancho != alto:
+            lado = min(ancho, alto)
+            left = (ancho - lado) // 2
+            top = (alto - lado) // 2
+            img = img.crop((left, top, left + lado, top + lado))
+        if tamano:
+            img = img.resize(tuple(tamano), PILImage.Resampling.LANCZOS)
+    elif tamano:
+        img.thumbnail(tuple(tamano), PILImage.Resampling.LANCZOS)
+
+    if formato.upper() == 'JPEG':
+        img = _a_rgb(img)
+
+    buffer = io.BytesIO()
+    opciones = {'quality': calidad} if formato.upper() == 'JPEG' else {}
+    img.save(buffer, formato.upper(), **opciones)
+    return buffer.getvalue()
+
+
+class CacheImagenes:
+    """Originales y variantes redimensionadas por (url, variante) en SQLite, con expulsión LRU"""
+
+    def __init__(self, db_path=RUTA_CACHE_IMAGENES, max_bytes=MAX_BYTES_POR_DEFECTO):
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self.aciertos = 0
+        self.fallos = 0
+        self.descargas = 0
+        self._lock = threading.Lock()
+        self._descargando = set()
+        self._sesion = requests.Session()
+        self._sesion.headers.update(_CABECERAS)
+        self.init_database()
+
+    def init_database(self):
+        directorio = os.path.dirname(self.db_path)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+
+        conn = conectar(self.db_path)
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS imagenes (
+                url TEXT NOT NULL,
+                variante TEXT NOT NULL,
+                contenido BLOB,
+                tamano INTEGER NOT NULL,
+                creado REAL NOT NULL,
+                ultimo_uso REAL NOT NULL,
+                PRIMARY KEY (url, variante)
+            )
+        ''')
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_imagenes_ultimo_uso ON imagenes (ultimo_uso)")
+        conn.commit()
+        conn.close()
+
+    def _leer(self, url, variante):
+        """(contenido, creado) o None; contenido None indica una descarga fallida"""
+        try:
+            conn = conectar(self.db_path)
+            fila = conn.execute("SELECT contenido, creado, ultimo_uso FROM imagenes WHERE url = ? AND variante = ?",
+                                (url, variante)).fetchone()
+            ahora = time.time()
+            if fila is not None and fila[0] is not None and ahora - fila[2] > REFRESCO_ULTIMO_USO:
+                conn.execute("UPDATE imagenes SET ultimo_uso = ? WHERE url = ? AND variante = ?",
+                             (ahora, url, variante))
+                conn.commit()
+            conn.close()
+            return fila[:2] if fila is not None else None
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Error leyendo caché de imágenes: {e}")
+            return None
+
+    def _escribir(self, url, variante, contenido):
+        ahora = time.time()
+        try:
+            conn = conectar(self.db_path)
+            conn.execute('''
+                INSERT OR REPLACE INTO imagenes (url, variante, contenido, tamano, creado, ultimo_uso)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (url, variante, sqlite3.Binary(contenido) if contenido is not None else None,
+                  len(contenido) if contenido is not None else 0, ahora, ahora))
+            conn.commit()
+            conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Error guardando en caché de imágenes: {e}")
+
+    def original(self, url):
+        """Bytes de la imagen original (descargada una sola vez) o None"""
+        fila = self._leer(url, VARIANTE_ORIGINAL)
+        if fila is not None:
+            contenido, creado = fila
+            if contenido is not None:
+                return contenido
+            if time.time() - creado < REINTENTO_FALLIDAS:
+                return None
+
+        if not url.startswith('http'):
+            # Ruta local: se lee sin guardar el original, solo sus variantes
+            try:
+                with open(url, 'rb') as f:
+                    return f.read()
+            except OSError as e:
+                logger.warning(f"⚠️ No se pudo leer la imagen {url}: {e}")
+                return None
+
+        try:
+            respuesta = self._sesion.get(url, timeout=TIMEOUT_DESCARGA)
+            respuesta.raise_for_status()
+            contenido = respuesta.content
+        except requests.RequestException as e:
+            logger.warning(f"⚠️ No se pudo descargar {url}: {e}")
+            self._escribir(url, VARIANTE_ORIGINAL, None)
+            return None
+
+        with self._lock:
+            self.descargas += 1
+        self._escribir(url, VARIANTE_ORIGINAL, contenido)
+        self.expulsar()
+        return contenido
+
+    def obtener(self, url, tamano=None, modo=MODO_CUADRADO, formato='JPEG', calidad=95):
+        """Bytes de la variante pedida, generándola a partir del original si falta"""
+        variante = nombre_variante(tamano, modo, formato, calidad)
+        fila = self._leer(url, variante)
+        if fila is not None and fila[0] is not None:
+            with self._lock:
+                self.aciertos += 1
+            return fila[0]
+
+        with self._lock:
+            self.fallos += 1
+        contenido = self.original(url)
+        if contenido is None:
+            return None
+
+        try:
+            imagen = procesar_imagen(contenido, tamano, modo, formato, calidad)
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ Imagen no válida {url}: {e}")
+            return None
+        self._escribir(url, variante, imagen)
+        return imagen
+
+    def en_cache(self, url, tamano=None, modo=MODO_CUADRADO, formato='JPEG', calidad=95):
+        """Bytes de la variante solo si ya está guardada (nunca descarga)"""
+        fila = self._leer(url, nombre_variante(tamano, modo, formato, calidad))
+        return fila[0] if fila is not None else None
+
+    def precargar(self, url, tamano=None, modo=MODO_CUADRADO, formato='JPEG', calidad=95):
+        """Prepara la variante en segundo plano (una sola descarga por URL a la vez)"""
+        with self._lock:
+            if url in self._descargando:
+                return
+            self._descargando.add(url)
+
+        def tarea():
+            try:
+                self.obtener(url, tamano, modo, formato, calidad)
+            finally:
+                with self._lock:
+                    self._descargando.discard(url)
+
+        _obtener_pool().submit(tarea)
+
+    def expulsar(self):
+        """Elimina las imágenes menos usadas hasta quedar por debajo de max_bytes"""
+        try:
+            conn = conectar(self.db_path)
+            total = conn.execute("SELECT COALESCE(SUM(tamano), 0) FROM imagenes").fetchone()[0]
+            if total <= self.max_bytes:
+                conn.close()
+                return 0
+
+            sobrante = total - self.max_bytes
+            claves = []
+            for url, variante, tamano in conn.execute(
+                    "SELECT url, variante, tamano FROM imagenes ORDER BY ultimo_uso"):
+                claves.append((url, variante))
+                sobrante -= tamano
+                if sobrante <= 0:
+                    break
+            conn.executemany("DELETE FROM imagenes WHERE url = ? AND variante = ?", claves)
+            conn.commit()
+            conn.close()
+            logger.info(f"🗑️ Caché de imágenes: {len(claves)} imágenes antiguas eliminadas")
+            return len(claves)
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Error purgando caché de imágenes: {e}")
+            return 0
+
+    def limpiar(self):
+        """Vacía la caché"""
+        conn = conectar(self.db_path)
+        conn.execute("DELETE FROM imagenes")
+        conn.commit()
+        conn.close()
+
+    def estadisticas(self):
+        conn = conectar(self.db_path)
+        imagenes, total = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(tamano), 0) FROM imagenes WHERE contenido IS NOT NULL").fetchone()
+        conn.close()
+        return {'aciertos': self.aciertos, 'fallos': self.fallos, 'descargas': self.descargas,
+                'imagenes': imagenes, 'bytes': total}
+
+
+_cache_imagenes = None
+_pool_descargas = None
+_cache_lock = threading.Lock()
+
+
+def _obtener_pool():
+    global _pool_descargas
+    with _cache_lock:
+        if _pool_descargas is None:
+            _pool_descargas = ThreadPoolExecutor(max_workers=4, thread_name_prefix='imagenes')
+        return _pool_descargas
+
+
+def obtener_cache_imagenes(db_path=RUTA_CACHE_IMAGENES):
+    """Caché de imágenes compartida por todo el proceso"""
+    global _cache_imagenes
+    with _cache_lock:
+        if _cache_imagenes is None:
+            _cache_imagenes = CacheImagenes(db_path)
+        return _cache_imagenes
+
+
+def imagen_bytes(url, tamano=None, modo=MODO_CUADRADO, formato='JPEG', calidad=95):
+    """Bytes de la imagen recortada/redimensionada o None si no se pudo obtener"""
+    if not url:
+        return None
+    return obtener_cache_imagenes().obtener(url, tamano, modo, formato, calidad)
+
+
+def imagen_buffer(url, tamano=None, modo=MODO_CUADRADO, formato='JPEG', calidad=95):
+    """Como imagen_bytes pero en un BytesIO, listo para FPDF o reportlab"""
+    contenido = imagen_bytes(url, tamano, modo, formato, calidad)
+    return io.BytesIO(contenido) if contenido is not None else None
+
+
+def imagen_para_pagina(url, tamano, modo=MODO_CUADRADO, data_uri=False):
+    """
+    Miniatura para tarjetas de Streamlit sin esperar al CDN: bytes (o data URI
+    para <img src>) si ya está en caché; si no, la URL original y la miniatura
+    se prepara en segundo plano para la próxima vez.
+    """
+    if not url:
+        return url
+    cache = obtener_cache_imagenes()
+    contenido = cache.en_cache(url, tamano, modo, 'PNG')
+    if contenido is None:
+        cache.precargar(url, tamano, modo, 'PNG')
+        return url
+    if data_uri:
+        return "data:image/png;base64," + base64.b64encode(contenido).decode('ascii')
+    return contenido
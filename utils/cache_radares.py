@@ -0,0 +1,208 @@
+# utils/cache_radares.py
+"""
+Caché en disco de los radares renderizados (PNG).
+
+Cada radar se identifica por el hash de lo que determina la imagen: tipo de
+gráfico, parámetros, valores, estilo y versión del dataset del que salen
+los valores. Si un informe no cambia, su radar se dibuja una sola vez y las
+siguientes páginas o PDFs reutilizan los bytes del PNG guardado en
+data/cache_radares.db, sin matplotlib ni ficheros temporales.
+
+La caché tiene un tamaño máximo (MAX_BYTES_POR_DEFECTO); al superarlo se
+eliminan los radares usados hace más tiempo (LRU).
+"""
+
+import io
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+
+from common.database import conectar
+
+logger = logging.getLogger(__name__)
+
+RUTA_CACHE_RADARES = "data/cache_radares.db"
+MAX_BYTES_POR_DEFECTO = 64 * 1024 * 1024
+DECIMALES_CLAVE = 4  # los valores se redondean para que 7.0 y 7.00001 compartan imagen
+# Un acierto solo reescribe ultimo_uso si tiene más de esto: el LRU no necesita
+# más precisión y así leer un radar no es una escritura en cada rerun
+REFRESCO_ULTIMO_USO = 600  # segundos
+
+
+def _normalizar(valor):
+    """Convierte valores numpy/pandas y floats a algo estable para el hash"""
+    if hasattr(valor, 'tolist'):
+        valor = valor.tolist()
+    if isinstance(valor, float):
+        return round(valor, DECIMALES_CLAVE)
+    if isinstance(valor, (list, tuple)):
+        return [_normalizar(v) for v in valor]
+    if isinstance(valor, dict):
+        return {str(k): _normalizar(v) for k, v in valor.items()}
+    return valor
+
+
+def clave_radar(tipo, params, valores, estilo=None, version_datos=None):
+    """Hash SHA-256 de (tipo, params, valores, estilo, versión del dataset)"""
+    contenido = json.dumps(
+        [tipo, _normalizar(params), _normalizar(valores), _normalizar(estilo), version_datos],
+        sort_keys=True, ensure_ascii=False, default=str
+    )
+    return hashlib.sha256(contenido.encode('utf-8')).hexdigest()
+
+
+def figura_a_png(fig, dpi=150, **kwargs):
+    """Bytes PNG de una figura de matplotlib (la figura se cierra)"""
+    import matplotlib.pyplot as plt
+
+    opciones = {'bbox_inches': 'tight', 'facecolor': 'white'}
+    opciones.update(kwargs)
+    buffer = io.BytesIO()
+    try:
+        fig.savefig(buffer, format='png', dpi=dpi, **opciones)
+    finally:
+        plt.close(fig)
+    return buffer.getvalue()
+
+
+class CacheRadares:
+    """PNGs de radares por clave de contenido en SQLite, con expulsión LRU"""
+
+    def __init__(self, db_path=RUTA_CACHE_RADARES, max_bytes=MAX_BYTES_POR_DEFECTO):
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self.aciertos = 0
+        self.fallos = 0
+        self._lock = threading.Lock()
+        self.init_database()
+
+    def init_database(self):
+        directorio = os.path.dirname(self.db_path)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+
+        conn = conectar(self.db_path)
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS radares (
+                clave TEXT PRIMARY KEY,
+                tipo TEXT,
+                png BLOB NOT NULL,
+                tamano INTEGER NOT NULL,
+                creado REAL NOT NULL,
+                ultimo_uso REAL NOT NULL
+            )
+        ''')
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_radares_ultimo_uso ON radares (ultimo_uso)")
+        conn.commit()
+        conn.close()
+
+    def obtener(self, clave):
+        """
+        Bytes PNG del radar o None; un acierto lo marca como usado
+        recientemente (como mucho una vez cada REFRESCO_ULTIMO_USO)
+        """
+        try:
+            conn = conectar(self.db_path)
+            fila = conn.execute("SELECT png, ultimo_uso FROM radares WHERE clave = ?", (clave,)).fetchone()
+            ahora = time.time()
+            if fila is not None and ahora - fila[1] > REFRESCO_ULTIMO_USO:
+                conn.execute("UPDATE radares SET ultimo_uso = ? WHERE clave = ?", (ahora, clave))
+                conn.commit()
+            conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Error leyendo caché de radares: {e}")
+            return None
+
+        with self._lock:
+            if fila is None:
+                self.fallos += 1
+                return None
+            self.aciertos += 1
+        return fila[0]
+
+    def guardar(self, clave, png, tipo=None):
+        ahora = time.time()
+        try:
+            conn = conectar(self.db_path)
+            conn.execute('''
+                INSERT OR REPLACE INTO radares (clave, tipo, png, tamano, creado, ultimo_uso)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (clave, tipo, sqlite3.Binary(png), len(png), ahora, ahora))
+            conn.commit()
+            conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Error guardando en caché de radares: {e}")
+            return
+        self.expulsar()
+
+    def expulsar(self):
+        """Elimina los radares menos usados hasta quedar por debajo de max_bytes"""
+        try:
+            conn = conectar(self.db_path)
+            total = conn.execute("SELECT COALESCE(SUM(tamano), 0) FROM radares").fetchone()[0]
+            if total <= self.max_bytes:
+                conn.close()
+                return 0
+
+            sobrante = total - self.max_bytes
+            claves = []
+            for clave, tamano in conn.execute("SELECT clave, tamano FROM radares ORDER BY ultimo_uso"):
+                claves.append((clave,))
+                sobrante -= tamano
+                if sobrante <= 0:
+                    break
+            conn.executemany("DELETE FROM radares WHERE clave = ?", claves)
+            conn.commit()
+            conn.close()
+            logger.info(f"🗑️ Caché de radares: {len(claves)} radares antiguos eliminados")
+            return len(claves)
+        except sqlite3.Error as e:
+            logger.warning(f"⚠️ Error purgando caché de radares: {e}")
+            return 0
+
+    def limpiar(self):
+        """Vacía la caché"""
+        conn = conectar(self.db_path)
+        conn.execute("DELETE FROM radares")
+        conn.commit()
+        conn.close()
+
+    def estadisticas(self):
+        conn = conectar(self.db_path)
+        entradas, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(tamano), 0) FROM radares").fetchone()
+        conn.close()
+        return {'aciertos': self.aciertos, 'fallos': self.fallos, 'radares': entradas, 'bytes': total}
+
+
+_cache_radares = None
+_cache_lock = threading.Lock()
+
+
+def obtener_cache_radares(db_path=RUTA_CACHE_RADARES):
+    """Caché de radares compartida por todo el proceso"""
+    global _cache_radares
+    with _cache_lock:
+        if _cache_radares is None:
+            _cache_radares = CacheRadares(db_path)
+        return _cache_radares
+
+
+def radar_png(tipo, params, valores, dibujar, estilo=None, version_datos=None, dpi=150, **kwargs_savefig):
+    """
+    PNG (bytes) del radar: de la caché si ya se dibujó con los mismos datos,
+    o llamando a `dibujar()` (que devuelve la figura) y guardándolo.
+    """
+    clave = clave_radar(tipo, params, valores, {'estilo': estilo, 'dpi': dpi, **kwargs_savefig}, version_datos)
+    cache = obtener_cache_radares()
+
+    png = cache.obtener(clave)
+    if png is not None:
+        return png
+
+    png = figura_a_png(dibujar(), dpi=dpi, **kwargs_savefig)
+    cache.guardar(clave, png, tipo)
+    return png
@@ -1,9 +1,22 @@
 # utils/db_helpers.py - VERSIÓN CORREGIDA
 import sqlite3
+from common.database import conectar, conectar_unificada, RUTA_JUGADORES_DB
+from common.consultas import informe_de_jugador
 import json
 from datetime import datetime
 from models.partido_model import PartidoModel
+from models.agregados_jugadores import sumar_informe, reconstruir_agregados
 import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+# Última versión de las alineaciones volcada por partido y scout: al sondear un
+# partido en directo las alineaciones casi nunca cambian y no hace falta
+# reescribirlas. LRU acotado: el proceso puede vivir muchas jornadas.
+MAX_ALINEACIONES_VOLCADAS = 500
+_alineaciones_volcadas = OrderedDict()
+_alineaciones_lock = threading.Lock()
 
 def ejecutar_con_reintentos(conn, query, params=None, max_reintentos=5):
     """
@@ -76,6 +89,103 @@ def crear_informe_scouting(informe_data):
         traceback.print_exc()
         return None
 
+# Sentencias del scraper de alineaciones (compartidas por la versión
+# individual y la carga por lotes de un partido completo)
+UPDATE_JUGADOR_SCRAPER = """
+    UPDATE jugadores_observados
+    SET numero_camiseta = COALESCE(?, numero_camiseta),
+        imagen_url = ?,
+        escudo_equipo = ?,
+        ultimo_partido_id = ?,
+        ultima_fecha_visto = ?,
+        veces_observado = veces_observado + 1,
+        besoccer_id = COALESCE(?, besoccer_id),
+        datos_json = ?,
+        posicion = COALESCE(?, posicion)
+    WHERE id = ?
+"""
+
+INSERT_JUGADOR_SCRAPER = """
+    INSERT INTO jugadores_observados (
+        jugador, equipo, posicion, numero_camiseta,
+        imagen_url, escudo_equipo, ultimo_partido_id,
+        ultima_fecha_visto, scout_agregado, besoccer_id,
+        datos_json, fecha_agregado, estado, veces_observado,
+        nombre_completo, nota_general
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+# (posición en INSERT, posición en UPDATE, usa COALESCE) de los campos que
+# UPDATE_JUGADOR_SCRAPER sobrescribe
+_CAMPOS_REPETIDO_LOTE = [
+    (3, 0, True),    # numero_camiseta
+    (4, 1, False),   # imagen_url
+    (5, 2, False),   # escudo_equipo
+    (6, 3, False),   # ultimo_partido_id
+    (7, 4, False),   # ultima_fecha_visto
+    (9, 5, True),    # besoccer_id
+    (2, 7, True),    # posicion
+]
+
+
+def _datos_json_o_vacio(datos_json_str, nombre):
+    """datos_json de un jugador como dict; {} si está vacío o corrupto (no aborta el lote)"""
+    if not datos_json_str:
+        return {}
+    try:
+        datos = json.loads(datos_json_str)
+    except ValueError:
+        print(f"⚠️ datos_json corrupto para {nombre}, se reinicia")
+        return {}
+    return datos if isinstance(datos, dict) else {}
+
+
+def _observacion_partido(jugador_data, partido_data):
+    """Entrada de 'partidos_observados' en datos_json"""
+    return {
+        'partido_id': partido_data['id'],
+        'fecha': partido_data['fecha'],
+        'fue_titular': jugador_data.get('es_titular', True)
+    }
+
+
+def _params_update_scraper(jugador_data, partido_data, datos_adicionales, jugador_id, fecha_visto):
+    return (
+        jugador_data.get('numero', ''),
+        jugador_data.get('imagen_url', ''),
+        partido_data.get('escudo_equipo', ''),
+        partido_data['id'],
+        fecha_visto,
+        partido_data.get('besoccer_id', ''),
+        json.dumps(datos_adicionales),
+        jugador_data.get('posicion', ''),
+        jugador_id
+    )
+
+
+def _params_insert_scraper(jugador_data, partido_data, scout_usuario, datos_adicionales,
+                           fecha_visto, fecha_agregado, veces_observado=1):
+    return (
+        jugador_data['nombre'],
+        partido_data['equipo'],
+        jugador_data.get('posicion', 'Por determinar'),
+        jugador_data.get('numero', ''),
+        jugador_data.get('imagen_url', ''),
+        partido_data.get('escudo_equipo', ''),
+        partido_data['id'],
+        fecha_visto,
+        scout_usuario,
+        partido_data.get('besoccer_id', ''),
+        json.dumps(datos_adicionales),
+        fecha_agregado,
+        'Nuevo',
+        veces_observado,
+        jugador_data['nombre'],  # nombre_completo
+        0  # nota_general inicial
+    )
+
+
 def actualizar_jugador_desde_scraper(jugador_data, partido_data, scout_usuario):
     """
     Actualiza o crea un jugador con datos del scraper de alineaciones
@@ -86,7 +196,7 @@ def actualizar_jugador_desde_scraper(jugador_data, partido_data, scout_usuario):
         scout_usuario: usuario que está haciendo scouting
     """
     try:
-        conn = sqlite3.connect('data/jugadores.db', timeout=20.0)
+        conn = conectar('data/jugadores.db', timeout=20.0)
         conn.execute("PRAGMA busy_timeout = 10000")  # 10 segundos
         cursor = conn.cursor()
         
@@ -110,84 +220,31 @@ def actualizar_jugador_desde_scraper(jugador_data, partido_data, scout_usuario):
             if 'partidos_observados' not in datos_adicionales:
                 datos_adicionales['partidos_observados'] = []
             
-            datos_adicionales['partidos_observados'].append({
-                'partido_id': partido_data['id'],
-                'fecha': partido_data['fecha'],
-                'fue_titular': jugador_data.get('es_titular', True)
-            })
+            datos_adicionales['partidos_observados'].append(_observacion_partido(jugador_data, partido_data))
             
             # Actualizar registro con reintentos
-            update_query = """
-                UPDATE jugadores_observados
-                SET numero_camiseta = COALESCE(?, numero_camiseta),
-                    imagen_url = ?,
-                    escudo_equipo = ?,
-                    ultimo_partido_id = ?,
-                    ultima_fecha_visto = ?,
-                    veces_observado = veces_observado + 1,
-                    besoccer_id = COALESCE(?, besoccer_id),
-                    datos_json = ?,
-                    posicion = COALESCE(?, posicion)
-                WHERE id = ?
-            """
-            
-            params = (
-                jugador_data.get('numero', ''),
-                jugador_data.get('imagen_url', ''),
-                partido_data.get('escudo_equipo', ''),
-                partido_data['id'],
-                datetime.now().strftime('%Y-%m-%d'),
-                partido_data.get('besoccer_id', ''),
-                json.dumps(datos_adicionales),
-                jugador_data.get('posicion', ''),
-                jugador_id
+            params = _params_update_scraper(
+                jugador_data, partido_data, datos_adicionales, jugador_id,
+                datetime.now().strftime('%Y-%m-%d')
             )
             
-            ejecutar_con_reintentos(conn, update_query, params)
+            ejecutar_con_reintentos(conn, UPDATE_JUGADOR_SCRAPER, params)
             
             print(f"✅ Actualizado: {jugador_data['nombre']} (observado {veces_observado + 1} veces)")
             
         else:
             # CREAR nuevo jugador
             datos_adicionales = {
-                'partidos_observados': [{
-                    'partido_id': partido_data['id'],
-                    'fecha': partido_data['fecha'],
-                    'fue_titular': jugador_data.get('es_titular', True)
-                }],
+                'partidos_observados': [_observacion_partido(jugador_data, partido_data)],
                 'origen': 'scraper_alineaciones'
             }
             
-            insert_query = """
-                INSERT INTO jugadores_observados (
-                    jugador, equipo, posicion, numero_camiseta,
-                    imagen_url, escudo_equipo, ultimo_partido_id,
-                    ultima_fecha_visto, scout_agregado, besoccer_id,
-                    datos_json, fecha_agregado, estado, veces_observado,
-                    nombre_completo, nota_general
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """
-            
-            params = (
-                jugador_data['nombre'],
-                partido_data['equipo'],
-                jugador_data.get('posicion', 'Por determinar'),
-                jugador_data.get('numero', ''),
-                jugador_data.get('imagen_url', ''),
-                partido_data.get('escudo_equipo', ''),
-                partido_data['id'],
-                datetime.now().strftime('%Y-%m-%d'),
-                scout_usuario,
-                partido_data.get('besoccer_id', ''),
-                json.dumps(datos_adicionales),
-                datetime.now(),
-                'Nuevo',
-                1,
-                jugador_data['nombre'],  # nombre_completo
-                0  # nota_general inicial
+            params = _params_insert_scraper(
+                jugador_data, partido_data, scout_usuario, datos_adicionales,
+                datetime.now().strftime('%Y-%m-%d'), datetime.now()
             )
             
-            ejecutar_con_reintentos(conn, insert_query, params)
+            ejecutar_con_reintentos(conn, INSERT_JUGADOR_SCRAPER, params)
             
             print(f"✅ Nuevo jugador: {jugador_data['nombre']} ({partido_data['equipo']})")
         
@@ -201,11 +258,134 @@ def actualizar_jugador_desde_scraper(jugador_data, partido_data, scout_usuario):
         return False
 
 
-def procesar_alineaciones_completas(partido_data, alineacion_local, alineacion_visitante, scout_usuario):
+def actualizar_jugadores_desde_scraper_lote(entradas, scout_usuario, max_reintentos=5,
+                                            db_path=RUTA_JUGADORES_DB):
     """
-    Procesa todas las alineaciones de un partido
+    Versión por lotes de actualizar_jugador_desde_scraper: una conexión,
+    una consulta para leer los jugadores existentes de los equipos
+    implicados y todas las escrituras con executemany en una sola
+    transacción.
+    
+    Args:
+        entradas: lista de (jugador_data, partido_data) con partido_data['equipo']
+        scout_usuario: usuario que está haciendo scouting
+        db_path: jugadores.db en la que escribir
+    
+    Returns:
+        int: número de jugadores procesados
     """
-    jugadores_procesados = 0
+    entradas = [(j, p) for j, p in entradas if j.get('nombre')]
+    if not entradas:
+        return 0
+    
+    equipos = sorted({p['equipo'] for _, p in entradas})
+    fecha_visto = datetime.now().strftime('%Y-%m-%d')
+    fecha_agregado = datetime.now()
+    
+    conn = conectar(db_path, timeout=20.0)
+    try:
+        for intento in range(max_reintentos):
+            try:
+                # Bloqueo de escritura desde el principio: nadie puede colarse
+                # entre la lectura de los existentes y las escrituras
+                conn.execute("BEGIN IMMEDIATE")
+                
+                # Jugadores ya observados de ambos equipos (el primero por nombre, como en la versión individual)
+                existentes = {}
+                marcadores = ', '.join('?' * len(equipos))
+                for jugador_id, nombre, equipo, veces, datos_json_str in conn.execute(f"""
+                    SELECT id, jugador, equipo, veces_observado, datos_json
+                    FROM jugadores_observados
+                    WHERE equipo IN ({marcadores})
+                    ORDER BY id
+                """, equipos):
+                    existentes.setdefault((nombre, equipo), [jugador_id, veces or 0, datos_json_str, None])
+                
+                updates = []
+                nuevos = {}
+                for jugador_data, partido_data in entradas:
+                    clave = (jugador_data['nombre'], partido_data['equipo'])
+                    observacion = _observacion_partido(jugador_data, partido_data)
+                    
+                    if clave in existentes:
+                        registro = existentes[clave]
+                        if registro[3] is None:
+                            registro[3] = _datos_json_o_vacio(registro[2], clave[0])
+                        datos_adicionales = registro[3]
+                        datos_adicionales.setdefault('partidos_observados', []).append(observacion)
+                        registro[1] += 1
+                        updates.append(_params_update_scraper(
+                            jugador_data, partido_data, datos_adicionales, registro[0], fecha_visto))
+                        print(f"✅ Actualizado: {clave[0]} (observado {registro[1]} veces)")
+                    
+                    elif clave in nuevos:
+                        # Repetido dentro del mismo lote: se aplica sobre la inserción
+                        # pendiente lo mismo que haría UPDATE_JUGADOR_SCRAPER
+                        datos_adicionales, params = nuevos[clave]
+                        datos_adicionales['partidos_observados'].append(observacion)
+                        nuevos_valores = _params_update_scraper(
+                            jugador_data, partido_data, datos_adicionales, None, fecha_visto)
+                        for indice_insert, indice_update, coalesce in _CAMPOS_REPETIDO_LOTE:
+                            valor = nuevos_valores[indice_update]
+                            if valor is not None or not coalesce:
+                                params[indice_insert] = valor
+                        params[13] += 1  # veces_observado
+                        print(f"✅ Actualizado: {clave[0]} (observado {params[13]} veces)")
+                    
+                    else:
+                        datos_adicionales = {
+                            'partidos_observados': [observacion],
+                            'origen': 'scraper_alineaciones'
+                        }
+                        nuevos[clave] = [datos_adicionales, list(_params_insert_scraper(
+                            jugador_data, partido_data, scout_usuario, datos_adicionales,
+                            fecha_visto, fecha_agregado))]
+                        print(f"✅ Nuevo jugador: {clave[0]} ({clave[1]})")
+                
+                # Los datos_json se serializan al final para reflejar todo el lote
+                inserts = []
+                for datos_adicionales, params in nuevos.values():
+                    params[10] = json.dumps(datos_adicionales)
+                    inserts.append(tuple(params))
+                
+                if updates:
+                    conn.executemany(UPDATE_JUGADOR_SCRAPER, updates)
+                if inserts:
+                    conn.executemany(INSERT_JUGADOR_SCRAPER, inserts)
+                conn.commit()
+                
+                return len(entradas)
+            
+            except sqlite3.OperationalError as e:
+                conn.rollback()
+                if "locked" in str(e) and intento < max_reintentos - 1:
+                    print(f"⚠️ Base de datos bloqueada, reintentando en {0.5 * (intento + 1)} segundos...")
+                    time.sleep(0.5 * (intento + 1))
+                    continue
+                raise
+    finally:
+        conn.close()
+
+
+def _firma_alineaciones(alineacion_local, alineacion_visitante):
+    """Hash de las dos alineaciones para detectar si han cambiado"""
+    datos = json.dumps([alineacion_local, alineacion_visitante], sort_keys=True, default=str)
+    return hashlib.sha1(datos.encode('utf-8')).hexdigest()
+
+def procesar_alineaciones_completas(partido_data, alineacion_local, alineacion_visitante, scout_usuario,
+                                    db_path=RUTA_JUGADORES_DB):
+    """
+    Procesa todas las alineaciones de un partido en una sola transacción.
+    Si ya se volcaron exactamente las mismas alineaciones para ese partido y
+    scout no se vuelve a escribir nada.
+    """
+    clave = (db_path, partido_data.get('id'), partido_data.get('fecha'), scout_usuario)
+    firma = _firma_alineaciones(alineacion_local, alineacion_visitante)
+    with _alineaciones_lock:
+        if _alineaciones_volcadas.get(clave) == firma:
+            _alineaciones_volcadas.move_to_end(clave)
+            print(f"⏭️ Alineaciones sin cambios para {partido_data.get('id')}, no se vuelven a guardar")
+            return 0
     
     # Preparar datos del partido para equipo local
     partido_local = {
@@ -214,11 +394,6 @@ def procesar_alineaciones_completas(partido_data, alineacion_local, alineacion_v
         'escudo_equipo': partido_data.get('escudo_local', '')
     }
     
-    # Procesar equipo local
-    for jugador in alineacion_local:
-        if actualizar_jugador_desde_scraper(jugador, partido_local, scout_usuario):
-            jugadores_procesados += 1
-    
     # Preparar datos del partido para equipo visitante
     partido_visitante = {
         **partido_data,
@@ -226,107 +401,58 @@ def procesar_alineaciones_completas(partido_data, alineacion_local, alineacion_v
         'escudo_equipo': partido_data.get('escudo_visitante', '')
     }
     
-    # Procesar equipo visitante
-    for jugador in alineacion_visitante:
-        if actualizar_jugador_desde_scraper(jugador, partido_visitante, scout_usuario):
-            jugadores_procesados += 1
+    entradas = [(jugador, partido_local) for jugador in alineacion_local]
+    entradas += [(jugador, partido_visitante) for jugador in alineacion_visitante]
+    
+    try:
+        jugadores_procesados = actualizar_jugadores_desde_scraper_lote(entradas, scout_usuario, db_path=db_path)
+        with _alineaciones_lock:
+            _alineaciones_volcadas[clave] = firma
+            _alineaciones_volcadas.move_to_end(clave)
+            while len(_alineaciones_volcadas) > MAX_ALINEACIONES_VOLCADAS:
+                _alineaciones_volcadas.popitem(last=False)
+    except Exception as e:
+        print(f"❌ Error procesando alineaciones: {e}")
+        import traceback
+        traceback.print_exc()
+        jugadores_procesados = 0
     
     print(f"📊 Total jugadores procesados: {jugadores_procesados}")
     return jugadores_procesados
 
-def actualizar_estadisticas_desde_informes(nombre_jugador, equipo):
+def actualizar_estadisticas_desde_informes(nombre_jugador, equipo, informe_id=None):
     """
-    VERSIÓN CORREGIDA: Actualiza las estadísticas con promedio ponderado
+    VERSIÓN CORREGIDA: Actualiza las estadísticas con promedio ponderado.
+    Con `informe_id` solo se suma ese informe a los agregados del jugador,
+    sin recorrer su historial; sin él se recalculan desde todos sus informes.
     """
     try:
-        conn = sqlite3.connect('data/jugadores.db', timeout=20.0)
-        conn.execute("PRAGMA busy_timeout = 10000")
-        cursor = conn.cursor()
+        # jugadores.db con partidos.db adjunta: jugador e informe en una sola consulta
+        conn = conectar_unificada()
         
-        # Primero verificar que el jugador existe
-        cursor.execute("""
-            SELECT id FROM jugadores_observados 
-            WHERE jugador = ? AND equipo = ?
-        """, (nombre_jugador, equipo))
+        if informe_id is None:
+            jugador = conn.execute("""
+                SELECT id FROM jugadores_observados 
+                WHERE jugador = ? AND equipo = ?
+            """, (nombre_jugador, equipo)).fetchone()
+            if jugador:
+                reconstruir_agregados(conn, None, nombre_jugador, equipo)
+        else:
+            jugador = informe_de_jugador(conn, informe_id, nombre_jugador, equipo)
+            if jugador:
+                sumar_informe(conn, *jugador, informe_id=informe_id)
         
-        jugador = cursor.fetchone()
         if not jugador:
             print(f"⚠️ Jugador {nombre_jugador} no encontrado en Base Personal")
+            conn.close()
             return False
         
-        jugador_id = jugador[0]
-        
-        # Conectar a partidos.db para obtener informes
-        conn_partidos = sqlite3.connect('data/partidos.db', timeout=20.0)
-        conn_partidos.execute("PRAGMA busy_timeout = 10000")
-        cursor_partidos = conn_partidos.cursor()
-        
-        # Obtener TODOS los informes con sus tipos para calcular promedio ponderado
-        cursor_partidos.execute("""
-            SELECT 
-                nota_general,
-                tipo_evaluacion,
-                recomendacion
-            FROM informes_scouting
-            WHERE jugador_nombre = ? AND equipo = ?
-        """, (nombre_jugador, equipo))
-        
-        informes = cursor_partidos.fetchall()
-        conn_partidos.close()
+        conn.commit()
         
-        if informes:
-            # Calcular promedio ponderado
-            notas = []
-            pesos = []
-            recomendaciones = []
-            
-            for nota, tipo, recomendacion in informes:
-                if nota and nota > 0:
-                    # Ponderar más los análisis completos
-                    peso = 2.0 if tipo == 'video_completo' else 1.0
-                    notas.append(float(nota))
-                    pesos.append(peso)
-                    recomendaciones.append(recomendacion)
-            
-            if notas:
-                # Promedio ponderado
-                total_peso = sum(pesos)
-                promedio = sum(n * p for n, p in zip(notas, pesos)) / total_peso
-                mejor = max(notas)
-                peor = min(notas)
-                total = len(informes)
-                
-                # Determinar recomendación final
-                if recomendaciones.count('fichar') >= total/2:
-                    recomendacion_final = 'fichar'
-                elif recomendaciones.count('descartar') >= total/2:
-                    recomendacion_final = 'descartar'
-                else:
-                    recomendacion_final = 'seguir_observando'
-                
-                # Actualizar jugador con reintentos
-                update_query = """
-                    UPDATE jugadores_observados
-                    SET nota_promedio = ?,
-                        mejor_nota = ?,
-                        peor_nota = ?,
-                        total_informes = ?,
-                        nota_general = ?
-                    WHERE id = ?
-                """
-                
-                params = (
-                    round(promedio, 1),
-                    mejor,
-                    peor,
-                    total,
-                    round(promedio, 0),  # nota_general como entero
-                    jugador_id
-                )
-                
-                ejecutar_con_reintentos(conn, update_query, params)
-                
-                print(f"✅ Estadísticas actualizadas para {nombre_jugador}: Promedio {promedio:.1f} (ponderado), Total informes: {total}")
+        promedio, total = conn.execute(
+            "SELECT nota_promedio, total_informes FROM jugadores_observados WHERE id = ?", (jugador[0],)
+        ).fetchone()
+        print(f"✅ Estadísticas actualizadas para {nombre_jugador}: Promedio {promedio} (ponderado), Total informes: {total}")
         
         conn.close()
         return True
@@ -349,7 +475,7 @@ def actualizar_estadisticas_desde_informes(nombre_jugador, equipo):
         informe_id: ID del informe recién creado
     """
     try:
-        conn = sqlite3.connect('data/jugadores.db', timeout=20.0)
+        conn = conectar('data/jugadores.db', timeout=20.0)
         conn.execute("PRAGMA busy_timeout = 10000")
         cursor = conn.cursor()
         
@@ -517,7 +643,7 @@ def actualizar_jugador_desde_informe(jugador_data, partido_data, scout_usuario,
     Si se pasa datos_extra (del scraper BeSoccer), se actualizan edad, nacionalidad, liga, pie, altura y peso.
     """
     try:
-        conn = sqlite3.connect('data/jugadores.db', timeout=20.0)
+        conn = conectar('data/jugadores.db', timeout=20.0)
         conn.execute("PRAGMA busy_timeout = 10000")
         cursor = conn.cursor()
 
@@ -689,7 +815,7 @@ def actualizar_jugador_desde_informe(jugador_data, partido_data, scout_usuario,
             print(f"✅ Nuevo jugador añadido desde informe: {jugador_data['nombre']} ({jugador_data['equipo']})")
         
         conn.close()
-        actualizar_estadisticas_desde_informes(jugador_data['nombre'], jugador_data['equipo'])
+        actualizar_estadisticas_desde_informes(jugador_data['nombre'], jugador_data['equipo'], informe_id)
         return True
     except Exception as e:
         print(f"❌ Error actualizando jugador desde informe: {e}")
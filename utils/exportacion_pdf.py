@@ -0,0 +1,224 @@
+# utils/exportacion_pdf.py
+"""
+Exportación por lotes de informes de scouting a PDF (dossier).
+
+Los PDFs se generan con `PDFGenerator.generar_informe_pdf` en procesos
+aparte (matplotlib/mplsoccer y FPDF no liberan el GIL), con un máximo de
+`max_en_vuelo` informes encargados a la vez para limitar la memoria: cada
+PDF se escribe en el ZIP de salida en cuanto llega y se descarta. Sin
+destino, el ZIP se va escribiendo en un SpooledTemporaryFile (en memoria
+hasta MAX_BYTES_EN_MEMORIA, después en disco) y sus bytes se leen una
+sola vez al final para devolverlos.
+
+Si un proceso de trabajo muere (falta de memoria, fallo en matplotlib) el
+pool queda roto: los informes que faltaban se marcan como fallidos y se
+entregan los PDFs ya generados.
+
+Con pypdf instalado también se puede pedir un único PDF con todos los
+informes en orden (en ese caso los PDFs se guardan en memoria hasta el
+final para unirlos); sin pypdf se entrega siempre el ZIP.
+
+Uso:
+    exportar_informes([12, 15, 31], progreso=callback)  # -> dict con 'contenido'
+    python -m utils.exportacion_pdf 12 15 31 --salida dossier.zip [--formato pdf]
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import zipfile
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from common.consultas import informes_con_jugador
+
+try:
+    from pypdf import PdfReader, PdfWriter
+    PYPDF_DISPONIBLE = True
+except ImportError:
+    PYPDF_DISPONIBLE = False
+
+logger = logging.getLogger(__name__)
+
+FORMATO_ZIP = 'zip'
+FORMATO_PDF = 'pdf'
+MAX_PROCESOS = 4
+EN_VUELO_POR_PROCESO = 2
+MAX_BYTES_EN_MEMORIA = 16 * 1024 * 1024  # del ZIP sin destino, antes de pasar a disco
+
+# Generador de cada proceso de trabajo (se crea una vez por proceso)
+_generador = None
+
+
+def _inicializar_proceso():
+    global _generador
+    import matplotlib
+    matplotlib.use('Agg')
+    from utils.pdf_generator import PDFGenerator
+    _generador = PDFGenerator()
+
+
+def _renderizar(informe, jugador):
+    """(bytes del PDF, None) o (None, error); se ejecuta en el proceso de trabajo"""
+    try:
+        if isinstance(informe.get('metricas'), str):
+            try:
+                informe['metricas'] = json.loads(informe['metricas'])
+            except ValueError:
+                informe['metricas'] = {}
+        pdf = _generador.generar_informe_pdf(informe, jugador)
+        return (pdf, None) if pdf else (None, "el generador no devolvió contenido")
+    except Exception as e:
+        return None, str(e)
+
+
+def nombre_fichero(informe, orden=None):
+    """Informe_<jugador>_<fecha>.pdf, con prefijo de orden si se indica"""
+    jugador = (informe.get('jugador_nombre') or 'Jugador').replace(' ', '_').replace('/', '_')
+    fecha = str(informe.get('fecha_creacion') or '')[:10] or 'sin_fecha'
+    prefijo = f"{orden:02d}_" if orden is not None else ''
+    return f"{prefijo}Informe_{jugador}_{fecha}_{informe['id']}.pdf"
+
+
+def _unir_pdfs(pdfs, destino):
+    escritor = PdfWriter()
+    for contenido in pdfs:
+        for pagina in PdfReader(io.BytesIO(contenido)).pages:
+            escritor.add_page(pagina)
+    escritor.write(destino)
+
+
+def exportar_informes(informe_ids, formato=FORMATO_ZIP, destino=None, progreso=None,
+                      max_procesos=None, max_en_vuelo=None):
+    """
+    Genera los PDFs de varios informes en paralelo y los entrega en un ZIP
+    (o en un único PDF si formato='pdf' y pypdf está disponible).
+
+    Args:
+        informe_ids: ids de informes_scouting, en el orden del dossier
+        formato: FORMATO_ZIP o FORMATO_PDF
+        destino: ruta o fichero binario de salida; si es None el resultado
+            se devuelve en 'contenido' (el ZIP se prepara en un fichero
+            temporal a partir de MAX_BYTES_EN_MEMORIA)
+        progreso: función (hechos, total, informe) llamada al terminar cada
+            informe, desde el hilo que llama
+        max_procesos: procesos de trabajo (por defecto hasta MAX_PROCESOS)
+        max_en_vuelo: informes encargados a la vez (por defecto 2 por proceso)
+
+    Returns:
+        dict con formato, generados, fallidos [(id, error)], segundos y
+        contenido (bytes) si no se indicó destino
+    """
+    if formato == FORMATO_PDF and not PYPDF_DISPONIBLE:
+        logger.warning("⚠️ pypdf no está instalado: el dossier se exporta como ZIP")
+        formato = FORMATO_ZIP
+
+    inicio = time.time()
+    pares = informes_con_jugador(informe_ids)
+    total = len(pares)
+    procesos = max(1, min(max_procesos or MAX_PROCESOS, os.cpu_count() or 1, total or 1))
+    max_en_vuelo = max(1, max_en_vuelo or procesos * EN_VUELO_POR_PROCESO)
+
+    salida = destino if destino is not None else tempfile.SpooledTemporaryFile(max_size=MAX_BYTES_EN_MEMORIA)
+    archivo_zip = zipfile.ZipFile(salida, 'w', zipfile.ZIP_DEFLATED) if formato == FORMATO_ZIP else None
+    pdfs = {}
+    fallidos = []
+    hechos = 0
+
+    try:
+        # spawn: el proceso de Streamlit tiene hilos y no es seguro hacer fork
+        contexto = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=procesos, mp_context=contexto,
+                                 initializer=_inicializar_proceso) as pool:
+            pendientes = {}
+            cola = iter(enumerate(pares, start=1))
+            agotada = False
+
+            while pendientes or not agotada:
+                while not agotada and len(pendientes) < max_en_vuelo:
+                    siguiente = next(cola, None)
+                    if siguiente is None:
+                        agotada = True
+                        break
+                    orden, (informe, jugador) = siguiente
+                    try:
+                        pendientes[pool.submit(_renderizar, informe, jugador)] = (orden, informe)
+                    except BrokenProcessPool:
+                        # Un proceso murió: lo que queda por encargar ya no se puede generar
+                        sin_generar = [informe] + [inf for _, (inf, _) in cola]
+                        for inf in sin_generar:
+                            fallidos.append((inf['id'], "el proceso de trabajo terminó inesperadamente"))
+                            hechos += 1
+                            if progreso:
+                                progreso(hechos, total, inf)
+                        logger.error(f"❌ Pool de procesos roto: {len(sin_generar)} informes sin generar")
+                        agotada = True
+                        break
+
+                if not pendientes:
+                    break
+
+                terminados, _ = wait(pendientes, return_when=FIRST_COMPLETED)
+                for futuro in terminados:
+                    orden, informe = pendientes.pop(futuro)
+                    try:
+                        pdf, error = futuro.result()
+                    except Exception as e:
+                        pdf, error = None, str(e)
+
+                    if pdf is None:
+                        fallidos.append((informe['id'], error))
+                        logger.error(f"❌ Informe #{informe['id']} sin PDF: {error}")
+                    elif archivo_zip is not None:
+                        archivo_zip.writestr(nombre_fichero(informe, orden), pdf)
+                    else:
+                        pdfs[orden] = pdf
+
+                    hechos += 1
+                    if progreso:
+                        progreso(hechos, total, informe)
+
+        if archivo_zip is None and pdfs:
+            _unir_pdfs([pdfs[orden] for orden in sorted(pdfs)], salida)
+    finally:
+        if archivo_zip is not None:
+            archivo_zip.close()
+
+    resumen = {
+        'formato': formato,
+        'generados': total - len(fallidos),
+        'fallidos': fallidos,
+        'segundos': time.time() - inicio,
+    }
+    if destino is None:
+        salida.seek(0)
+        resumen['contenido'] = salida.read()
+        salida.close()
+    logger.info(f"📦 Dossier {formato.upper()}: {resumen['generados']}/{total} informes "
+                f"en {resumen['segundos']:.1f}s con {procesos} procesos")
+    return resumen
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Exporta varios informes de scouting a PDF")
+    parser.add_argument('ids', nargs='+', type=int, help="ids de informes_scouting")
+    parser.add_argument('--salida', required=True, help="fichero ZIP o PDF de salida")
+    parser.add_argument('--formato', choices=[FORMATO_ZIP, FORMATO_PDF], default=FORMATO_ZIP)
+    parser.add_argument('--procesos', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(message)s')
+    resumen = exportar_informes(
+        args.ids, args.formato, args.salida, max_procesos=args.procesos,
+        progreso=lambda hechos, total, informe: print(f"📄 {hechos}/{total} #{informe['id']}"))
+    return 0 if not resumen['fallidos'] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,117 +7,86 @@ import os
 import re
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.styles import ParagraphStyle
 from reportlab.lib.units import inch, cm
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image, PageBreak
 from reportlab.platypus.flowables import HRFlowable
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT, TA_JUSTIFY
 from reportlab.pdfgen import canvas
 from datetime import datetime
-import tempfile
-from PIL import Image as PILImage
-import requests
 from io import BytesIO
 import pandas as pd
-from fpdf import FPDF
 from mplsoccer import Radar
 import matplotlib.pyplot as plt
 import numpy as np
-import tempfile
 import os
 import json
 
+from utils.cache_radares import radar_png
+from utils.cache_imagenes import MODO_AJUSTAR, imagen_buffer
+from common.plantilla_pdf import COLOR_PRIMARIO, PlantillaPDF, obtener_plantilla_pdf
+
 # Obtener el directorio padre para las rutas
 current_dir = os.path.dirname(os.path.abspath(__file__))
 parent_dir = os.path.dirname(current_dir)
 
+def crear_estilos_informe(styles):
+    """Estilos propios de los informes sobre la hoja base de reportlab"""
+    # Estilo para título principal
+    styles.add(ParagraphStyle(
+        name='CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=24,
+        textColor=COLOR_PRIMARIO,
+        spaceAfter=30,
+        alignment=TA_CENTER
+    ))
+    
+    # Estilo para subtítulos
+    styles.add(ParagraphStyle(
+        name='CustomHeading',
+        parent=styles['Heading2'],
+        fontSize=16,
+        textColor=COLOR_PRIMARIO,
+        spaceAfter=12,
+        spaceBefore=12
+    ))
+    
+    # Estilo para texto normal
+    styles.add(ParagraphStyle(
+        name='CustomBody',
+        parent=styles['BodyText'],
+        fontSize=12,
+        textColor=colors.black,
+        alignment=TA_JUSTIFY,
+        spaceAfter=12
+    ))
+    
+    # Estilo para información destacada
+    styles.add(ParagraphStyle(
+        name='InfoBox',
+        parent=styles['BodyText'],
+        fontSize=12,
+        textColor=COLOR_PRIMARIO,
+        alignment=TA_LEFT,
+        leftIndent=20,
+        spaceAfter=6
+    ))
+    return styles
+
+
 class PDFGenerator:
-    def __init__(self, logo_path="assets/images/identidad_MPR_1.png"):
-        self.logo_path = logo_path
-        self.primary_color = colors.HexColor("#24282a")
-        self.secondary_color = colors.HexColor("#007bff")  # Color de acento
-        
-        # Estilos personalizados
-        self.styles = getSampleStyleSheet()
-        
-        # Estilo para título principal
-        self.styles.add(ParagraphStyle(
-            name='CustomTitle',
-            parent=self.styles['Heading1'],
-            fontSize=24,
-            textColor=self.primary_color,
-            spaceAfter=30,
-            alignment=TA_CENTER
-        ))
-        
-        # Estilo para subtítulos
-        self.styles.add(ParagraphStyle(
-            name='CustomHeading',
-            parent=self.styles['Heading2'],
-            fontSize=16,
-            textColor=self.primary_color,
-            spaceAfter=12,
-            spaceBefore=12
-        ))
-        
-        # Estilo para texto normal
-        self.styles.add(ParagraphStyle(
-            name='CustomBody',
-            parent=self.styles['BodyText'],
-            fontSize=12,
-            textColor=colors.black,
-            alignment=TA_JUSTIFY,
-            spaceAfter=12
-        ))
-        
-        # Estilo para información destacada
-        self.styles.add(ParagraphStyle(
-            name='InfoBox',
-            parent=self.styles['BodyText'],
-            fontSize=12,
-            textColor=self.primary_color,
-            alignment=TA_LEFT,
-            leftIndent=20,
-            spaceAfter=6
-        ))
+    def __init__(self, logo_path=None):
+        # Logo, estilos y cabeceras se preparan una vez por proceso en la plantilla
+        self.plantilla = obtener_plantilla_pdf() if logo_path is None else PlantillaPDF(logo_path)
+        self.logo_path = self.plantilla.logo_path
+        self.primary_color = self.plantilla.primary_color
+        self.secondary_color = self.plantilla.secondary_color
+        self.styles = self.plantilla.estilos('informe', crear_estilos_informe)
 
     def add_header_footer(self, canvas, doc):
         """Agrega header y footer a cada página"""
-        canvas.saveState()
-        
-        # Footer con logo MPR en esquina inferior derecha
-        if os.path.exists(self.logo_path):
-            try:
-                # Logo pequeño en esquina inferior derecha
-                logo_size = 0.8 * inch  # Tamaño pequeño
-                x_position = doc.width + doc.rightMargin - logo_size - 10
-                y_position = 15
-                
-                canvas.drawImage(self.logo_path, 
-                               x_position, 
-                               y_position,
-                               width=logo_size, 
-                               height=logo_size,
-                               preserveAspectRatio=True,
-                               mask='auto')
-            except Exception as e:
-                print(f"Error añadiendo logo: {e}")
-        
-        # Información del footer (centrada, arriba del logo)
-        canvas.setFont("Helvetica", 8)
-        canvas.setFillColor(colors.grey)
-        
-        # Fecha de generación a la izquierda
-        canvas.drawString(doc.leftMargin, 
-                         25, 
-                         f"Generado: {datetime.now().strftime('%d/%m/%Y %H:%M')}")
-        
-        # Número de página centrado
-        canvas.drawCentredString(doc.width / 2 + doc.leftMargin, 
-                                25, 
-                                f"Página {doc.page}")
-        
-        canvas.restoreState()
+        self.plantilla.pie_reportlab(canvas, doc)
     
     def _extraer_valor_wyscout(self, datos, columnas_posibles, tipo='texto'):
         """
@@ -197,87 +166,6 @@ class PDFGenerator:
         
         return url_original
     
-    # def crear_radar_chart_scout_individual(self, informe_data):
-        """
-        Crea un radar chart con mplsoccer para el informe individual.
-        Soporta métricas con categorías (video_completo) o simples (campo).
-        """
-        try:
-
-            print("🔍 DEBUG: Iniciando radar con mplsoccer")
-
-            # --- 1. Extraer métricas ---
-            metricas_raw = informe_data.get('metricas', {})
-            if isinstance(metricas_raw, str):
-                try:
-                    metricas = json.loads(metricas_raw)
-                except json.JSONDecodeError:
-                    print("❌ ERROR: No se pudo parsear métricas JSON")
-                    return None
-            else:
-                metricas = metricas_raw
-
-            if not metricas:
-                print("⚠ No hay métricas disponibles")
-                return None
-
-            # --- 2. Determinar si hay categorías ---
-            tiene_categorias = all(k in metricas for k in ['tecnicos', 'tacticos', 'fisicos', 'mentales'])
-            params, values = [], []
-
-            if tiene_categorias:
-                print("🔍 DEBUG: Radar de informe completo")
-                categorias = ['tecnicos', 'tacticos', 'fisicos', 'mentales']
-                labels = ['Técnico', 'Táctico', 'Físico', 'Mental']
-
-                for cat, label in zip(categorias, labels):
-                    valores = [v for v in metricas.get(cat, {}).values() if isinstance(v, (int, float))]
-                    promedio = np.mean(valores) if valores else 5
-                    params.append(label)
-                    values.append(promedio)
-            else:
-                print("🔍 DEBUG: Radar de informe campo")
-                for i, (k, v) in enumerate(metricas.items()):
-                    if isinstance(v, (int, float)) and i < 8:
-                        params.append(str(k)[:15])
-                        values.append(float(v))
-
-            if not params or not values:
-                print("⚠ No hay valores numéricos para radar")
-                return None
-
-            # --- 3. Crear radar ---
-            low = [0] * len(params)
-            high = [10] * len(params)
-
-            radar = Radar(
-                params, low, high,
-                num_rings=4, ring_width=1, center_circle_radius=1
-            )
-
-            fig, ax = radar.setup_axis()
-            radar.draw_circles(ax=ax, facecolor="#B8BABC", edgecolor="#24282a")
-            radar.draw_radar(
-                values, ax=ax,
-                kwargs_radar={'facecolor': '#007bff', 'alpha': 0.6},
-                kwargs_rings={'facecolor': "#048676", 'alpha': 0.2}
-            )
-            radar.draw_range_labels(ax=ax, fontsize=12)
-            radar.draw_param_labels(ax=ax, fontsize=14, fontweight='bold', color='#24282a')
-
-            # --- 4. Guardar radar ---
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.png') as tmp:
-                radar_path = tmp.name
-                plt.savefig(radar_path, dpi=150, bbox_inches='tight', facecolor='white')
-                plt.close(fig)
-
-            print(f"✅ Radar guardado en {radar_path}")
-            return radar_path
-
-        except Exception as e:
-            print(f"❌ ERROR Radar mplsoccer: {e}")
-            return None
-    
     def crear_radar_chart_scout_individual(self, informe_data):
         """
         Crea un radar chart con mplsoccer para el informe individual.
@@ -347,29 +235,25 @@ class PDFGenerator:
             print(f"🔍 DEBUG: Creando radar con {len(params)} parámetros: {params}")
             print(f"🔍 DEBUG: Valores: {values}")
 
-            radar = Radar(
-                params, low, high,
-                num_rings=4, ring_width=1, center_circle_radius=1
-            )
-
-            fig, ax = radar.setup_axis()
-            radar.draw_circles(ax=ax, facecolor="#B8BABC", edgecolor="#24282a")
-            radar.draw_radar(
-                values, ax=ax,
-                kwargs_radar={'facecolor': '#007bff', 'alpha': 0.6},
-                kwargs_rings={'facecolor': "#048676", 'alpha': 0.2}
-            )
-            radar.draw_range_labels(ax=ax, fontsize=12)
-            radar.draw_param_labels(ax=ax, fontsize=14, fontweight='bold', color='#24282a')
-
-            # --- 4. Guardar radar ---
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.png') as tmp:
-                radar_path = tmp.name
-                plt.savefig(radar_path, dpi=150, bbox_inches='tight', facecolor='white')
-                plt.close(fig)
-
-            print(f"✅ Radar guardado en {radar_path}")
-            return radar_path
+            def dibujar():
+                radar = Radar(
+                    params, low, high,
+                    num_rings=4, ring_width=1, center_circle_radius=1
+                )
+
+                fig, ax = radar.setup_axis()
+                radar.draw_circles(ax=ax, facecolor="#B8BABC", edgecolor="#24282a")
+                radar.draw_radar(
+                    values, ax=ax,
+                    kwargs_radar={'facecolor': '#007bff', 'alpha': 0.6},
+                    kwargs_rings={'facecolor': "#048676", 'alpha': 0.2}
+                )
+                radar.draw_range_labels(ax=ax, fontsize=12)
+                radar.draw_param_labels(ax=ax, fontsize=14, fontweight='bold', color='#24282a')
+                return fig
+
+            # --- 4. PNG del radar (caché por contenido) ---
+            return BytesIO(radar_png('pdf_scout_individual', params, values, dibujar))
 
         except Exception as e:
             print(f"❌ ERROR Radar mplsoccer: {e}")
@@ -509,7 +393,7 @@ class PDFGenerator:
                 # Escribir todas las métricas en una línea
                 if metricas_texto:
                     linea_metricas = " | ".join(metricas_texto)
-                    pdf.multi_cell(0, 5, linea_metricas, 0, 'L')
+                    pdf.multi_cell(0, 5, linea_metricas, 0, 'L', new_x="LMARGIN", new_y="NEXT")
                 
                 # Separador entre categorías
                 pdf.ln(3)
@@ -610,22 +494,14 @@ class PDFGenerator:
         
         return texto_limpio
     
-    def generar_informe_pdf(self, informe_data, jugador_data, datos_wyscout=None, radar_path=None):
+    def generar_informe_pdf(self, informe_data, jugador_data, datos_wyscout=None, imagen_radar=None):
         """
         Genera un PDF para un informe individual de scouting
         Acepta datos_wyscout que en realidad pueden ser datos de BeSoccer.
         """
         try:
-            from fpdf import FPDF
-            import tempfile
-            import os
-            from datetime import datetime
-            from PIL import Image as PILImage
-            import requests
-            from io import BytesIO
-
-            if radar_path is None:
-                radar_path = self.crear_radar_chart_scout_individual(informe_data)
+            if imagen_radar is None:
+                imagen_radar = self.crear_radar_chart_scout_individual(informe_data)
 
             # --- Datos del jugador con BeSoccer ---
             datos_besoccer = datos_wyscout or {}
@@ -677,29 +553,8 @@ class PDFGenerator:
             fecha_partido = informe_data.get("fecha_creacion", datetime.now().strftime("%Y-%m-%d"))[:10]
             nota_general = informe_data.get("nota_general", 0)
 
-            # Crear PDF
-            pdf = FPDF()
-            pdf.set_auto_page_break(auto=True, margin=15)
-            pdf.add_page()
-
-            # Logo (si existe)
-            logo_path = 'assets/images/identidad_MPR_1.png'
-            if os.path.exists(logo_path):
-                try:
-                    pdf.image(logo_path, x=185, y=10, w=15)
-                except:
-                    pass
-
-            # === HEADER ===
-            pdf.set_font('Helvetica', 'B', 20)
-            pdf.set_text_color(36, 40, 42)
-            pdf.cell(0, 12, 'INFORME INDIVIDUAL DE SCOUTING', 0, 1, 'C')
-
-            # Línea decorativa
-            pdf.set_draw_color(102, 126, 234)
-            pdf.set_line_width(0.5)
-            pdf.line(20, pdf.get_y(), 190, pdf.get_y())
-            pdf.ln(8)
+            # Crear PDF sobre la plantilla (logo, título y línea ya estampados)
+            pdf = self.plantilla.nuevo_fpdf('INFORME INDIVIDUAL DE SCOUTING')
 
             # === FOTO Y DATOS (LADO A LADO) ===
             y_inicio = pdf.get_y()
@@ -715,34 +570,9 @@ class PDFGenerator:
                     if "cdn.resfu.com" in imagen_url:
                         imagen_url = self._transformar_url_foto_para_pdf(imagen_url)
 
-                    if imagen_url.startswith('http'):
-                        response = requests.get(imagen_url, timeout=10)
-                        img = PILImage.open(BytesIO(response.content))
-                    else:
-                        img = PILImage.open(imagen_url)
-
-                    # Hacer cuadrada y redimensionar
-                    ancho, alto = img.size
-                    if ancho != alto:
-                        lado = min(ancho, alto)
-                        left = (ancho - lado) // 2
-                        top = (alto - lado) // 2
-                        img = img.crop((left, top, left + lado, top + lado))
-                    img = img.resize((500, 500), PILImage.Resampling.LANCZOS)
-
-                    # Convertir a RGB si es necesario
-                    if img.mode in ('RGBA', 'LA', 'P'):
-                        rgb_img = PILImage.new('RGB', img.size, (255, 255, 255))
-                        img = img.convert('RGBA') if img.mode == 'P' else img
-                        rgb_img.paste(img, mask=img.split()[-1] if img.mode == 'RGBA' else None)
-                        img = rgb_img
-
-                    # Guardar temporalmente
-                    with tempfile.NamedTemporaryFile(delete=False, suffix='.jpg') as temp_img:
-                        temp_path = temp_img.name
-                        img.save(temp_img, 'JPEG', quality=95)
-                    pdf.image(temp_path, x=x_foto, y=y_inicio, w=ancho_foto, h=ancho_foto)
-                    os.unlink(temp_path)
+                    foto = imagen_buffer(imagen_url, (500, 500))
+                    if foto is not None:
+                        pdf.image(foto, x=x_foto, y=y_inicio, w=ancho_foto, h=ancho_foto)
                 except Exception as e:
                     print(f"⚠️ Error con la imagen: {e}")
             else:
@@ -803,12 +633,11 @@ class PDFGenerator:
             pdf.cell(0, 8, f"NOTA GENERAL: {nota_general}/10", 0, 1, 'C')
 
             # Radar chart (si existe)
-            if radar_path and os.path.exists(radar_path):
+            if imagen_radar:
                 ancho_radar = 170
                 x_radar = (pdf.w - ancho_radar) / 2
-                pdf.image(radar_path, x=x_radar, y=pdf.get_y() + 5, w=ancho_radar, h=ancho_radar)
+                pdf.image(imagen_radar, x=x_radar, y=pdf.get_y() + 5, w=ancho_radar, h=ancho_radar)
                 pdf.set_y(pdf.get_y() + ancho_radar + 15)
-                os.unlink(radar_path)
             else:
                 print("⚠️ Radar chart no generado.")
 
@@ -831,7 +660,7 @@ class PDFGenerator:
                     # obs_dict: {'regates': 8, 'pases': 7, …}
                     textos = [f"{metrica}: {valor}" for metrica, valor in obs_dict.items()]
                     linea = "; ".join(textos) if textos else "Sin observaciones"
-                    pdf.multi_cell(0, 6, f"{nombre_cat}: {linea}")
+                    pdf.multi_cell(0, 6, f"{nombre_cat}: {linea}", new_x="LMARGIN", new_y="NEXT")
                 pdf.ln(5)
 
             # === OBSERVACIONES DEL SCOUT ===
@@ -849,14 +678,14 @@ class PDFGenerator:
                     # lista de métricas
                     pdf.set_font('Helvetica', '', 10)
                     textos = [f"{metrica}: {valor}/10" for metrica, valor in obs_dict.items()]
-                    pdf.multi_cell(0, 5, "; ".join(textos))
+                    pdf.multi_cell(0, 5, "; ".join(textos), new_x="LMARGIN", new_y="NEXT")
                     pdf.ln(2)
 
             # 2) Observaciones generales
-            pdf.set_font('Helvetica', '','10')
-            pdf.multi_cell(0, 6, informe_data.get('observaciones', 'Sin observaciones'))
+            pdf.set_font('Helvetica', '', 10)
+            pdf.multi_cell(0, 6, informe_data.get('observaciones', 'Sin observaciones'), new_x="LMARGIN", new_y="NEXT")
 
-            return bytes(pdf.output(dest='latin-1'))
+            return bytes(pdf.output())
         except Exception as e:
             print(f"❌ Error generando PDF: {e}")
             return None
@@ -867,23 +696,11 @@ class PDFGenerator:
             return None
         
         try:
-            if imagen_url.startswith('http'):
-                # Descargar imagen
-                response = requests.get(imagen_url, timeout=5)
-                img = PILImage.open(BytesIO(response.content))
-            else:
-                # Imagen local
-                img = PILImage.open(imagen_url)
-            
-            # Redimensionar a tamaño apropiado
-            img.thumbnail((150, 150), PILImage.Resampling.LANCZOS)
-            
-            # Guardar temporalmente
-            temp_img = tempfile.NamedTemporaryFile(delete=False, suffix='.png')
-            img.save(temp_img.name, 'PNG')
-            
-            # Crear elemento Image de reportlab
-            return Image(temp_img.name, width=1.5*inch, height=1.5*inch)
+            # Miniatura de 150px (proporción original) desde la caché de imágenes
+            foto = imagen_buffer(imagen_url, (150, 150), modo=MODO_AJUSTAR, formato='PNG')
+            if foto is None:
+                return None
+            return Image(foto, width=1.5*inch, height=1.5*inch)
             
         except Exception as e:
             print(f"Error cargando imagen: {e}")
@@ -899,46 +716,11 @@ class PDFGenerator:
             if "cdn.resfu.com" in imagen_url:
                 imagen_url = self._transformar_url_foto_para_pdf(imagen_url)
             
-            if imagen_url.startswith('http'):
-                # Descargar imagen con timeout mayor
-                response = requests.get(imagen_url, timeout=10)
-                img = PILImage.open(BytesIO(response.content))
-            else:
-                # Imagen local
-                img = PILImage.open(imagen_url)
-            
-            # Procesar imagen para hacerla cuadrada (crop centrado)
-            ancho, alto = img.size
-            if ancho != alto:
-                # Calcular el tamaño del cuadrado (el lado menor)
-                lado = min(ancho, alto)
-                
-                # Calcular las coordenadas para centrar el crop
-                left = (ancho - lado) // 2
-                top = (alto - lado) // 2
-                right = left + lado
-                bottom = top + lado
-                
-                # Hacer el crop
-                img = img.crop((left, top, right, bottom))
-            
-            # Redimensionar a tamaño grande (300x300) con alta calidad
-            img = img.resize((300, 300), PILImage.Resampling.LANCZOS)
-            
-            # Convertir a RGB si es necesario (para evitar problemas con PNG transparentes)
-            if img.mode in ('RGBA', 'LA', 'P'):
-                rgb_img = PILImage.new('RGB', img.size, (255, 255, 255))
-                if img.mode == 'P':
-                    img = img.convert('RGBA')
-                rgb_img.paste(img, mask=img.split()[-1] if img.mode == 'RGBA' else None)
-                img = rgb_img
-            
-            # Guardar temporalmente con alta calidad
-            temp_img = tempfile.NamedTemporaryFile(delete=False, suffix='.jpg')
-            img.save(temp_img.name, 'JPEG', quality=95)
-            
-            # Crear elemento Image de reportlab con tamaño grande
-            return Image(temp_img.name, width=2.5*inch, height=2.5*inch)
+            # Recorte cuadrado centrado a 300x300 (JPEG calidad 95) desde la caché
+            foto = imagen_buffer(imagen_url, (300, 300))
+            if foto is None:
+                return None
+            return Image(foto, width=2.5*inch, height=2.5*inch)
             
         except Exception as e:
             print(f"Error cargando imagen mejorada: {e}")
@@ -1042,7 +824,11 @@ class PDFGenerator:
             valores = []
             etiquetas = ['Técnico', 'Táctico', 'Físico', 'Mental']
             
-            if isinstance(metricas_json, dict) and 'promedios' in metricas_json:
+            promedios_sql = informe_data.get('promedios_categorias') or {}
+            if all(cat in promedios_sql for cat in ['tecnicos', 'tacticos', 'fisicos', 'mentales']):
+                # Promedios calculados en SQL desde informe_metricas
+                valores = [promedios_sql[cat] for cat in ['tecnicos', 'tacticos', 'fisicos', 'mentales']]
+            elif isinstance(metricas_json, dict) and 'promedios' in metricas_json:
                 valores = [
                     metricas_json['promedios'].get('tecnicos', 5),
                     metricas_json['promedios'].get('tacticos', 5),
@@ -1054,48 +840,44 @@ class PDFGenerator:
                 nota = float(informe_data.get('nota_general', 5))
                 valores = [nota, nota, nota, nota]
             
-            # Configurar el radar
-            angles = np.linspace(0, 2 * np.pi, len(etiquetas), endpoint=False).tolist()
-            valores += valores[:1]  # Cerrar el polígono
-            angles += angles[:1]
-            
-            # Crear figura
-            fig, ax = plt.subplots(figsize=(6, 6), subplot_kw=dict(projection='polar'))
-            
-            # Configurar el área del gráfico
-            ax.set_theta_offset(np.pi / 2)
-            ax.set_theta_direction(-1)
-            
-            # Dibujar el radar
-            ax.plot(angles, valores, 'o-', linewidth=2, color='#667eea', markersize=8)
-            ax.fill(angles, valores, alpha=0.25, color='#667eea')
-            
-            # Configurar las etiquetas
-            ax.set_xticks(angles[:-1])
-            ax.set_xticklabels(etiquetas, size=11)
-            
-            # Configurar el rango
-            ax.set_ylim(0, 10)
-            ax.set_yticks([2, 4, 6, 8, 10])
-            ax.set_yticklabels(['2', '4', '6', '8', '10'], size=9)
-            ax.grid(True, linestyle='--', alpha=0.7)
-            
-            # Añadir valores
-            for angle, valor, etiqueta in zip(angles[:-1], valores[:-1], etiquetas):
-                ax.text(angle, valor + 0.3, f'{valor:.1f}', 
-                       horizontalalignment='center', verticalalignment='center',
-                       size=10, weight='bold')
-            
-            plt.tight_layout()
-            
-            # Guardar
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.png') as tmp_file:
-                tmp_path = tmp_file.name
-            
-            plt.savefig(tmp_path, dpi=150, bbox_inches='tight', facecolor='white')
-            plt.close()
+            def dibujar():
+                # Configurar el radar
+                angles = np.linspace(0, 2 * np.pi, len(etiquetas), endpoint=False).tolist()
+                valores_plot = valores + valores[:1]  # Cerrar el polígono
+                angles += angles[:1]
+                
+                # Crear figura
+                fig, ax = plt.subplots(figsize=(6, 6), subplot_kw=dict(projection='polar'))
+                
+                # Configurar el área del gráfico
+                ax.set_theta_offset(np.pi / 2)
+                ax.set_theta_direction(-1)
+                
+                # Dibujar el radar
+                ax.plot(angles, valores_plot, 'o-', linewidth=2, color='#667eea', markersize=8)
+                ax.fill(angles, valores_plot, alpha=0.25, color='#667eea')
+                
+                # Configurar las etiquetas
+                ax.set_xticks(angles[:-1])
+                ax.set_xticklabels(etiquetas, size=11)
+                
+                # Configurar el rango
+                ax.set_ylim(0, 10)
+                ax.set_yticks([2, 4, 6, 8, 10])
+                ax.set_yticklabels(['2', '4', '6', '8', '10'], size=9)
+                ax.grid(True, linestyle='--', alpha=0.7)
+                
+                # Añadir valores
+                for angle, valor, etiqueta in zip(angles[:-1], valores, etiquetas):
+                    ax.text(angle, valor + 0.3, f'{valor:.1f}', 
+                           horizontalalignment='center', verticalalignment='center',
+                           size=10, weight='bold')
+                
+                fig.tight_layout()
+                return fig
             
-            return tmp_path
+            # PNG del radar (caché por contenido)
+            return BytesIO(radar_png('pdf_radar_simple', etiquetas, valores, dibujar))
             
         except Exception as e:
             print(f"Error creando radar simple: {e}")
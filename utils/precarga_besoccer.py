@@ -0,0 +1,248 @@
+# utils/precarga_besoccer.py
+"""
+Precarga en segundo plano de los datos de BeSoccer.
+
+Cada `intervalo` segundos se descargan a la caché local (caché HTTP e índice
+de partidos en data/besoccer_cache.db):
+- los partidos de hoy y de mañana
+- las alineaciones (y los perfiles de sus jugadores) de los partidos de hoy
+  que ya han empezado o empiezan en menos de VENTANA_ALINEACIONES minutos
+- los perfiles de los jugadores de la lista de visualización que tienen
+  URL de BeSoccer en la Base Personal
+
+Así las páginas leen los partidos del índice local (`partidos_precargados`)
+en lugar de hacer scraping mientras el scout espera. El índice se da por
+bueno mientras la página de livescore de esa fecha siga vigente en la caché
+HTTP, por eso el intervalo es algo menor que su caducidad.
+
+Se arranca dentro del proceso de Streamlit con `iniciar_planificador()`
+(se puede desactivar con BESOCCER_PRECARGA=0) o como proceso aparte que
+comparte la carpeta data/:
+    python -m utils.precarga_besoccer [--intervalo SEGUNDOS] [--una-vez]
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import threading
+from datetime import datetime, timedelta
+
+from common.database import conectar
+from utils.besoccer_cache import obtener_cache_http, obtener_indice_partidos
+from utils.besoccer_scraper import BeSoccerScraper, BeSoccerAlineacionesScraper, precargar_jornada_en_segundo_plano
+
+logger = logging.getLogger(__name__)
+
+INTERVALO_POR_DEFECTO = 4 * 60  # algo menos que la caducidad del livescore del día
+DIAS_A_PRECARGAR = 2  # hoy y mañana
+VENTANA_ALINEACIONES = 75  # minutos antes del inicio en que se publican
+RUTA_LISTA_VISUALIZACION = "data/lista_visualizacion.json"
+RUTA_JUGADORES_DB = "data/jugadores.db"
+VARIABLE_ENTORNO = 'BESOCCER_PRECARGA'
+
+
+def _alineaciones_publicadas(partido, ahora=None):
+    """True si el partido ya empezó o empieza dentro de la ventana de alineaciones"""
+    if partido.get('estado') == 'finalizado':
+        return True
+    ahora = ahora or datetime.now()
+    try:
+        inicio = datetime.strptime(f"{partido.get('fecha')} {partido.get('hora')}", '%Y-%m-%d %H:%M')
+    except (TypeError, ValueError):
+        return False
+    return inicio - ahora <= timedelta(minutes=VENTANA_ALINEACIONES)
+
+
+def urls_perfiles_seguimiento(ruta_lista=RUTA_LISTA_VISUALIZACION, ruta_db=RUTA_JUGADORES_DB):
+    """URLs de BeSoccer de los jugadores de la lista de visualización que las tienen"""
+    try:
+        with open(ruta_lista, 'r', encoding='utf-8') as f:
+            jugadores = json.load(f).get('jugadores_seguimiento', [])
+    except (FileNotFoundError, json.JSONDecodeError):
+        return []
+
+    claves = [(j.get('jugador', ''), j.get('equipo', '')) for j in jugadores if j.get('jugador')]
+    if not claves or not os.path.exists(ruta_db):
+        return []
+
+    # Una sola consulta para toda la lista, por el índice (nombre_norm, equipo_norm)
+    valores = ', '.join(['(?, ?, ?)'] * len(claves))
+    params = [v for orden, (nombre, equipo) in enumerate(claves) for v in (orden, nombre, equipo)]
+    conn = conectar(ruta_db)
+    try:
+        filas = conn.execute(f'''
+            WITH buscados (orden, nombre, equipo) AS (VALUES {valores})
+            SELECT b.orden, j.url_besoccer
+            FROM buscados b
+            JOIN jugadores_observados j
+              ON j.nombre_norm = LOWER(TRIM(b.nombre)) AND j.equipo_norm = LOWER(TRIM(b.equipo))
+            WHERE j.url_besoccer IS NOT NULL AND j.url_besoccer != ''
+            ORDER BY b.orden, j.id
+        ''', params).fetchall()
+    finally:
+        conn.close()
+
+    # La primera URL de cada jugador de la lista, sin repetir
+    urls, vistos = [], set()
+    for orden, url in filas:
+        if orden not in vistos and url not in urls:
+            urls.append(url)
+        vistos.add(orden)
+    return urls
+
+
+def partidos_precargados(fecha_str):
+    """
+    Partidos de una fecha desde el índice local, o None si no están o si la
+    página de livescore de esa fecha ya no está vigente en la caché HTTP
+    """
+    if not obtener_cache_http().vigente(f"https://es.besoccer.com/livescore/{fecha_str}"):
+        return None
+    return obtener_indice_partidos().por_fecha(fecha_str) or None
+
+
+class PlanificadorPrecarga:
+    """Hilo que precarga periódicamente la jornada (instancia única por proceso)"""
+    _instance = None
+    _initialized = False
+    _lock = threading.Lock()
+
+    def __new__(cls, *args, **kwargs):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self, intervalo=INTERVALO_POR_DEFECTO):
+        if PlanificadorPrecarga._initialized:
+            return
+
+        self.intervalo = intervalo
+        self.ultima_ejecucion = None
+        self.ultimo_resumen = {}
+        self._hilo = None
+        self._parar = threading.Event()
+        self._ciclo_lock = threading.Lock()
+
+        PlanificadorPrecarga._initialized = True
+
+    def activo(self):
+        return self._hilo is not None and self._hilo.is_alive()
+
+    def iniciar(self):
+        """Arranca el hilo si no está ya en marcha"""
+        with PlanificadorPrecarga._lock:
+            if self.activo():
+                return False
+            self._parar.clear()
+            self._hilo = threading.Thread(target=self._bucle, name="precarga-besoccer", daemon=True)
+            self._hilo.start()
+        logger.info(f"⏰ Precarga de BeSoccer cada {self.intervalo // 60} min")
+        return True
+
+    def detener(self):
+        self._parar.set()
+
+    def _bucle(self):
+        while not self._parar.is_set():
+            try:
+                self.ejecutar_ciclo()
+            except Exception as e:
+                logger.error(f"❌ Error en la precarga de BeSoccer: {e}")
+            self._parar.wait(self.intervalo)
+
+    def ejecutar_ciclo(self, ahora=None):
+        """Una pasada completa de precarga; devuelve el resumen por fecha"""
+        if not self._ciclo_lock.acquire(blocking=False):
+            return self.ultimo_resumen
+
+        try:
+            inicio = time.time()
+            ahora = ahora or datetime.now()
+            scraper = BeSoccerScraper()
+            scraper_livescore = BeSoccerAlineacionesScraper()
+            resumen = {}
+
+            for dias in range(DIAS_A_PRECARGAR):
+                fecha_str = (ahora + timedelta(days=dias)).strftime('%Y-%m-%d')
+                # Sin pasar por la caché en memoria, para revalidar la de disco
+                scraper_livescore._olvidar_cache(f"livescore_{fecha_str}")
+                partidos = scraper_livescore.buscar_partidos_en_fecha(fecha_str)
+                con_alineaciones = [p for p in partidos
+                                    if _alineaciones_publicadas({**p, 'fecha': fecha_str}, ahora)]
+                resumen[fecha_str] = {'partidos': len(partidos), 'alineaciones': 0, 'perfiles': 0}
+                if con_alineaciones:
+                    jornada = scraper.precargar_jornada(fecha_str, con_alineaciones)
+                    resumen[fecha_str].update(alineaciones=jornada['alineaciones'],
+                                              perfiles=jornada['perfiles'])
+
+            urls = urls_perfiles_seguimiento()
+            resumen['seguimiento'] = sum(1 for url in urls if scraper.obtener_datos_perfil_jugador(url))
+
+            self.ultima_ejecucion = time.time()
+            self.ultimo_resumen = resumen
+            logger.info(f"✅ Precarga de BeSoccer en {time.time() - inicio:.1f}s: {resumen}")
+            return resumen
+        finally:
+            self._ciclo_lock.release()
+
+
+_ultima_precarga_pagina = {}
+_precarga_pagina_lock = threading.Lock()
+
+
+def precargar_jornada_desde_pagina(fecha_str, partidos, ahora=None):
+    """
+    Precarga en segundo plano las alineaciones de la jornada que se está
+    viendo. Como las páginas se vuelven a ejecutar con cada clic, solo se
+    lanza como mucho una vez por fecha cada INTERVALO_POR_DEFECTO segundos
+    y solo para los partidos cuyas alineaciones ya pueden estar publicadas.
+    """
+    ahora = ahora or datetime.now()
+    con_alineaciones = [p for p in partidos or []
+                        if _alineaciones_publicadas({**p, 'fecha': fecha_str}, ahora)]
+    if not con_alineaciones:
+        return False
+
+    with _precarga_pagina_lock:
+        ultima = _ultima_precarga_pagina.get(fecha_str)
+        if ultima is not None and time.time() - ultima < INTERVALO_POR_DEFECTO:
+            return False
+        _ultima_precarga_pagina[fecha_str] = time.time()
+
+    return precargar_jornada_en_segundo_plano(fecha_str, con_alineaciones)
+
+
+def iniciar_planificador(intervalo=INTERVALO_POR_DEFECTO):
+    """Arranca la precarga en este proceso salvo que BESOCCER_PRECARGA=0"""
+    if os.environ.get(VARIABLE_ENTORNO, '1') == '0':
+        return None
+    planificador = PlanificadorPrecarga(intervalo)
+    planificador.iniciar()
+    return planificador
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Precarga periódica de datos de BeSoccer")
+    parser.add_argument('--intervalo', type=int, default=INTERVALO_POR_DEFECTO, help="segundos entre pasadas")
+    parser.add_argument('--una-vez', action='store_true', help="hacer una sola pasada y salir")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(message)s')
+    planificador = PlanificadorPrecarga(args.intervalo)
+    if args.una_vez:
+        planificador.ejecutar_ciclo()
+        return 0
+
+    try:
+        planificador._bucle()
+    except KeyboardInterrupt:
+        planificador.detener()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,40 +3,114 @@
 import pandas as pd
 import numpy as np
 from difflib import SequenceMatcher
-import os
 import unicodedata
+from collections import defaultdict
+from models.wyscout_store import obtener_store_wyscout
+from common.resoluciones_wyscout import obtener_resolucion, guardar_resoluciones
+
+# Origen de las resoluciones guardadas en busquedas_wyscout
+ORIGEN_EXTRACTOR = 'extractor_personalizado'
+
+
+class _NombresPreparados:
+    """
+    Nombres y equipos del dataset normalizados una sola vez (por versión del
+    dataset) con los índices que usa la búsqueda por lotes:
+    - nombre normalizado -> filas (match exacto)
+    - (inicial, apellido) -> filas (match por iniciales)
+    - token -> filas (similitud por tokens)
+    - matriz de conteo de caracteres (cota superior de SequenceMatcher)
+    - equipos factorizados para puntuar cada equipo distinto una sola vez
+    """
+
+    def __init__(self, df, normalizar):
+        self.df = df
+        col_nombre = 'jugador' if 'jugador' in df.columns else (df.columns[0] if len(df.columns) else None)
+        col_equipo = 'equipo_durante_el_período_seleccionado'
+
+        n = len(df)
+        self.nombres = [str(v) for v in df[col_nombre]] if col_nombre else [''] * n
+        if col_equipo in df.columns:
+            equipos = [str(v) for v in df[col_equipo]]
+        else:
+            equipos = [''] * n
+        self.equipos = equipos
+        self.nombres_norm = [normalizar(nombre) for nombre in self.nombres]
+
+        # Equipos: código por fila y texto normalizado de cada equipo distinto
+        codigos, unicos = pd.factorize(pd.Series(equipos, dtype=object))
+        self.codigo_equipo = codigos
+        self.equipos_unicos = list(unicos)
+        self.equipos_unicos_norm = [normalizar(e) for e in self.equipos_unicos]
+
+        self.exactos = defaultdict(list)
+        self.iniciales_todos = defaultdict(list)
+        self.iniciales_abreviados = defaultdict(list)
+        self.tokens = defaultdict(list)
+        self.num_tokens = np.zeros(n, dtype=np.int32)
+
+        for i, (nombre, nombre_norm) in enumerate(zip(self.nombres, self.nombres_norm)):
+            self.exactos[nombre_norm].append(i)
+
+            partes = nombre.split()
+            if partes:
+                self.iniciales_todos[(partes[0][0].lower(), partes[-1].lower())].append(i)
+                if len(partes[0]) <= 2 and partes[0].endswith('.'):
+                    apellido = partes[-1].lower() if len(partes) > 1 else ""
+                    self.iniciales_abreviados[(partes[0][0].lower(), apellido)].append(i)
+
+            tokens = set(nombre_norm.split())
+            self.num_tokens[i] = len(tokens)
+            for token in tokens:
+                self.tokens[token].append(i)
+
+        self.tokens = {t: np.asarray(filas, dtype=np.int32) for t, filas in self.tokens.items()}
+
+        # Conteo de caracteres por fila; la última columna agrupa caracteres desconocidos
+        alfabeto = sorted(set(''.join(self.nombres_norm)))
+        self.posicion_caracter = {c: j for j, c in enumerate(alfabeto)}
+        self.conteo_caracteres = np.zeros((n, len(alfabeto) + 1), dtype=np.int16)
+        for i, nombre_norm in enumerate(self.nombres_norm):
+            for c in nombre_norm:
+                self.conteo_caracteres[i, self.posicion_caracter[c]] += 1
+        self.longitudes = np.array([len(x) for x in self.nombres_norm], dtype=np.int32)
+
+    def conteo_consulta(self, texto_norm):
+        conteo = np.zeros(self.conteo_caracteres.shape[1], dtype=np.int16)
+        otros = self.conteo_caracteres.shape[1] - 1
+        for c in texto_norm:
+            conteo[self.posicion_caracter.get(c, otros)] += 1
+        return conteo
+
 
 class WyscoutExtractorPersonalizado:
     def __init__(self):
         """Inicializa el extractor con los datos de Wyscout"""
         self.df = None
+        self._preparados = None
         self.cargar_datos()
     
     def cargar_datos(self):
-        """Carga los datos desde el Excel de Wyscout"""
+        """Obtiene los datos de Wyscout del store compartido del proceso"""
         try:
-            rutas_posibles = [
-                'data/wyscout_LaLiga_limpio.xlsx',
-                '../data/wyscout_LaLiga_limpio.xlsx',
-                '../../data/wyscout_LaLiga_limpio.xlsx',
-                os.path.join(os.path.dirname(__file__), '../data/wyscout_LaLiga_limpio.xlsx')
-            ]
-            
-            for ruta in rutas_posibles:
-                if os.path.exists(ruta):
-                    self.df = pd.read_excel(ruta)
-                    # Solo log si es la primera vez
-                    if not hasattr(self, '_datos_cargados'):
-                        print(f"✅ Datos Wyscout cargados: {len(self.df)} jugadores")
-                        self._datos_cargados = True
-                    return
+            store = obtener_store_wyscout()
+            self._preparados = store.derivado(
+                'extractor_personalizado',
+                lambda df: _NombresPreparados(df, self.normalizar_texto)
+            )
+            self.df = self._preparados.df
             
-            print("❌ No se encontró el archivo de datos Wyscout")
-            self.df = pd.DataFrame()
+            if self.df.empty:
+                print("❌ No se encontró el archivo de datos Wyscout")
+            elif not hasattr(self, '_datos_cargados'):
+                # Solo log si es la primera vez
+                print(f"✅ Datos Wyscout cargados: {len(self.df)} jugadores")
+                self._datos_cargados = True
             
         except Exception as e:
             print(f"❌ Error cargando datos Wyscout: {e}")
             self.df = pd.DataFrame()
+            self._preparados = None
     
     def normalizar_texto(self, texto):
         """Normaliza texto para comparación (quita acentos, minúsculas, etc)"""
@@ -136,6 +210,10 @@ class WyscoutExtractorPersonalizado:
         
         return list(set(variaciones))  # Eliminar duplicados
 
+    def calcular_similitud_exacta(self, nombre1, nombre2):
+        """1.0 si los nombres normalizados coinciden, 0 en otro caso"""
+        return 1.0 if self.normalizar_texto(nombre1) == self.normalizar_texto(nombre2) else 0
+
     def calcular_similitud_iniciales(self, nombre1, nombre2):
         """Calcula similitud considerando formato inicial + apellido"""
         partes1 = nombre1.split()
@@ -180,102 +258,195 @@ class WyscoutExtractorPersonalizado:
         """
         Búsqueda mejorada con múltiples estrategias
         """
-        if self.df is None or self.df.empty:
-            return None
-        
-        # Preparar variaciones del nombre a buscar
-        variaciones_nombre = self.generar_variaciones_nombre(nombre_buscar)
-        variaciones_equipo = self.generar_variaciones_equipo(equipo_buscar) if equipo_buscar else []
-        
-        mejor_match = None
-        mejor_score = 0
-        detalles_match = {}
-        
-        # Columnas del dataset
-        col_nombre = 'jugador' if 'jugador' in self.df.columns else self.df.columns[0]
-        col_equipo = 'equipo_durante_el_período_seleccionado'
-        
-        for idx, row in self.df.iterrows():
-            nombre_wyscout = str(row[col_nombre])
-            equipo_wyscout = str(row[col_equipo]) if col_equipo in self.df.columns else ""
-            
-            # Calcular scores con diferentes métodos
-            scores = []
-            
-            # 1. Match exacto normalizado
-            score_exacto = self.calcular_similitud_exacta(nombre_buscar, nombre_wyscout)
-            if score_exacto > 0.95:
-                scores.append(('exacto', score_exacto, 1.5))  # Peso extra para match exacto
-            
-            # 2. Match por iniciales + apellido
-            score_iniciales = self.calcular_similitud_iniciales(nombre_buscar, nombre_wyscout)
-            if score_iniciales > 0.8:
-                scores.append(('iniciales', score_iniciales, 1.2))
-            
-            # 3. Match por tokens (palabras individuales)
-            score_tokens = self.calcular_similitud_tokens(nombre_buscar, nombre_wyscout)
-            if score_tokens > 0.7:
-                scores.append(('tokens', score_tokens, 1.0))
-            
-            # 4. Match por similitud difusa
-            score_difuso = SequenceMatcher(None, 
-                                        self.normalizar_texto(nombre_buscar), 
-                                        self.normalizar_texto(nombre_wyscout)).ratio()
-            scores.append(('difuso', score_difuso, 0.8))
-            
-            # Calcular score final del nombre
-            if scores:
-                score_nombre = max(s[1] * s[2] for s in scores)
-                metodo_usado = next(s[0] for s in scores if s[1] * s[2] == score_nombre)
-            else:
-                score_nombre = 0
-                metodo_usado = 'ninguno'
-            
-            # Score del equipo
+        return self.buscar_jugadores_lote([(nombre_buscar, equipo_buscar)], umbral_minimo)[0]
+
+    def _scores_equipo(self, equipo_buscar):
+        """Similitud de cada equipo distinto del dataset con las variaciones del equipo buscado"""
+        prep = self._preparados
+        variaciones = [self.normalizar_texto(v) for v in self.generar_variaciones_equipo(equipo_buscar)]
+        scores = np.zeros(len(prep.equipos_unicos))
+        for j, (equipo, equipo_norm) in enumerate(zip(prep.equipos_unicos, prep.equipos_unicos_norm)):
+            if not equipo:
+                continue
+            for var_equipo in variaciones:
+                scores[j] = max(scores[j], SequenceMatcher(None, var_equipo, equipo_norm).ratio())
+        return scores
+
+    def _scores_nombre_exactos(self, nombre_buscar):
+        """
+        Scores ponderados de los métodos exacto, iniciales y tokens para todas
+        las filas, calculados con los índices (solo tocan filas candidatas)
+        """
+        prep = self._preparados
+        n = len(prep.nombres)
+        exacto = np.zeros(n)
+        iniciales = np.zeros(n)
+        tokens = np.zeros(n)
+
+        # 1. Match exacto normalizado
+        exacto[prep.exactos.get(self.normalizar_texto(nombre_buscar), [])] = 1.0 * 1.5
+
+        # 2. Match por iniciales + apellido (en ambos sentidos)
+        partes = nombre_buscar.split()
+        if partes:
+            if len(partes[0]) <= 2 and partes[0].endswith('.'):
+                apellido = partes[-1].lower() if len(partes) > 1 else ""
+                iniciales[prep.iniciales_todos.get((partes[0][0].lower(), apellido), [])] = 0.9 * 1.2
+            iniciales[prep.iniciales_abreviados.get((partes[0][0].lower(), partes[-1].lower()), [])] = 0.9 * 1.2
+
+        # 3. Match por tokens (índice de Jaccard sobre filas con algún token común)
+        tokens_buscar = set(self.normalizar_texto(nombre_buscar).split())
+        listas = [prep.tokens[t] for t in tokens_buscar if t in prep.tokens]
+        if listas:
+            comunes = np.bincount(np.concatenate(listas), minlength=n)
+            filas = np.flatnonzero(comunes)
+            union = len(tokens_buscar) + prep.num_tokens[filas] - comunes[filas]
+            jaccard = comunes[filas] / union
+            tokens[filas] = np.where(jaccard > 0.7, jaccard, 0)
+
+        return exacto, iniciales, tokens
+
+    def _buscar_en_preparados(self, nombre_buscar, scores_equipo):
+        """
+        Mejor fila para un nombre. El SequenceMatcher solo se ejecuta en las
+        filas cuya cota superior (conteo de caracteres) puede superar al mejor
+        score encontrado, de mayor a menor cota; el resultado es el mismo que
+        recorriendo todo el dataset.
+        """
+        prep = self._preparados
+        nombre_norm = self.normalizar_texto(nombre_buscar)
+
+        exacto, iniciales, tokens = self._scores_nombre_exactos(nombre_buscar)
+
+        # Cota superior de SequenceMatcher.ratio(): caracteres comunes
+        conteo = prep.conteo_consulta(nombre_norm)
+        comunes = np.minimum(prep.conteo_caracteres, conteo).sum(axis=1)
+        longitud_total = prep.longitudes + len(nombre_norm)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cota_difuso = np.where(longitud_total > 0, 2.0 * comunes / longitud_total, 1.0)
+
+        cota_nombre = np.maximum.reduce([exacto, iniciales, tokens, cota_difuso * 0.8])
+        if scores_equipo is not None:
+            score_equipo_fila = scores_equipo[prep.codigo_equipo]
+            cota_total = np.where(score_equipo_fila < 0.5, cota_nombre * 0.3,
+                                  cota_nombre * 0.7 + score_equipo_fila * 0.3)
+        else:
+            score_equipo_fila = None
+            cota_total = cota_nombre
+        cota_total = cota_total + 1e-9
+
+        mejor_fila, mejor_score, detalles_match = None, 0, {}
+        for i in np.argsort(-cota_total, kind='stable'):
+            if cota_total[i] < mejor_score:
+                break
+
+            score_difuso = SequenceMatcher(None, nombre_norm, prep.nombres_norm[i]).ratio()
+            scores = [('exacto', exacto[i]), ('iniciales', iniciales[i]),
+                      ('tokens', tokens[i]), ('difuso', score_difuso * 0.8)]
+            score_nombre = max(score for _, score in scores)
+            metodo_usado = next(metodo for metodo, score in scores if score == score_nombre)
+
             score_equipo = 0
-            if equipo_buscar and equipo_wyscout:
-                # Intentar con todas las variaciones del equipo
-                for var_equipo in variaciones_equipo:
-                    sim = SequenceMatcher(None, 
-                                        self.normalizar_texto(var_equipo), 
-                                        self.normalizar_texto(equipo_wyscout)).ratio()
-                    score_equipo = max(score_equipo, sim)
-            
-            # Score compuesto
-            if equipo_buscar:
-                # Si tenemos equipo, es importante que coincida
+            if score_equipo_fila is not None:
+                score_equipo = score_equipo_fila[i]
                 if score_equipo < 0.5:
                     score_total = score_nombre * 0.3  # Penalización fuerte
                 else:
                     score_total = (score_nombre * 0.7) + (score_equipo * 0.3)
             else:
-                # Sin equipo, solo usamos el nombre
                 score_total = score_nombre
-            
-            # Actualizar mejor match
-            if score_total > mejor_score:
-                mejor_score = score_total
-                mejor_match = row
+
+            # A igualdad de score gana la primera fila del dataset
+            if score_total > mejor_score or (score_total == mejor_score and mejor_fila is not None and i < mejor_fila):
+                mejor_fila, mejor_score = i, score_total
                 detalles_match = {
                     'metodo': metodo_usado,
-                    'score_nombre': score_nombre,
-                    'score_equipo': score_equipo,
-                    'nombre_encontrado': nombre_wyscout,
-                    'equipo_encontrado': equipo_wyscout
+                    'score_nombre': float(score_nombre),
+                    'score_equipo': float(score_equipo),
+                    'nombre_encontrado': prep.nombres[i],
+                    'equipo_encontrado': prep.equipos[i]
                 }
+
+        return mejor_fila, float(mejor_score), detalles_match
+
+    def buscar_jugadores_lote(self, consultas, umbral_minimo=0.75):
+        """
+        Busca varios jugadores de una vez (p. ej. titulares y suplentes de un partido).
         
-        # Validar resultado
-        if mejor_score >= umbral_minimo:
-            print(f"✅ Match encontrado: {detalles_match['nombre_encontrado']}")
-            print(f"   Método: {detalles_match['metodo']}")
-            print(f"   Score total: {mejor_score:.3f}")
-            return mejor_match
-        else:
-            print(f"❌ No se encontró match suficiente. Mejor score: {mejor_score:.3f}")
-            if mejor_score > 0.5:
-                print(f"   Candidato: {detalles_match.get('nombre_encontrado', 'N/A')}")
-            return None
-    
+        Args:
+            consultas: lista de tuplas (nombre, equipo); equipo puede ser None
+            umbral_minimo: score mínimo para aceptar el match
+        
+        Returns:
+            lista con la fila de Wyscout (Series) o None para cada consulta, en el mismo orden
+        """
+        # Asegurar que los datos preparados corresponden a la versión actual del dataset
+        self.cargar_datos()
+        if self.df is None or self.df.empty or self._preparados is None:
+            return [None] * len(consultas)
+
+        try:
+            version_dataset = obtener_store_wyscout().huella
+        except Exception:
+            version_dataset = None
+
+        resultados = []
+        scores_por_equipo = {}
+        resueltos = {}
+        nuevas_resoluciones = []
+
+        for nombre_buscar, equipo_buscar in consultas:
+            clave = (nombre_buscar, equipo_buscar)
+            if clave not in resueltos:
+                # Resolución ya calculada para esta versión del dataset
+                resolucion = obtener_resolucion(nombre_buscar, equipo_buscar, ORIGEN_EXTRACTOR, version_dataset)
+
+                if resolucion is not None:
+                    fila, mejor_score, metodo = resolucion
+                    if fila is not None and fila >= len(self.df):
+                        fila, mejor_score = None, 0
+                    detalles_match = {
+                        'metodo': f"{metodo} (caché)",
+                        'nombre_encontrado': self._preparados.nombres[fila] if fila is not None else 'N/A'
+                    }
+                else:
+                    # Las similitudes de equipo se calculan una vez por equipo buscado
+                    scores_equipo = None
+                    if equipo_buscar:
+                        if equipo_buscar not in scores_por_equipo:
+                            scores_por_equipo[equipo_buscar] = self._scores_equipo(equipo_buscar)
+                        scores_equipo = scores_por_equipo[equipo_buscar]
+
+                    fila, mejor_score, detalles_match = self._buscar_en_preparados(nombre_buscar or "", scores_equipo)
+                    nuevas_resoluciones.append({
+                        'nombre_buscado': nombre_buscar,
+                        'equipo_buscado': equipo_buscar or "N/A",
+                        'nombre_encontrado': detalles_match.get('nombre_encontrado'),
+                        'equipo_encontrado': detalles_match.get('equipo_encontrado'),
+                        'confianza': mejor_score,
+                        'algoritmo': detalles_match.get('metodo', 'sin_coincidencia'),
+                        'fila_wyscout': int(fila) if fila is not None else None
+                    })
+
+                # Validar resultado
+                if fila is not None and mejor_score >= umbral_minimo:
+                    print(f"✅ Match encontrado: {detalles_match['nombre_encontrado']}")
+                    print(f"   Método: {detalles_match['metodo']}")
+                    print(f"   Score total: {mejor_score:.3f}")
+                    resueltos[clave] = self.df.iloc[fila]
+                else:
+                    print(f"❌ No se encontró match suficiente. Mejor score: {mejor_score:.3f}")
+                    if mejor_score > 0.5:
+                        print(f"   Candidato: {detalles_match.get('nombre_encontrado', 'N/A')}")
+                    resueltos[clave] = None
+
+            resultados.append(resueltos[clave])
+
+        if version_dataset is not None:
+            guardar_resoluciones(nuevas_resoluciones, ORIGEN_EXTRACTOR, version_dataset)
+
+        return resultados
+
     def obtener_datos_completos_jugador(self, nombre_jugador, equipo_jugador=None):
         """
         Obtiene datos completos del jugador con validación estricta